@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'orders.db_router.ReadYourWritesMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +51,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Ostatni - profiluje sam widok; wyłączony nie dokłada narzutu (orders.profiling)
+    'orders.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -81,6 +85,21 @@ DATABASES = {
     }
 }
 
+# Opcjonalna replika tylko do odczytu (np. kopia pliku SQLite) - orders.db_router
+if os.environ.get('DJANGO_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DJANGO_REPLICA_DB'],
+        # W testach replika to ta sama baza co default
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['orders.db_router.PrimaryReplicaRouter']
+REPLICA_DATABASE = 'replica'
+
+# Po zapisie klient czyta z bazy głównej przez tyle sekund (opóźnienie replikacji)
+REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -118,6 +137,49 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Katalog docelowy collectstatic (serwowany bezpośrednio przez serwer WWW)
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 DEFAULT_FROM_EMAIL = "serwis@example.com"
+
+# Adres serwisu do linków absolutnych w mailach (orders.emails)
+SITE_URL = "http://localhost:8000"
+
+
+# Cache współdzielony między procesami (dane zależne od wersji katalogu - sama wersja jest w bazie)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / ".cache",
+    }
+}
+
+
+# Powiadomienia o zmianie statusu wysyłane zbiorczo (orders.notifications):
+# zdarzenia zlecenia z tego okna (sekundy) trafiają do jednej wiadomości
+NOTIFICATION_DIGEST_WINDOW = 300
+# Zdarzenia przejęte przez wysyłkę dłużej niż tyle sekund (komenda przerwana) wracają do puli
+NOTIFICATION_LOCK_TIMEOUT = 600
+
+# Zadania w tle (orders.jobs, worker: manage.py run_jobs)
+JOB_MAX_ATTEMPTS = 5
+# Opóźnienie pierwszego ponowienia (sekundy), kolejne rosną dwukrotnie
+JOB_RETRY_DELAY = 30
+# Zadanie "w trakcie" dłużej niż tyle sekund uznajemy za porzucone przez worker
+JOB_LOCK_TIMEOUT = 600
+
+# Adresaci alertów SLA (orders.sla) dla zleceń bez przypisanego technika
+SLA_ALERT_EMAILS = []
+
+
+# Profilowanie widoków (orders.profiling) - domyślnie wyłączone
+PROFILING_ENABLED = False
+# Ułamek żądań profilowanych losowo (0.0 - tylko na żądanie nagłówkiem X-Profile)
+PROFILING_SAMPLE_RATE = 0.0
+# Wartość nagłówka X-Profile wymuszająca profil (personel nie potrzebuje tokenu)
+PROFILING_TOKEN = ""
+# "cprofile" (pliki pstats) albo "sampler" (collapsed stacks dla flamegraph)
+PROFILING_MODE = "cprofile"
+PROFILING_DIR = BASE_DIR / "profiles"
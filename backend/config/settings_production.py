@@ -0,0 +1,46 @@
+"""
+Ustawienia produkcyjne - nadpisują config/settings.py.
+
+Użycie: DJANGO_SETTINGS_MODULE=config.settings_production
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import TEMPLATES
+
+
+DEBUG = False
+
+SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
+
+ALLOWED_HOSTS = [h for h in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",") if h]
+
+SITE_URL = os.environ["DJANGO_SITE_URL"]
+SLA_ALERT_EMAILS = [e for e in os.environ.get("DJANGO_SLA_ALERT_EMAILS", "").split(",") if e]
+
+PROFILING_ENABLED = os.environ.get("DJANGO_PROFILING") == "1"
+PROFILING_SAMPLE_RATE = float(os.environ.get("DJANGO_PROFILING_SAMPLE_RATE", "0"))
+PROFILING_TOKEN = os.environ.get("DJANGO_PROFILING_TOKEN", "")
+PROFILING_MODE = os.environ.get("DJANGO_PROFILING_MODE", "sampler")
+
+# Szablony kompilowane raz na proces (cached loader) - jawnie, niezależnie od DEBUG
+TEMPLATES[0]["APP_DIRS"] = False
+TEMPLATES[0]["OPTIONS"]["loaders"] = [
+    (
+        "django.template.loaders.cached.Loader",
+        [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ],
+    ),
+]
+
+# Statyki: nazwy z hashem treści + prekompresowane .gz/.br (collectstatic)
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "orders.storage.CompressedManifestStaticFilesStorage",
+    },
+}
@@ -0,0 +1,36 @@
+"""
+Ustawienia workerów publicznych (katalog, konfigurator, koszyk, śledzenie zlecenia).
+
+Bez admina i komunikatów (messages): mniej aplikacji do załadowania przy starcie
+i tylko publiczne adresy URL (config.urls_public). Panel technika, raporty
+i admin obsługują workery z pełnymi ustawieniami.
+
+Użycie: DJANGO_SETTINGS_MODULE=config.settings_public (lokalnie - DEBUG i klucz
+z config.settings); na produkcji config.settings_public_production.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import MIDDLEWARE, TEMPLATES
+
+
+# auth i contenttypes zostają - modele zleceń mają FK do auth.User
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.staticfiles',
+    "orders",
+]
+
+MIDDLEWARE = [
+    m for m in MIDDLEWARE
+    if m not in (
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    )
+]
+
+TEMPLATES[0]["OPTIONS"]["context_processors"] = [
+    'django.template.context_processors.request',
+]
+
+ROOT_URLCONF = 'config.urls_public'
@@ -0,0 +1,14 @@
+"""
+Ustawienia produkcyjne workerów publicznych: config.settings_production
+(DEBUG=False, sekrety ze zmiennych środowiskowych) przycięte jak config.settings_public.
+
+Użycie: DJANGO_SETTINGS_MODULE=config.settings_public_production
+"""
+from .settings_production import *  # noqa: F401,F403
+from .settings_production import TEMPLATES
+from .settings_public import INSTALLED_APPS, MIDDLEWARE, ROOT_URLCONF  # noqa: F401
+
+
+TEMPLATES[0]["OPTIONS"]["context_processors"] = [
+    'django.template.context_processors.request',
+]
@@ -0,0 +1,10 @@
+"""
+Adresy URL workerów publicznych (config.settings_public) - bez admina i panelu technika.
+"""
+from django.urls import include, path
+
+from orders.urls import public_urlpatterns
+
+urlpatterns = [
+    path("", include(public_urlpatterns)),
+]
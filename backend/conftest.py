@@ -0,0 +1,32 @@
+"""
+Fixture pytest (pytest-django, requirements-dev.txt) do testów wydajności na danych z orders.seeding.
+"""
+from datetime import datetime, time
+
+import pytest
+from django.utils import timezone
+
+from orders.seeding import seed_dataset
+
+
+# Stały dzień kotwicy - ten sam zbiór danych niezależnie od daty uruchomienia
+SEED_ANCHOR_DAY = datetime(2025, 1, 15).date()
+
+
+@pytest.fixture
+def seeded_dataset(request, db, settings):
+    """
+    Zbiór danych z seed_dataset w transakcji testu; rozmiar domyślny albo z parametryzacji:
+
+        @pytest.mark.parametrize("seeded_dataset", [{"orders": 100_000}], indirect=True)
+    """
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    params = {
+        "orders": 200,
+        "services": 5,
+        "technicians": 2,
+        "chunk_size": 50,
+        "anchor": timezone.make_aware(datetime.combine(SEED_ANCHOR_DAY, time.min)),
+        **getattr(request, "param", {}),
+    }
+    return seed_dataset(**params)
@@ -1,5 +1,14 @@
-from django.contrib import admin
-from django.core.mail import send_mail
+from django import forms
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from . import export, jobs, notifications
+from .db_router import replica_reads
+from .paginators import EstimatedCountPaginator
 
 from .models import (
     Service,
@@ -8,8 +17,16 @@ from .models import (
     ServiceOrder,
     ServiceOrderComment,
     AuditLog,
+    Job,
+    Technician,
 )
 
+class CatalogImportForm(forms.Form):
+    file = forms.FileField(label="Plik katalogu (.csv / .json)")
+    dry_run = forms.BooleanField(label="Tylko pokaż różnice (bez zapisu)", required=False)
+    deactivate_missing = forms.BooleanField(label="Wyłącz rekordy nieobecne w pliku", required=False)
+
+
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
     list_display = (
@@ -21,6 +38,56 @@ class ServiceAdmin(admin.ModelAdmin):
     )
     list_filter = ("is_active",)
     search_fields = ("name",)
+    change_list_template = "admin/orders/service/change_list.html"
+
+    def get_urls(self):
+        urls = [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_catalog_view),
+                name="orders_service_import",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_catalog_view(self, request):
+        """
+        Upload pliku katalogu: diff z bazą i zapis tylko zmian (catalog_import).
+        """
+        if not self.has_change_permission(request):
+            return redirect("admin:orders_service_changelist")
+
+        # Import katalogu używany rzadko - ładowany przy pierwszym wejściu, nie przy starcie admina
+        from .catalog_import import CatalogImportError, import_catalog, parse_file
+
+        summary = None
+        form = CatalogImportForm(request.POST or None, request.FILES or None)
+
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                catalog = parse_file(upload.read(), upload.name)
+                diff = import_catalog(
+                    catalog,
+                    dry_run=form.cleaned_data["dry_run"],
+                    deactivate_missing=form.cleaned_data["deactivate_missing"],
+                )
+            except CatalogImportError as exc:
+                form.add_error("file", str(exc))
+            else:
+                summary = diff.summary()
+                if not form.cleaned_data["dry_run"]:
+                    self.message_user(request, f"Zaimportowano katalog: {summary}", messages.SUCCESS)
+                    return redirect("admin:orders_service_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import katalogu usług",
+            "form": form,
+            "summary": summary,
+        }
+        return TemplateResponse(request, "admin/orders/service/import_catalog.html", context)
 
 
 @admin.register(ServiceOptionGroup)
@@ -52,6 +119,13 @@ class ServiceOptionAdmin(admin.ModelAdmin):
     search_fields = ("name", "group__name", "group__service__name")
 
 
+@admin.register(Technician)
+class TechnicianAdmin(admin.ModelAdmin):
+    list_display = ("user", "work_start", "work_end", "works_weekends", "is_active")
+    list_filter = ("is_active", "works_weekends")
+    search_fields = ("user__username", "user__first_name", "user__last_name")
+
+
 class ServiceOrderCommentInline(admin.TabularInline):
     model = ServiceOrderComment
     extra = 1
@@ -76,12 +150,49 @@ class OverdueFilter(admin.SimpleListFilter):
 
     def queryset(self, request, queryset):
         if self.value() == "yes":
-            return [o for o in queryset if o.is_overdue()]
+            return queryset.overdue()
         if self.value() == "no":
-            return [o for o in queryset if not o.is_overdue()]
+            return queryset.not_overdue()
         return queryset
 
 
+class ConcurrentEditError(Exception):
+    """
+    Zlecenie zapisane przez kogoś innego między otwarciem a zapisem formularza.
+    """
+
+
+CONCURRENT_EDIT_MESSAGE = (
+    "Zlecenie zostało w międzyczasie zmienione przez kogoś innego. "
+    "Twoje zmiany nie zostały zapisane - sprawdź aktualny stan i wprowadź je ponownie."
+)
+
+
+class ServiceOrderAdminForm(forms.ModelForm):
+    # Wersja zlecenia z chwili otwarcia formularza (optimistic concurrency);
+    # inna nazwa niż pole modelu - version nie jest edytowalne w formularzu
+    expected_version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    class Meta:
+        model = ServiceOrder
+        fields = "__all__"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields["expected_version"].initial = self.instance.version
+
+    def clean(self):
+        cleaned_data = super().clean()
+        version = cleaned_data.get("expected_version")
+        # Wczesne wykrycie konfliktu - formularz wraca z błędem, dane użytkownika zostają
+        if self.instance.pk and version is not None:
+            current = ServiceOrder.objects.filter(pk=self.instance.pk).values_list("version", flat=True).first()
+            if current != version:
+                raise forms.ValidationError(CONCURRENT_EDIT_MESSAGE)
+        return cleaned_data
+
+
 @admin.register(ServiceOrderComment)
 class ServiceOrderCommentAdmin(admin.ModelAdmin):
     list_display = ("order", "visibility", "created_at")
@@ -104,6 +215,24 @@ class ServiceOrderCommentAdmin(admin.ModelAdmin):
             )
 
 
+def _export_action(fmt, compress, description):
+    """
+    Fabryka akcji admina: strumieniowy eksport zaznaczonych zleceń.
+    """
+    def action(modeladmin, request, queryset):
+        response = StreamingHttpResponse(
+            export.iter_export_bytes(queryset, fmt, compress=compress),
+            content_type="application/gzip" if compress else export.CONTENT_TYPES[fmt],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{export.export_filename(fmt, compress)}"'
+        )
+        return response
+
+    action.__name__ = f"export_{fmt}{'_gz' if compress else ''}"
+    return admin.action(description=description)(action)
+
+
 @admin.register(ServiceOrder)
 class ServiceOrderAdmin(admin.ModelAdmin):
     list_display = (
@@ -116,23 +245,66 @@ class ServiceOrderAdmin(admin.ModelAdmin):
     )
     list_filter = ("status", OverdueFilter)
     search_fields = ("order_number", "customer_name", "customer_email", "customer_phone")
+    # Duża tabela: liczba wierszy ze statystyk / ograniczony COUNT, nawigacja po dacie (indeks)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    date_hierarchy = "created_at"
+    # Od najnowszych - sortowanie z indeksów (created_at) i (status, created_at)
+    ordering = ("-created_at",)
+    change_list_template = "admin/orders/large_change_list.html"
+    form = ServiceOrderAdminForm
     inlines = [ServiceOrderCommentInline, AuditLogInline]
+    actions = [
+        _export_action(export.FORMAT_CSV, False, "Eksport CSV"),
+        _export_action(export.FORMAT_CSV, True, "Eksport CSV (gzip)"),
+        _export_action(export.FORMAT_JSONL, False, "Eksport JSONL"),
+        _export_action(export.FORMAT_JSONL, True, "Eksport JSONL (gzip)"),
+    ]
 
     @admin.display(boolean=True, description="Przeterminowane")
     def overdue_display(self, obj):
         return obj.is_overdue()
 
+    def changeform_view(self, request, object_id=None, form_url="", extra_context=None):
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except ConcurrentEditError:
+            self.message_user(request, CONCURRENT_EDIT_MESSAGE, messages.ERROR)
+            return redirect(request.path)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # Lista (GET) pobiera tylko kolumny z list_display; formularz i akcje - pełne wiersze
+        match = request.resolver_match
+        if request.method == "GET" and match and match.url_name == "orders_serviceorder_changelist":
+            queryset = queryset.admin_list_rows()
+        return queryset
+
     def save_model(self, request, obj, form, change):
         """
         Hook Django Admin wywoływany przy zapisie zlecenia.
         """
         old_status = None
         old_estimate = None
+        old_technician_id = None
 
         if change:
             old_obj = ServiceOrder.objects.get(pk=obj.pk)
             old_status = old_obj.status
             old_estimate = old_obj.estimated_completion_at
+            old_technician_id = old_obj.assigned_technician_id
+
+            # Compare-and-swap wersji: wygrywa pierwszy zapis, drugi dostaje konflikt
+            # (cały zapis admina jest w jednej transakcji - wyjątek ją wycofuje)
+            expected = form.cleaned_data.get("expected_version")
+            if expected is None:
+                expected = old_obj.version
+            if not ServiceOrder.objects.update_versioned(obj.pk, expected):
+                raise ConcurrentEditError()
+            obj.version = expected + 1
+
+        if not change or old_estimate != obj.estimated_completion_at:
+            obj.estimate_is_manual = obj.estimated_completion_at is not None
 
         super().save_model(request, obj, form, change)
 
@@ -148,7 +320,7 @@ class ServiceOrderAdmin(admin.ModelAdmin):
             )
             return
 
-        # Log + mail: zmiana statusu
+        # Log + powiadomienie (zbiorczy mail, orders.notifications): zmiana statusu
         if old_status != obj.status:
             AuditLog.objects.create(
                 order=obj,
@@ -160,15 +332,7 @@ class ServiceOrderAdmin(admin.ModelAdmin):
                 performed_by=request.user,
             )
 
-            send_mail(
-                subject=f"Zmiana statusu zlecenia {obj.order_number}",
-                message=(
-                    f"Status Twojego zlecenia {obj.order_number} został zmieniony.\n\n"
-                    f"Aktualny status: {obj.get_status_display()}\n"
-                ),
-                from_email=None,
-                recipient_list=[obj.customer_email],
-            )
+            notifications.queue_status_change(obj, old_status, obj.status)
 
         # Log: zmiana estymacji
         if old_estimate != obj.estimated_completion_at:
@@ -181,6 +345,13 @@ class ServiceOrderAdmin(admin.ModelAdmin):
                 new_value=str(obj.estimated_completion_at),
                 performed_by=request.user,
             )
+            # Estymacja ustawiona ręcznie - nie nadpisujemy jej planem
+            return
+
+        # Przeplanowanie tylko kolejek techników, których dotyczy zmiana - w tle (run_jobs)
+        if old_status != obj.status or old_technician_id != obj.assigned_technician_id:
+            for technician_id in {old_technician_id, obj.assigned_technician_id} - {None}:
+                jobs.enqueue(jobs.REPLAN_TECHNICIAN, {"technician_id": technician_id}, key=f"replan:{technician_id}")
 
 
 
@@ -189,6 +360,10 @@ class AuditLogAdmin(admin.ModelAdmin):
     list_display = ("entity_type", "entity_id", "action", "performed_by", "performed_at")
     list_filter = ("entity_type", "action")
     search_fields = ("entity_type", "entity_id", "old_value", "new_value", "performed_by__username")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    date_hierarchy = "performed_at"
+    change_list_template = "admin/orders/large_change_list.html"
     readonly_fields = (
         "entity_type",
         "entity_id",
@@ -205,3 +380,34 @@ class AuditLogAdmin(admin.ModelAdmin):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+    def changelist_view(self, request, extra_context=None):
+        # Audit log tylko do odczytu - lista z repliki (orders.db_router)
+        with replica_reads():
+            response = super().changelist_view(request, extra_context)
+            # TemplateResponse renderuje się leniwie - zapytania listy muszą paść w tym bloku
+            if hasattr(response, "render"):
+                response.render()
+            return response
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "priority", "attempts", "run_at", "finished_at", "duration_ms")
+    list_filter = ("status", "name")
+    readonly_fields = [f.name for f in Job._meta.fields]
+    actions = ["retry_jobs"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Ponów wybrane zadania")
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status=Job.Status.RUNNING).update(
+            status=Job.Status.QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            locked_by="",
+            last_error="",
+        )
+        self.message_user(request, f"Ponowiono {updated} zadań.")
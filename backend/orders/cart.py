@@ -0,0 +1,224 @@
+"""
+Koszyk usług (w sesji) i zapis zlecenia wielopozycyjnego.
+
+Wszystkie pozycje koszyka wyceniamy na jednym odczycie katalogu (CatalogSnapshot,
+2 zapytania), a zlecenie zapisujemy w jednej transakcji stałą liczbą INSERT-ów
+(zlecenie, audit, bulk_create pozycji, bulk_create opcji, zadanie maila) - niezależnie
+od liczby pozycji w koszyku.
+
+Formularz zamówienia niesie klucz idempotencji (unikalny w ServiceOrder):
+powtórzony POST (podwójne kliknięcie, retry proxy) zwraca zlecenie utworzone
+za pierwszym razem, bez żadnych zapisów.
+"""
+import uuid
+
+from django.db import IntegrityError, transaction
+
+from . import jobs
+from .models import (
+    AuditLog,
+    Service,
+    ServiceOption,
+    ServiceOrder,
+    ServiceOrderItem,
+    ServiceOrderItemOption,
+)
+
+
+CART_SESSION_KEY = "orders_cart"
+
+# Górny limit pozycji - koszyk żyje w sesji
+MAX_CART_LINES = 20
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+
+class CartError(Exception):
+    """
+    Pozycja koszyka nie pasuje do bieżącego katalogu (usługa/opcja niedostępna).
+    """
+
+
+class Cart:
+    """
+    Koszyk w sesji: lista {"service_id": int, "option_ids": [int, ...]}.
+    """
+    def __init__(self, session):
+        self.session = session
+        self.lines = list(session.get(CART_SESSION_KEY, []))
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def save(self) -> None:
+        self.session[CART_SESSION_KEY] = self.lines
+        self.session.modified = True
+
+    def add(self, service_id: int, option_ids) -> None:
+        if len(self.lines) >= MAX_CART_LINES:
+            raise CartError(f"Koszyk może zawierać maksymalnie {MAX_CART_LINES} pozycji.")
+        self.lines.append({"service_id": service_id, "option_ids": sorted(set(option_ids))})
+        self.save()
+
+    def remove(self, index: int) -> None:
+        if 0 <= index < len(self.lines):
+            del self.lines[index]
+            self.save()
+
+    def clear(self) -> None:
+        self.lines = []
+        self.save()
+
+
+class CatalogSnapshot:
+    """
+    Jeden spójny odczyt katalogu dla zestawu pozycji (usługi + opcje z grupami).
+    """
+    def __init__(self, lines):
+        lines = list(lines)
+        service_ids = {line["service_id"] for line in lines}
+        option_ids = {opt_id for line in lines for opt_id in line["option_ids"]}
+
+        self.services = Service.objects.filter(is_active=True).in_bulk(service_ids)
+        self.options = (
+            ServiceOption.objects.filter(is_active=True, group__is_active=True)
+            .select_related("group")
+            .in_bulk(option_ids)
+        )
+
+    def price_line(self, service_id: int, option_ids) -> dict:
+        """
+        Wycena pozycji: widełki ceny i czas pracy. Rzuca CartError, gdy wybór
+        nie pasuje do katalogu.
+        """
+        service = self.services.get(service_id)
+        if service is None:
+            raise CartError("Wybrana usługa nie jest już dostępna.")
+
+        options = []
+        for opt_id in option_ids:
+            opt = self.options.get(opt_id)
+            if opt is None or opt.group.service_id != service.id:
+                raise CartError(f"Opcja #{opt_id} nie jest dostępna dla usługi {service.name}.")
+            options.append(opt)
+
+        return {
+            "service": service,
+            "options": options,
+            "total_min": service.base_price_min + sum(o.price_delta_min for o in options),
+            "total_max": service.base_price_max + sum(o.price_delta_max for o in options),
+            "duration_minutes": ServiceOrderItem.calculate_duration(service, options),
+        }
+
+
+def new_idempotency_key() -> str:
+    return uuid.uuid4().hex
+
+
+def clean_idempotency_key(raw):
+    """
+    Klucz z formularza albo None (brak / niepoprawny - zamówienie bez ochrony przed powtórzeniem).
+    """
+    raw = (raw or "").strip()
+    if 0 < len(raw) <= IDEMPOTENCY_KEY_MAX_LENGTH and raw.isascii() and raw.replace("-", "").isalnum():
+        return raw
+    return None
+
+
+def find_placed_order(idempotency_key):
+    if not idempotency_key:
+        return None
+    return ServiceOrder.objects.filter(idempotency_key=idempotency_key).only("id", "order_number").first()
+
+
+def send_order_confirmation(order_id: int) -> None:
+    """
+    Handler zadania (orders.jobs): mail z potwierdzeniem, pozycje ze snapshotu w zleceniu.
+    """
+    # Obsługa maili (django.core.mail, szablony) ładowana dopiero przy pierwszej wysyłce
+    from .emails import render_email
+
+    order = ServiceOrder.objects.get(pk=order_id)
+    lines = [
+        {"name": item.service_name_snapshot, "total_min": item.calculated_price_min, "total_max": item.calculated_price_max}
+        for item in order.items.order_by("id")
+    ]
+    render_email(
+        "order_confirmation",
+        {"order": order, "lines": lines},
+        to=[order.customer_email],
+    ).send()
+
+
+@transaction.atomic
+def place_order(customer_name: str, customer_email: str, customer_phone: str, priced_lines: list,
+                idempotency_key: str = None) -> ServiceOrder:
+    """
+    Zapis zlecenia z wieloma pozycjami: 5 INSERT-ów niezależnie od liczby pozycji.
+    Mail z potwierdzeniem wysyła worker zadań (orders.jobs) po zatwierdzeniu transakcji.
+    Przy znanym kluczu idempotencji zwraca istniejące zlecenie (bez zapisów).
+    """
+    existing = find_placed_order(idempotency_key)
+    if existing:
+        return existing
+
+    if not priced_lines:
+        raise CartError("Koszyk jest pusty.")
+
+    try:
+        with transaction.atomic():
+            order = ServiceOrder.objects.create(
+                customer_name=customer_name,
+                customer_email=customer_email,
+                customer_phone=customer_phone,
+                idempotency_key=idempotency_key,
+            )
+    except IntegrityError:
+        # Równoległe żądanie z tym samym kluczem zapisało zlecenie pierwsze
+        existing = find_placed_order(idempotency_key)
+        if existing is None:
+            raise
+        return existing
+
+    AuditLog.objects.create(
+        order=order,
+        entity_type=AuditLog.EntityType.SERVICE_ORDER,
+        entity_id=order.id,
+        action=AuditLog.Action.ORDER_CREATED,
+        new_value=f"status={order.status}",
+        performed_by=None,
+    )
+
+    items = ServiceOrderItem.objects.bulk_create([
+        ServiceOrderItem(
+            order=order,
+            service=line["service"],
+            service_name_snapshot=line["service"].name,
+            base_price_min_snapshot=line["service"].base_price_min,
+            base_price_max_snapshot=line["service"].base_price_max,
+            calculated_price_min=line["total_min"],
+            calculated_price_max=line["total_max"],
+            estimated_duration_minutes=line["duration_minutes"],
+        )
+        for line in priced_lines
+    ])
+
+    # bulk_create zwraca pozycje z nadanymi pk (PostgreSQL, SQLite >= 3.35)
+    ServiceOrderItemOption.objects.bulk_create([
+        ServiceOrderItemOption(
+            order_item=item,
+            option=opt,
+            option_name_snapshot=opt.name,
+            price_delta_min_snapshot=opt.price_delta_min,
+            price_delta_max_snapshot=opt.price_delta_max,
+        )
+        for item, line in zip(items, priced_lines)
+        for opt in line["options"]
+    ])
+
+    # Mail wysyła worker (run_jobs) - zadanie zapisane w tej samej transakcji co zlecenie
+    jobs.enqueue(jobs.SEND_ORDER_CONFIRMATION, {"order_id": order.id}, priority=jobs.PRIORITY_HIGH)
+    return order
@@ -0,0 +1,59 @@
+"""
+Wersja katalogu usług - licznik w bazie (CatalogVersion), podbijany przy każdej zmianie katalogu.
+
+Klucze cache danych zależnych od katalogu (fragmenty szablonów, walidatory,
+liczniki) zawierają numer wersji, więc podbicie wersji unieważnia je wszystkie
+naraz, bez przeszukiwania cache. Licznik jest w bazie, nie w cache: cache może
+usunąć wpis (limit MAX_ENTRIES), a licznik liczony od nowa trafiłby na stare wpisy.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CatalogVersion
+
+
+CATALOG_VERSION_PK = 1
+
+
+def _initial_version() -> int:
+    # Nowy wiersz (np. po odtworzeniu bazy przy zachowanym cache) nie może trafić
+    # na numer użyty wcześniej - startujemy od znacznika czasu zamiast od 1
+    return int(timezone.now().timestamp())
+
+
+def _catalog_state() -> CatalogVersion:
+    state, _ = CatalogVersion.objects.get_or_create(
+        pk=CATALOG_VERSION_PK,
+        defaults={"version": _initial_version(), "changed_at": timezone.now()},
+    )
+    return state
+
+
+def get_catalog_version() -> int:
+    return _catalog_state().version
+
+
+def bump_catalog_version() -> int:
+    updated = CatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).update(
+        version=F("version") + 1,
+        changed_at=timezone.now(),
+    )
+    if not updated:
+        # Pierwsza zmiana katalogu - wiersz powstaje już z nową wersją
+        return _catalog_state().version
+    return CatalogVersion.objects.values_list("version", flat=True).get(pk=CATALOG_VERSION_PK)
+
+
+def get_catalog_changed_at():
+    """
+    Chwila ostatniej zmiany katalogu (dla Last-Modified).
+    """
+    return _catalog_state().changed_at
+
+
+def catalog_cache_key(*parts) -> str:
+    """
+    Klucz cache związany z bieżącą wersją katalogu.
+    """
+    suffix = ":".join(str(p) for p in parts)
+    return f"orders:catalog:v{get_catalog_version()}:{suffix}"
@@ -0,0 +1,460 @@
+"""
+Import katalogu usług (Service / ServiceOptionGroup / ServiceOption) z pliku CSV lub JSON.
+
+Plik jest porównywany z bieżącym katalogiem w pamięci (3 zapytania), a do bazy
+trafiają wyłącznie różnice - przez bulk_create / bulk_update w jednej transakcji.
+Identyfikacja rekordów po nazwach: usługa po nazwie, grupa po (usługa, nazwa),
+opcja po (usługa, grupa, nazwa).
+
+Format JSON:
+    {"services": [{"name": ..., "base_price_min": ..., "base_price_max": ...,
+                   "option_groups": [{"name": ..., "options": [{"name": ...}, ...]}]}]}
+
+Format CSV: jeden wiersz na opcję (kolumny CSV_COLUMNS); pusta kolumna
+group_name / option_name oznacza wiersz opisujący samą usługę / grupę.
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .models import Service, ServiceOption, ServiceOptionGroup
+
+
+CSV_COLUMNS = [
+    "service_name",
+    "service_description",
+    "base_price_min",
+    "base_price_max",
+    "base_duration_minutes",
+    "service_is_active",
+    "group_name",
+    "selection_type",
+    "is_required",
+    "group_sort_order",
+    "group_is_active",
+    "option_name",
+    "price_delta_min",
+    "price_delta_max",
+    "duration_delta_minutes",
+    "option_sort_order",
+    "option_is_active",
+]
+
+CREATE_BATCH_SIZE = 500
+# bulk_update buduje CASE WHEN per pole - mniejsze paczki są wyraźnie szybsze
+UPDATE_BATCH_SIZE = 100
+
+_TRUE = {"1", "true", "t", "yes", "y", "tak"}
+_FALSE = {"0", "false", "f", "no", "n", "nie"}
+
+
+class CatalogImportError(Exception):
+    """
+    Błąd struktury lub wartości w importowanym pliku (nic nie zostało zapisane).
+    """
+
+
+# --- Parsowanie i normalizacja wartości -------------------------------------
+
+def _decimal(value, where: str, default=None) -> Decimal:
+    if value in (None, ""):
+        if default is None:
+            raise CatalogImportError(f"{where}: brak wymaganej kwoty")
+        return default
+    try:
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise CatalogImportError(f"{where}: niepoprawna kwota {value!r}")
+
+
+def _int(value, where: str, default: int, minimum=None) -> int:
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise CatalogImportError(f"{where}: niepoprawna liczba {value!r}")
+    if minimum is not None and number < minimum:
+        raise CatalogImportError(f"{where}: wartość {number} mniejsza niż {minimum}")
+    return number
+
+
+def _bool(value, where: str, default: bool) -> bool:
+    if value in (None, ""):
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise CatalogImportError(f"{where}: niepoprawna wartość logiczna {value!r}")
+
+
+def _text(value, where: str) -> str:
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise CatalogImportError(f"{where}: oczekiwano tekstu, jest {value!r}")
+    return value
+
+
+def _object(value, where: str, what: str) -> dict:
+    if not isinstance(value, dict):
+        raise CatalogImportError(f"{where}: oczekiwano obiektu {what}")
+    return value
+
+
+def _list(value, where: str) -> list:
+    if value in (None, ""):
+        return []
+    if not isinstance(value, list):
+        raise CatalogImportError(f"{where}: oczekiwano listy")
+    return value
+
+
+def _name(value, where: str) -> str:
+    name = _text(value, f"{where}.name").strip()
+    if not name:
+        raise CatalogImportError(f"{where}: brak nazwy")
+    if len(name) > 200:
+        raise CatalogImportError(f"{where}: nazwa dłuższa niż 200 znaków")
+    return name
+
+
+def _service_values(raw: dict, where: str) -> dict:
+    values = {
+        "description": _text(raw.get("description"), f"{where}.description"),
+        "base_price_min": _decimal(raw.get("base_price_min"), f"{where}.base_price_min"),
+        "base_price_max": _decimal(raw.get("base_price_max"), f"{where}.base_price_max"),
+        "base_duration_minutes": _int(raw.get("base_duration_minutes"), f"{where}.base_duration_minutes", 60, minimum=0),
+        "is_active": _bool(raw.get("is_active"), f"{where}.is_active", True),
+    }
+    if values["base_price_min"] > values["base_price_max"]:
+        raise CatalogImportError(f"{where}: base_price_min większe niż base_price_max")
+    return values
+
+
+def _group_values(raw: dict, where: str) -> dict:
+    selection_type = _text(raw.get("selection_type"), f"{where}.selection_type").strip().upper()
+    selection_type = selection_type or ServiceOptionGroup.SelectionType.SINGLE
+    if selection_type not in ServiceOptionGroup.SelectionType.values:
+        raise CatalogImportError(f"{where}.selection_type: niepoprawny typ {selection_type!r}")
+    return {
+        "selection_type": selection_type,
+        "is_required": _bool(raw.get("is_required"), f"{where}.is_required", False),
+        "sort_order": _int(raw.get("sort_order"), f"{where}.sort_order", 0, minimum=0),
+        "is_active": _bool(raw.get("is_active"), f"{where}.is_active", True),
+    }
+
+
+def _option_values(raw: dict, where: str) -> dict:
+    values = {
+        "price_delta_min": _decimal(raw.get("price_delta_min"), f"{where}.price_delta_min", Decimal("0.00")),
+        "price_delta_max": _decimal(raw.get("price_delta_max"), f"{where}.price_delta_max", Decimal("0.00")),
+        "duration_delta_minutes": _int(raw.get("duration_delta_minutes"), f"{where}.duration_delta_minutes", 0),
+        "sort_order": _int(raw.get("sort_order"), f"{where}.sort_order", 0, minimum=0),
+        "is_active": _bool(raw.get("is_active"), f"{where}.is_active", True),
+    }
+    if values["price_delta_min"] > values["price_delta_max"]:
+        raise CatalogImportError(f"{where}: price_delta_min większe niż price_delta_max")
+    return values
+
+
+def _normalize(services: list) -> dict:
+    """
+    Struktura zagnieżdżona -> {nazwa_usługi: (wartości, {nazwa_grupy: (wartości, {nazwa_opcji: wartości})})}.
+    """
+    if not isinstance(services, list):
+        raise CatalogImportError("Oczekiwano listy usług")
+
+    catalog = {}
+    for i, raw_service in enumerate(services):
+        where = f"services[{i}]"
+        _object(raw_service, where, "usługi")
+        name = _name(raw_service.get("name"), where)
+        if name in catalog:
+            raise CatalogImportError(f"{where}: zduplikowana usługa {name!r}")
+
+        groups = {}
+        for j, raw_group in enumerate(_list(raw_service.get("option_groups"), f"{where}.option_groups")):
+            g_where = f"{where}.option_groups[{j}]"
+            _object(raw_group, g_where, "grupy opcji")
+            g_name = _name(raw_group.get("name"), g_where)
+            if g_name in groups:
+                raise CatalogImportError(f"{g_where}: zduplikowana grupa {g_name!r}")
+
+            options = {}
+            for k, raw_option in enumerate(_list(raw_group.get("options"), f"{g_where}.options")):
+                o_where = f"{g_where}.options[{k}]"
+                _object(raw_option, o_where, "opcji")
+                o_name = _name(raw_option.get("name"), o_where)
+                if o_name in options:
+                    raise CatalogImportError(f"{o_where}: zduplikowana opcja {o_name!r}")
+                options[o_name] = _option_values(raw_option, o_where)
+
+            groups[g_name] = (_group_values(raw_group, g_where), options)
+
+        catalog[name] = (_service_values(raw_service, where), groups)
+    return catalog
+
+
+def parse_json(text: str) -> dict:
+    try:
+        data = json.loads(text)
+    except ValueError as exc:
+        raise CatalogImportError(f"Niepoprawny JSON: {exc}")
+    if isinstance(data, dict):
+        data = data.get("services")
+    return _normalize(data)
+
+
+def parse_csv(text: str) -> dict:
+    reader = csv.DictReader(io.StringIO(text))
+    missing = {"service_name", "base_price_min", "base_price_max"} - set(reader.fieldnames or [])
+    if missing:
+        raise CatalogImportError(f"Brak kolumn CSV: {', '.join(sorted(missing))}")
+
+    # Składamy wiersze w strukturę zagnieżdżoną (kolejność usług/grup jak w pliku)
+    services = {}
+    for row in reader:
+        s_name = (row.get("service_name") or "").strip()
+        service = services.setdefault(s_name, {
+            "name": s_name,
+            "description": row.get("service_description"),
+            "base_price_min": row.get("base_price_min"),
+            "base_price_max": row.get("base_price_max"),
+            "base_duration_minutes": row.get("base_duration_minutes"),
+            "is_active": row.get("service_is_active"),
+            "option_groups": {},
+        })
+
+        g_name = (row.get("group_name") or "").strip()
+        if not g_name:
+            continue
+        group = service["option_groups"].setdefault(g_name, {
+            "name": g_name,
+            "selection_type": row.get("selection_type"),
+            "is_required": row.get("is_required"),
+            "sort_order": row.get("group_sort_order"),
+            "is_active": row.get("group_is_active"),
+            "options": [],
+        })
+
+        o_name = (row.get("option_name") or "").strip()
+        if o_name:
+            group["options"].append({
+                "name": o_name,
+                "price_delta_min": row.get("price_delta_min"),
+                "price_delta_max": row.get("price_delta_max"),
+                "duration_delta_minutes": row.get("duration_delta_minutes"),
+                "sort_order": row.get("option_sort_order"),
+                "is_active": row.get("option_is_active"),
+            })
+
+    for service in services.values():
+        service["option_groups"] = list(service["option_groups"].values())
+    return _normalize(list(services.values()))
+
+
+def parse_file(content: bytes, filename: str) -> dict:
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise CatalogImportError("Plik musi być zakodowany w UTF-8")
+
+    if filename.lower().endswith(".json"):
+        return parse_json(text)
+    if filename.lower().endswith(".csv"):
+        return parse_csv(text)
+    raise CatalogImportError("Obsługiwane formaty: .csv, .json")
+
+
+# --- Diff i zapis -----------------------------------------------------------
+
+class CatalogDiff:
+    """
+    Wynik porównania pliku z katalogiem: obiekty do utworzenia / aktualizacji.
+    """
+    def __init__(self):
+        self.services_create = []
+        self.services_update = []
+        self.groups_create = []
+        self.groups_update = []
+        self.options_create = []
+        self.options_update = []
+        self.deactivated = 0
+        # Pola faktycznie zmienione - tylko je przekazujemy do bulk_update
+        self.service_fields = set()
+        self.group_fields = set()
+        self.option_fields = set()
+
+    def summary(self) -> dict:
+        return {
+            "services_created": len(self.services_create),
+            "services_updated": len(self.services_update),
+            "groups_created": len(self.groups_create),
+            "groups_updated": len(self.groups_update),
+            "options_created": len(self.options_create),
+            "options_updated": len(self.options_update),
+            "deactivated": self.deactivated,
+        }
+
+    @property
+    def has_changes(self) -> bool:
+        return any(self.summary().values())
+
+
+def _index(objects, key, where: str) -> dict:
+    index = {}
+    for obj in objects:
+        k = key(obj)
+        if k in index:
+            raise CatalogImportError(f"Katalog zawiera zduplikowane rekordy {where}: {k!r}")
+        index[k] = obj
+    return index
+
+
+def _apply_values(obj, values: dict) -> set:
+    changed = set()
+    for field, value in values.items():
+        if getattr(obj, field) != value:
+            setattr(obj, field, value)
+            changed.add(field)
+    return changed
+
+
+@transaction.atomic
+def import_catalog(catalog: dict, dry_run: bool = False, deactivate_missing: bool = False) -> CatalogDiff:
+    """
+    Porównuje znormalizowany katalog (parse_*) z bazą i zapisuje tylko różnice.
+    Rekordy nieobecne w pliku zostają bez zmian, chyba że deactivate_missing=True
+    (wtedy są wyłączane - usuwać nie możemy, bo blokują je snapshoty zleceń).
+    """
+    diff = CatalogDiff()
+    now = timezone.now()
+
+    services = _index(Service.objects.all(), lambda s: s.name, "usług")
+    groups = _index(
+        ServiceOptionGroup.objects.select_related("service"),
+        lambda g: (g.service.name, g.name),
+        "grup",
+    )
+    options = _index(
+        ServiceOption.objects.select_related("group__service"),
+        lambda o: (o.group.service.name, o.group.name, o.name),
+        "opcji",
+    )
+
+    # Usługi, których grupy/opcje się zmieniły, też dostają nowe updated_at
+    touched_services = set()
+
+    for s_name, (s_values, group_rows) in catalog.items():
+        service = services.get(s_name)
+        if service is None:
+            service = services[s_name] = Service(name=s_name, **s_values)
+            diff.services_create.append(service)
+        else:
+            changed = _apply_values(service, s_values)
+            if changed:
+                diff.services_update.append(service)
+                diff.service_fields |= changed
+
+        for g_name, (g_values, option_rows) in group_rows.items():
+            group = groups.get((s_name, g_name))
+            if group is None:
+                group = groups[(s_name, g_name)] = ServiceOptionGroup(service=service, name=g_name, **g_values)
+                diff.groups_create.append(group)
+                touched_services.add(s_name)
+            else:
+                changed = _apply_values(group, g_values)
+                if changed:
+                    diff.groups_update.append(group)
+                    diff.group_fields |= changed
+                    touched_services.add(s_name)
+
+            for o_name, o_values in option_rows.items():
+                option = options.get((s_name, g_name, o_name))
+                if option is None:
+                    diff.options_create.append(ServiceOption(group=group, name=o_name, **o_values))
+                    touched_services.add(s_name)
+                else:
+                    changed = _apply_values(option, o_values)
+                    if changed:
+                        diff.options_update.append(option)
+                        diff.option_fields |= changed
+                        touched_services.add(s_name)
+
+    if deactivate_missing:
+        _deactivate_missing(catalog, diff, services, groups, options, touched_services)
+
+    if dry_run:
+        return diff
+
+    # Kolejność ma znaczenie: dzieci dostają id rodziców po ich bulk_create
+    Service.objects.bulk_create(diff.services_create, batch_size=CREATE_BATCH_SIZE)
+    ServiceOptionGroup.objects.bulk_create(diff.groups_create, batch_size=CREATE_BATCH_SIZE)
+    ServiceOption.objects.bulk_create(diff.options_create, batch_size=CREATE_BATCH_SIZE)
+
+    # bulk_update nie wywołuje auto_now - updated_at ustawiamy sami
+    for service in diff.services_update:
+        service.updated_at = now
+    if diff.services_update:
+        Service.objects.bulk_update(
+            diff.services_update,
+            sorted(diff.service_fields | {"updated_at"}),
+            batch_size=UPDATE_BATCH_SIZE,
+        )
+    if diff.groups_update:
+        ServiceOptionGroup.objects.bulk_update(
+            diff.groups_update,
+            sorted(diff.group_fields),
+            batch_size=UPDATE_BATCH_SIZE,
+        )
+    if diff.options_update:
+        ServiceOption.objects.bulk_update(
+            diff.options_update,
+            sorted(diff.option_fields),
+            batch_size=UPDATE_BATCH_SIZE,
+        )
+
+    touched_services -= {s.name for s in diff.services_update + diff.services_create}
+    if touched_services:
+        Service.objects.filter(name__in=touched_services).update(updated_at=now)
+
+    if diff.has_changes:
+        transaction.on_commit(bump_catalog_version)
+    return diff
+
+
+def _deactivate_missing(catalog, diff, services, groups, options, touched_services) -> None:
+    for s_name, service in services.items():
+        if s_name not in catalog and service.pk and service.is_active:
+            service.is_active = False
+            diff.services_update.append(service)
+            diff.service_fields.add("is_active")
+            diff.deactivated += 1
+
+    # Grupy i opcje wyłączamy tylko w usługach obecnych w pliku
+    for (s_name, g_name), group in groups.items():
+        if s_name in catalog and g_name not in catalog[s_name][1] and group.pk and group.is_active:
+            group.is_active = False
+            diff.groups_update.append(group)
+            diff.group_fields.add("is_active")
+            touched_services.add(s_name)
+            diff.deactivated += 1
+
+    for (s_name, g_name, o_name), option in options.items():
+        group_rows = catalog.get(s_name, (None, {}))[1]
+        if g_name in group_rows and o_name not in group_rows[g_name][1] and option.is_active:
+            option.is_active = False
+            diff.options_update.append(option)
+            diff.option_fields.add("is_active")
+            touched_services.add(s_name)
+            diff.deactivated += 1
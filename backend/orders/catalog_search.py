@@ -0,0 +1,132 @@
+"""
+Wyszukiwanie i filtrowanie katalogu usług po stronie serwera.
+
+- Filtry: tekst (nazwa, opis), cena "od" (base_price_min >= X), budżet (base_price_max <= X)
+  i maksymalny czas - warunki zakresowe po indeksach (is_active, <kolumna>) modelu Service.
+- Wynik stronicowany (PAGE_SIZE), sortowanie jawne i stabilne (z id na końcu).
+- Liczniki facetów (ile usług mieści się w danym budżecie / czasie) liczymy jednym
+  zapytaniem agregującym i trzymamy w cache pod kluczem wersji katalogu
+  (catalog_cache_key) - każda zmiana katalogu unieważnia je automatycznie.
+"""
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+
+from .catalog import catalog_cache_key
+from .models import Service
+
+
+PAGE_SIZE = 20
+
+SORTS = {
+    "name": ("name", "id"),
+    "price": ("base_price_min", "id"),
+    "duration": ("base_duration_minutes", "id"),
+}
+
+# Progi facetów: "do X zł" (base_price_max) i "do X min" (base_duration_minutes)
+PRICE_FACETS = (100, 300, 1000)
+DURATION_FACETS = (60, 120, 240)
+
+FACETS_TIMEOUT = 86400
+
+
+def _decimal(raw):
+    try:
+        value = Decimal((raw or "").strip().replace(",", "."))
+    except InvalidOperation:
+        return None
+    return value if value.is_finite() and value >= 0 else None
+
+
+def _int(raw):
+    raw = (raw or "").strip()
+    # isdigit() przepuszcza też np. "²", którego int() nie przyjmie
+    return int(raw) if raw.isascii() and raw.isdigit() else None
+
+
+def parse_filters(params) -> dict:
+    """
+    Filtry z parametrów GET; niepoprawne wartości są pomijane (bez błędu dla klienta).
+    """
+    sort = params.get("sort")
+    return {
+        "q": " ".join((params.get("q") or "").split())[:100],
+        "price_min": _decimal(params.get("price_min")),
+        "price_max": _decimal(params.get("price_max")),
+        "duration_max": _int(params.get("duration_max")),
+        "sort": sort if sort in SORTS else "name",
+    }
+
+
+def _text_q(text: str) -> Q:
+    return Q(name__icontains=text) | Q(description__icontains=text)
+
+
+def active_services():
+    # is_active=True Django zapisuje jako samo "WHERE is_active" - wtedy SQLite nie używa
+    # indeksów (is_active, ...) do zakresu; IN (true) daje porównanie równościowe
+    return Service.objects.filter(is_active__in=[True])
+
+
+def filter_services(filters: dict):
+    services = active_services()
+    if filters["q"]:
+        services = services.filter(_text_q(filters["q"]))
+    if filters["price_min"] is not None:
+        services = services.filter(base_price_min__gte=filters["price_min"])
+    if filters["price_max"] is not None:
+        services = services.filter(base_price_max__lte=filters["price_max"])
+    if filters["duration_max"] is not None:
+        services = services.filter(base_duration_minutes__lte=filters["duration_max"])
+    return services.order_by(*SORTS[filters["sort"]])
+
+
+def search_services(filters: dict, page_number=1):
+    """
+    Strona wyników (Page z paginatora Django): COUNT + jedno zapytanie o stronę.
+    """
+    services = filter_services(filters).only(
+        "id",
+        "name",
+        "description",
+        "base_price_min",
+        "base_price_max",
+        "base_duration_minutes",
+        "updated_at",
+    )
+    return Paginator(services, PAGE_SIZE).get_page(page_number)
+
+
+def build_facets(text: str = "") -> dict:
+    """
+    Liczniki facetów dla aktywnych usług pasujących do tekstu - jedno zapytanie.
+    """
+    services = active_services()
+    if text:
+        services = services.filter(_text_q(text))
+
+    counts = services.aggregate(
+        total=Count("id"),
+        **{f"price_{limit}": Count("id", filter=Q(base_price_max__lte=limit)) for limit in PRICE_FACETS},
+        **{f"duration_{limit}": Count("id", filter=Q(base_duration_minutes__lte=limit)) for limit in DURATION_FACETS},
+    )
+    return {
+        "total": counts["total"],
+        "price": [(limit, counts[f"price_{limit}"]) for limit in PRICE_FACETS],
+        "duration": [(limit, counts[f"duration_{limit}"]) for limit in DURATION_FACETS],
+    }
+
+
+def get_facets(text: str = "") -> dict:
+    # Tekst zapytania w kluczu jako skrót - dowolne znaki, stała długość klucza
+    digest = hashlib.sha256(text.lower().encode()).hexdigest()[:16]
+    key = catalog_cache_key("facets", digest)
+    facets = cache.get(key)
+    if facets is None:
+        facets = build_facets(text)
+        cache.set(key, facets, timeout=FACETS_TIMEOUT)
+    return facets
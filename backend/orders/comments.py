@@ -0,0 +1,75 @@
+"""
+Stronicowanie komentarzy zlecenia kursorem (keyset) po (created_at, id).
+
+Jedna strona to jedno zapytanie po indeksie (order, visibility, created_at),
+niezależnie od długości historii zlecenia - bez OFFSET i bez COUNT(*).
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import formats, timezone
+
+from .models import ServiceOrderComment
+
+
+PAGE_SIZE = 20
+
+# Zweryfikowane w /track/ zlecenia - pozwalają doczytać starsze komentarze publiczne
+TRACKED_ORDERS_SESSION_KEY = "orders_tracked"
+
+
+def encode_cursor(comment) -> str:
+    raw = f"{comment.created_at.isoformat()}|{comment.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """
+    Kursor -> (created_at, id); niepoprawny kursor traktujemy jak jego brak.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, pk = raw.split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def comment_page(order, visibilities, before: str = None, limit: int = PAGE_SIZE):
+    """
+    Najnowsze komentarze (malejąco) starsze niż kursor `before`.
+    Zwraca (komentarze, kursor następnej strony albo None).
+    """
+    queryset = ServiceOrderComment.objects.filter(order=order, visibility__in=visibilities)
+
+    position = decode_cursor(before) if before else None
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    # limit + 1: dodatkowy wiersz mówi, czy istnieje kolejna strona
+    comments = list(queryset.order_by("-created_at", "-pk")[:limit + 1])
+    next_cursor = encode_cursor(comments[limit - 1]) if len(comments) > limit else None
+    return comments[:limit], next_cursor
+
+
+def comment_to_dict(comment) -> dict:
+    return {
+        "id": comment.pk,
+        "visibility": comment.visibility,
+        "content": comment.content,
+        "created_at": comment.created_at.isoformat(),
+        "created_at_display": formats.date_format(timezone.localtime(comment.created_at), "DATETIME_FORMAT"),
+    }
+
+
+def remember_tracked_order(session, order_number: str) -> None:
+    tracked = session.get(TRACKED_ORDERS_SESSION_KEY, [])
+    if order_number not in tracked:
+        # Kilka ostatnich wystarczy - sesja nie rośnie bez końca
+        session[TRACKED_ORDERS_SESSION_KEY] = (tracked + [order_number])[-10:]
+
+
+def is_tracked_order(session, order_number: str) -> bool:
+    return order_number in session.get(TRACKED_ORDERS_SESSION_KEY, [])
@@ -0,0 +1,97 @@
+"""
+Routing odczytów do repliki (REPLICA_DATABASE) z gwarancją read-your-writes.
+
+- Replika jest opcjonalna: bez aliasu REPLICA_DATABASE w DATABASES wszystko idzie do `default`.
+- Do repliki trafiają tylko odczyty z jawnie oznaczonych miejsc (@use_replica,
+  with replica_reads()) - widoki tylko do odczytu i raporty.
+- Zapis przypina bieżące żądanie do bazy głównej, a ReadYourWritesMiddleware
+  przez REPLICA_PIN_SECONDS przypina też kolejne żądania klienta (opóźnienie replikacji).
+- Odczyty wewnątrz transakcji na `default` zawsze idą do bazy głównej.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+PIN_COOKIE = "db_primary"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_pinned = ContextVar("pinned_to_primary", default=False)
+_wrote = ContextVar("wrote_to_primary", default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, "REPLICA_DATABASE", None)
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def replica_reads():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def use_replica(view):
+    """
+    Dekorator widoku: odczyty z repliki (o ile żądanie nie jest przypięte do bazy głównej).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if (
+            alias
+            and _replica_reads.get()
+            and not _pinned.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replika to kopia bazy głównej - relacje między nimi są poprawne
+        return True
+
+
+class ReadYourWritesMiddleware:
+    """
+    Przypina klienta do bazy głównej na REPLICA_PIN_SECONDS po żądaniu z zapisem.
+    Powinien być pierwszy w MIDDLEWARE, żeby widział też zapisy sesji.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = _pinned.set(PIN_COOKIE in request.COOKIES)
+        wrote = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get() and replica_alias():
+                response.set_cookie(
+                    PIN_COOKIE,
+                    "1",
+                    max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+                    httponly=True,
+                    samesite="Lax",
+                )
+        finally:
+            _pinned.reset(pinned)
+            _wrote.reset(wrote)
+        return response
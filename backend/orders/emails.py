@@ -0,0 +1,53 @@
+"""
+Treść maili do klienta z szablonów (orders/email/<nazwa>_subject.txt, .txt, .html).
+
+Szablony wczytujemy i kompilujemy raz na proces; wysyłka zbiorcza renderuje
+wiele wiadomości na tych samych skompilowanych obiektach. Linki są absolutne
+(SITE_URL) - mail czytany jest poza stroną serwisu.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import get_template
+from django.urls import reverse
+
+
+@lru_cache(maxsize=None)
+def get_email_templates(name: str) -> tuple:
+    """
+    (temat, treść tekstowa, treść HTML) - skompilowane szablony maila `name`.
+    """
+    return (
+        get_template(f"orders/email/{name}_subject.txt"),
+        get_template(f"orders/email/{name}.txt"),
+        get_template(f"orders/email/{name}.html"),
+    )
+
+
+def absolute_url(path: str) -> str:
+    return settings.SITE_URL.rstrip("/") + path
+
+
+def track_url() -> str:
+    return absolute_url(reverse("track_order"))
+
+
+def render_email(name: str, context: dict, to: list) -> EmailMultiAlternatives:
+    subject_tpl, text_tpl, html_tpl = get_email_templates(name)
+    if "track_url" not in context:
+        context = {"track_url": track_url(), **context}
+
+    # Temat musi być jedną linią (nagłówek maila)
+    subject = " ".join(subject_tpl.render(context).split())
+    message = EmailMultiAlternatives(subject=subject, body=text_tpl.render(context), to=to)
+    message.attach_alternative(html_tpl.render(context), "text/html")
+    return message
+
+
+def render_emails(name: str, recipients) -> list:
+    """
+    Wiele wiadomości z jednego szablonu: recipients to pary (kontekst, lista adresów).
+    """
+    link = track_url()
+    return [render_email(name, {"track_url": link, **context}, to) for context, to in recipients]
@@ -0,0 +1,197 @@
+"""
+Strumieniowy eksport zleceń (z pozycjami, wybranymi opcjami i historią audytu).
+
+Zlecenia czytamy przez iterator(chunk_size=...) - prefetch pozycji, opcji
+i audytu wykonuje się osobno dla każdej paczki, więc zużycie pamięci
+nie zależy od liczby eksportowanych zleceń.
+"""
+import csv
+import json
+import zlib
+
+from django.db.models import Prefetch
+
+from .models import AuditLog, ServiceOrderItem
+
+
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+CONTENT_TYPES = {
+    FORMAT_CSV: "text/csv",
+    FORMAT_JSONL: "application/x-ndjson",
+}
+
+DEFAULT_CHUNK_SIZE = 500
+
+CSV_HEADER = [
+    "order_number",
+    "status",
+    "customer_name",
+    "customer_email",
+    "customer_phone",
+    "estimated_completion_at",
+    "created_at",
+    "service_name",
+    "base_price_min",
+    "base_price_max",
+    "calculated_price_min",
+    "calculated_price_max",
+    "options",
+    "audit_history",
+]
+
+
+class _Echo:
+    """
+    Pseudo-bufor dla csv.writer: zamiast zapisywać, zwraca zapisany wiersz.
+    """
+    def write(self, value):
+        return value
+
+
+def _dt(value):
+    return value.isoformat() if value else None
+
+
+def export_queryset(queryset):
+    """
+    Dokłada do querysetu prefetch pozycji, opcji i audytu (wykonywany per paczka iteratora).
+    """
+    return queryset.order_by("pk").prefetch_related(
+        Prefetch(
+            "items",
+            queryset=ServiceOrderItem.objects.order_by("id").prefetch_related("selected_options"),
+        ),
+        Prefetch(
+            "audit_logs",
+            queryset=AuditLog.objects.order_by("performed_at", "id"),
+        ),
+    )
+
+
+def order_to_dict(order) -> dict:
+    """
+    Serializacja zlecenia (z prefetchowanymi relacjami) do struktury JSON.
+    """
+    return {
+        "order_number": order.order_number,
+        "status": order.status,
+        "customer_name": order.customer_name,
+        "customer_email": order.customer_email,
+        "customer_phone": order.customer_phone,
+        "estimated_completion_at": _dt(order.estimated_completion_at),
+        "created_at": _dt(order.created_at),
+        "items": [
+            {
+                "service_name": item.service_name_snapshot,
+                "base_price_min": str(item.base_price_min_snapshot),
+                "base_price_max": str(item.base_price_max_snapshot),
+                "calculated_price_min": str(item.calculated_price_min),
+                "calculated_price_max": str(item.calculated_price_max),
+                "options": [
+                    {
+                        "name": opt.option_name_snapshot,
+                        "price_delta_min": str(opt.price_delta_min_snapshot),
+                        "price_delta_max": str(opt.price_delta_max_snapshot),
+                    }
+                    for opt in item.selected_options.all()
+                ],
+            }
+            for item in order.items.all()
+        ],
+        "audit_history": [
+            {
+                "performed_at": _dt(a.performed_at),
+                "action": a.action,
+                "old_value": a.old_value,
+                "new_value": a.new_value,
+            }
+            for a in order.audit_logs.all()
+        ],
+    }
+
+
+def _csv_rows(data: dict):
+    """
+    CSV: jeden wiersz na pozycję zlecenia (dane zlecenia powtórzone),
+    zlecenie bez pozycji daje jeden wiersz z pustymi kolumnami pozycji.
+    """
+    order_cols = [
+        data["order_number"],
+        data["status"],
+        data["customer_name"],
+        data["customer_email"],
+        data["customer_phone"],
+        data["estimated_completion_at"] or "",
+        data["created_at"] or "",
+    ]
+    history = "; ".join(
+        f"{a['performed_at']} {a['action']} {a['old_value'] or ''}→{a['new_value'] or ''}"
+        for a in data["audit_history"]
+    )
+
+    if not data["items"]:
+        yield order_cols + [""] * 6 + [history]
+        return
+
+    for item in data["items"]:
+        options = "; ".join(
+            f"{o['name']} ({o['price_delta_min']}–{o['price_delta_max']})"
+            for o in item["options"]
+        )
+        yield order_cols + [
+            item["service_name"],
+            item["base_price_min"],
+            item["base_price_max"],
+            item["calculated_price_min"],
+            item["calculated_price_max"],
+            options,
+            history,
+        ]
+
+
+def iter_export(queryset, fmt: str = FORMAT_CSV, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Generator linii tekstu (str) eksportu w wybranym formacie.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Nieobsługiwany format eksportu: {fmt}")
+
+    orders = export_queryset(queryset).iterator(chunk_size=chunk_size)
+
+    if fmt == FORMAT_JSONL:
+        for order in orders:
+            yield json.dumps(order_to_dict(order), ensure_ascii=False) + "\n"
+        return
+
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for order in orders:
+        for row in _csv_rows(order_to_dict(order)):
+            yield writer.writerow(row)
+
+
+def iter_export_bytes(queryset, fmt: str = FORMAT_CSV, compress: bool = False,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Generator bajtów eksportu; przy compress=True strumieniowo kompresuje do gzip.
+    """
+    lines = (line.encode("utf-8") for line in iter_export(queryset, fmt, chunk_size))
+    if not compress:
+        yield from lines
+        return
+
+    # wbits=31 -> nagłówek i stopka formatu gzip
+    compressor = zlib.compressobj(wbits=31)
+    for line in lines:
+        block = compressor.compress(line)
+        if block:
+            yield block
+    yield compressor.flush()
+
+
+def export_filename(fmt: str, compress: bool = False) -> str:
+    name = f"orders.{fmt}"
+    return f"{name}.gz" if compress else name
@@ -0,0 +1,277 @@
+"""
+Kolejka zadań w tle w bazie danych (model Job) i worker (komenda run_jobs).
+
+- enqueue() zapisuje zadanie w bieżącej transakcji: powstaje tylko razem z zapisem
+  biznesowym i nie ginie przy restarcie procesu. Żądanie HTTP robi wyłącznie
+  krytyczne zapisy - maile i przeplanowanie wykonuje worker.
+- Worker pobiera zadania SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL, MySQL 8),
+  a na bazach bez SKIP LOCKED (SQLite) warunkowym UPDATE status QUEUED -> RUNNING
+  z własnym tokenem - zapisy w SQLite są szeregowane, więc dwa workery nie przejmą
+  tego samego zadania. Zadania wykonuje pula wątków.
+- Błąd: ponowienie z wykładniczym opóźnieniem (JOB_RETRY_DELAY * 2^n) do max_attempts,
+  potem FAILED z treścią błędu. Zadanie RUNNING dłużej niż JOB_LOCK_TIMEOUT (awaria
+  workera) wraca do kolejki.
+- Metryki: czas wykonania w Job.duration_ms, queue_stats() - stan kolejki per nazwa.
+"""
+import logging
+import os
+import socket
+import time as perf
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Avg, Count, F, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+SEND_ORDER_CONFIRMATION = "send_order_confirmation"
+REPLAN_TECHNICIAN = "replan_technician"
+SEND_SLA_ALERTS = "send_sla_alerts"
+SEND_PORTAL_CODE = "send_portal_code"
+
+# Nazwa zadania -> handler wywoływany jako handler(**payload); import dopiero w workerze
+JOB_HANDLERS = {
+    SEND_ORDER_CONFIRMATION: "orders.cart.send_order_confirmation",
+    REPLAN_TECHNICIAN: "orders.scheduling.replan_technician",
+    SEND_SLA_ALERTS: "orders.sla.send_alerts_for",
+    SEND_PORTAL_CODE: "orders.portal.send_code",
+}
+
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+
+
+class JobError(Exception):
+    """
+    Błąd trwały - zadanie od razu trafia do FAILED, bez ponowień.
+    """
+
+
+# Ponawianie nic nie da: obiekt zadania już nie istnieje
+PERMANENT_ERRORS = (JobError, ObjectDoesNotExist)
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(name: str, payload: dict = None, priority: int = PRIORITY_NORMAL, key: str = "",
+            run_at=None, max_attempts: int = None) -> Job:
+    """
+    Dodaje zadanie (w bieżącej transakcji). Z `key`: jeśli takie zadanie już czeka
+    w kolejce, zwraca istniejące zamiast tworzyć drugie.
+    """
+    if name not in JOB_HANDLERS:
+        raise ValueError(f"Nieznane zadanie: {name}")
+    if key:
+        with transaction.atomic():
+            existing = Job.objects.filter(key=key, status=Job.Status.QUEUED)
+            if connection.features.has_select_for_update_skip_locked:
+                # Blokada do końca transakcji wołającego: worker nie przejmie zadania, zanim
+                # zmiana, dla której je kolejkujemy, będzie widoczna. Zadanie właśnie
+                # przejmowane (zablokowane przez workera) pomijamy - powstanie nowe.
+                existing = existing.select_for_update(skip_locked=True)
+            existing = existing.first()
+        if existing:
+            return existing
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        key=key,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or _setting("JOB_MAX_ATTEMPTS", 5),
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    base = _setting("JOB_RETRY_DELAY", 30)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 3600))
+
+
+def claim_jobs(worker_id: str, limit: int, now=None) -> list:
+    """
+    Przejmuje do `limit` gotowych zadań dla workera; zwraca je ze statusem RUNNING.
+    """
+    now = now or timezone.now()
+    token = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+    pending = (
+        Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now)
+        .order_by("-priority", "run_at", "id")
+        .values_list("id", flat=True)
+    )
+    claim = {
+        "status": Job.Status.RUNNING,
+        "locked_by": token,
+        "locked_at": now,
+        "attempts": F("attempts") + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(pending.select_for_update(skip_locked=True)[:limit])
+            Job.objects.filter(id__in=ids).update(**claim)
+    else:
+        ids = list(pending[:limit])
+        # Warunek na status: zadania przejęte w międzyczasie przez inny worker są pomijane
+        Job.objects.filter(id__in=ids, status=Job.Status.QUEUED).update(**claim)
+
+    if not ids:
+        return []
+    return list(Job.objects.filter(id__in=ids, locked_by=token).order_by("-priority", "run_at", "id"))
+
+
+def requeue_stale(now=None) -> int:
+    """
+    Zadania RUNNING dłużej niż JOB_LOCK_TIMEOUT (worker padł) - z powrotem do kolejki
+    albo do FAILED, gdy wyczerpały próby.
+    """
+    now = now or timezone.now()
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        locked_at__lt=now - timedelta(seconds=_setting("JOB_LOCK_TIMEOUT", 600)),
+    )
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED,
+        locked_by="",
+        last_error="Przekroczony czas wykonania (worker przerwany?)",
+        finished_at=now,
+    )
+    requeued = stale.update(status=Job.Status.QUEUED, locked_by="", run_at=now)
+    return failed + requeued
+
+
+def _execute(job: Job) -> bool:
+    started = perf.perf_counter()
+    try:
+        handler = import_string(JOB_HANDLERS[job.name])
+        handler(**job.payload)
+    except Exception as exc:
+        permanent = isinstance(exc, PERMANENT_ERRORS) or job.attempts >= job.max_attempts
+        logger.warning("Zadanie %s#%s: błąd (próba %s/%s)", job.name, job.pk, job.attempts, job.max_attempts,
+                       exc_info=True)
+        fields = {
+            "locked_by": "",
+            "last_error": traceback.format_exc(limit=5),
+            "duration_ms": int((perf.perf_counter() - started) * 1000),
+        }
+        if permanent:
+            fields.update(status=Job.Status.FAILED, finished_at=timezone.now())
+        else:
+            fields.update(status=Job.Status.QUEUED, run_at=timezone.now() + retry_delay(job.attempts))
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(**fields)
+        return False
+
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        status=Job.Status.DONE,
+        locked_by="",
+        duration_ms=int((perf.perf_counter() - started) * 1000),
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def run_job(job: Job) -> bool:
+    """
+    Wykonuje przejęte zadanie i zapisuje wynik; True = sukces.
+    """
+    try:
+        return _execute(job)
+    finally:
+        # Wątek puli trzyma własne połączenie - zamykamy je wg CONN_MAX_AGE
+        close_old_connections()
+
+
+class Worker:
+    """
+    Pętla workera: utrzymuje pulę `threads` wątków zajętą zadaniami z kolejki.
+    """
+    def __init__(self, threads: int = 4, poll_interval: float = 1.0, worker_id: str = None):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        # Mieści się w Job.locked_by razem z tokenem przejęcia
+        self.worker_id = (worker_id or f"{socket.gethostname()}:{os.getpid()}")[:80]
+        self.stats = {"done": 0, "failed": 0, "claimed": 0}
+
+    def _collect(self, finished) -> None:
+        for future in finished:
+            self.stats["done" if future.result() else "failed"] += 1
+
+    def run(self, once: bool = False, should_stop=lambda: False) -> dict:
+        """
+        once=True: wykonuje wszystkie zadania gotowe teraz i kończy (np. z crona).
+        """
+        requeue_stale()
+        last_requeue = perf.monotonic()
+        pending = set()
+
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="job") as pool:
+            while not should_stop():
+                free = self.threads - len(pending)
+                jobs = claim_jobs(self.worker_id, free) if free else []
+                self.stats["claimed"] += len(jobs)
+                pending.update(pool.submit(run_job, job) for job in jobs)
+
+                if not pending:
+                    if once:
+                        break
+                    perf.sleep(self.poll_interval)
+                else:
+                    done, pending = wait(pending, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    self._collect(done)
+
+                if perf.monotonic() - last_requeue > 60:
+                    requeue_stale()
+                    last_requeue = perf.monotonic()
+
+            done, _ = wait(pending)
+            self._collect(done)
+
+        return self.stats
+
+
+def queue_stats(now=None) -> list:
+    """
+    Stan kolejki per nazwa zadania (jedno zapytanie): liczby per status,
+    średni czas wykonania i wiek najstarszego oczekującego zadania.
+    """
+    now = now or timezone.now()
+    rows = (
+        Job.objects.values("name")
+        .annotate(
+            queued=Count("id", filter=Q(status=Job.Status.QUEUED)),
+            running=Count("id", filter=Q(status=Job.Status.RUNNING)),
+            done=Count("id", filter=Q(status=Job.Status.DONE)),
+            failed=Count("id", filter=Q(status=Job.Status.FAILED)),
+            avg_ms=Avg("duration_ms", filter=Q(status=Job.Status.DONE)),
+            oldest_queued=Min("run_at", filter=Q(status=Job.Status.QUEUED)),
+        )
+        .order_by("name")
+    )
+    return [
+        {
+            **row,
+            "lag_seconds": max((now - row["oldest_queued"]).total_seconds(), 0) if row["oldest_queued"] else 0,
+        }
+        for row in rows
+    ]
+
+
+def purge_finished(older_than: timedelta, now=None) -> int:
+    """
+    Usuwa wykonane zadania starsze niż `older_than` (FAILED zostają do wglądu).
+    """
+    now = now or timezone.now()
+    deleted, _ = Job.objects.filter(status=Job.Status.DONE, finished_at__lt=now - older_than).delete()
+    return deleted
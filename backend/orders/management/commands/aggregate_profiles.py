@@ -0,0 +1,83 @@
+import io
+import pstats
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Łączy profile zebrane przez ProfilingMiddleware per nazwa URL: pstats (top funkcji) "
+        "i collapsed stacks (scalony plik dla flamegraph + najdroższe ramki)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=None, help="Katalog profili (domyślnie PROFILING_DIR).")
+        parser.add_argument("--view", default=None, help="Tylko ten widok (nazwa URL).")
+        parser.add_argument("--limit", type=int, default=15)
+        parser.add_argument("--sort", default="cumulative", help="Klucz sortowania pstats (cumulative, tottime, ...).")
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Katalog na scalone <widok>.collapsed (wejście dla flamegraph.pl / speedscope).",
+        )
+
+    def handle(self, *args, **options):
+        root = Path(options["dir"] or settings.PROFILING_DIR)
+        if not root.is_dir():
+            raise CommandError(f"Brak katalogu profili: {root}")
+
+        views = sorted(p for p in root.iterdir() if p.is_dir())
+        if options["view"]:
+            views = [p for p in views if p.name == options["view"].replace(":", "-")]
+
+        for view_dir in views:
+            prof_files = sorted(view_dir.glob("*.prof"))
+            collapsed_files = sorted(view_dir.glob("*.collapsed"))
+            if not prof_files and not collapsed_files:
+                continue
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"== {view_dir.name}: {len(prof_files)} pstats, {len(collapsed_files)} collapsed"
+            ))
+            if prof_files:
+                self._pstats(prof_files, options)
+            if collapsed_files:
+                self._collapsed(view_dir.name, collapsed_files, options)
+
+    def _pstats(self, files, options):
+        out = io.StringIO()
+        stats = pstats.Stats(*map(str, files), stream=out)
+        # Średni czas żądania - łączny czas wszystkich profili / liczba profili
+        self.stdout.write(f"  średnio {stats.total_tt / len(files) * 1000:.1f} ms / żądanie (cProfile)")
+        stats.strip_dirs().sort_stats(options["sort"]).print_stats(options["limit"])
+        self.stdout.write(out.getvalue())
+
+    def _collapsed(self, view_name, files, options):
+        stacks = Counter()
+        for path in files:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    stack, _, count = line.rstrip("\n").rpartition(" ")
+                    if stack:
+                        stacks[stack] += int(count)
+
+        total = sum(stacks.values())
+        leaf = Counter()
+        for stack, count in stacks.items():
+            leaf[stack.rsplit(";", 1)[-1]] += count
+
+        self.stdout.write(f"  {total} próbek; najczęściej na szczycie stosu:")
+        for frame, count in leaf.most_common(options["limit"]):
+            self.stdout.write(f"  {count / total * 100:5.1f}%  {frame}")
+
+        if options["output"]:
+            output = Path(options["output"])
+            output.mkdir(parents=True, exist_ok=True)
+            target = output / f"{view_name}.collapsed"
+            with open(target, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            self.stdout.write(f"  zapisano {target}")
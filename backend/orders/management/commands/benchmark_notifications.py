@@ -0,0 +1,68 @@
+import time as perf
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.utils import timezone
+
+from orders.choices import ServiceOrderStatus
+from orders.emails import get_email_templates, render_emails, track_url
+from orders.models import ServiceOrder
+from orders.notifications import STATUS_LABELS
+
+
+class Command(BaseCommand):
+    help = "Benchmark renderowania maili (w pamięci, bez bazy i wysyłki): szablony skompilowane raz vs kompilacja per wiadomość."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=5_000)
+        parser.add_argument("--changes", type=int, default=3, help="Zmian statusu w jednym podsumowaniu.")
+
+    def _timed(self, label, func, count):
+        start = perf.perf_counter()
+        result = func()
+        elapsed = perf.perf_counter() - start
+        self.stdout.write(f"{label}: {elapsed * 1000:.1f} ms ({count / elapsed:.0f} wiadomości/s)")
+        return result
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        statuses = list(ServiceOrderStatus.values)
+        recipients = []
+        for i in range(options["messages"]):
+            order = ServiceOrder(
+                order_number=f"SRV-{i:08d}",
+                customer_email=f"klient{i}@example.com",
+                status=statuses[options["changes"] % len(statuses)],
+            )
+            changes = [
+                {
+                    "at": now - timedelta(minutes=options["changes"] - n),
+                    "old_label": STATUS_LABELS[statuses[n % len(statuses)]],
+                    "new_label": STATUS_LABELS[statuses[(n + 1) % len(statuses)]],
+                }
+                for n in range(options["changes"])
+            ]
+            recipients.append(({"order": order, "changes": changes}, [order.customer_email]))
+
+        get_email_templates("status_digest")
+        messages = self._timed(
+            f"Skompilowane szablony ({len(recipients)} wiadomości)",
+            lambda: render_emails("status_digest", recipients),
+            len(recipients),
+        )
+        self.stdout.write(f"  przykładowy temat: {messages[0].subject}")
+
+        # Dla porównania: źródło szablonu kompilowane przy każdej wiadomości
+        engine = engines["django"]
+        sources = [
+            tpl.template.source for tpl in get_email_templates("status_digest")
+        ]
+        link = track_url()
+
+        def compile_each():
+            for context, _ in recipients:
+                for source in sources:
+                    engine.from_string(source).render({"track_url": link, **context})
+
+        self._timed("Dla porównania: kompilacja per wiadomość", compile_each, len(recipients))
@@ -0,0 +1,59 @@
+import random
+import time as perf
+from datetime import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.scheduling import Schedule, WorkCalendar
+
+
+class Command(BaseCommand):
+    help = "Benchmark planera kolejki (w pamięci, bez bazy): pełny plan + zmiany przyrostowe."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=10_000)
+        parser.add_argument("--technicians", type=int, default=20)
+        parser.add_argument("--updates", type=int, default=1_000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def _timed(self, label, func):
+        start = perf.perf_counter()
+        result = func()
+        elapsed = perf.perf_counter() - start
+        self.stdout.write(f"{label}: {elapsed * 1000:.1f} ms")
+        return result, elapsed
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        now = timezone.now()
+
+        calendars = {
+            tech_id: WorkCalendar(time(8, 0), time(16, 0), works_weekends=tech_id % 5 == 0)
+            for tech_id in range(1, options["technicians"] + 1)
+        }
+        jobs = [(order_id, rng.randint(30, 480)) for order_id in range(1, options["orders"] + 1)]
+
+        schedule, _ = self._timed(
+            f"Pełny plan ({len(jobs)} zleceń, {len(calendars)} techników)",
+            lambda: Schedule.build(jobs, calendars, now),
+        )
+
+        def run_updates():
+            changed = 0
+            for _ in range(options["updates"]):
+                order_id = rng.randint(1, len(jobs))
+                changed += len(schedule.update(order_id, rng.randint(30, 480)))
+            return changed
+
+        changed, elapsed = self._timed(f"Zmiany przyrostowe ({options['updates']}x update)", run_updates)
+        if options["updates"]:
+            self.stdout.write(
+                f"  średnio {elapsed / options['updates'] * 1000:.3f} ms / zmianę, "
+                f"{changed / options['updates']:.0f} przeliczonych terminów / zmianę"
+            )
+
+        self._timed(
+            f"Dla porównania: pełny plan po każdej zmianie (10x)",
+            lambda: [Schedule.build(jobs, calendars, now) for _ in range(10)],
+        )
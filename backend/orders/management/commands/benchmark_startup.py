@@ -0,0 +1,90 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Uruchamiane w świeżym procesie: zimny start jak przy starcie workera
+PROBE = r"""
+import json, os, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+modules_after_setup = len(sys.modules)
+
+import io
+from django.core.handlers.wsgi import WSGIHandler
+handler = WSGIHandler()
+request = {
+    "REQUEST_METHOD": "GET",
+    "PATH_INFO": os.environ["BENCH_PATH"],
+    "QUERY_STRING": "",
+    "SERVER_NAME": "localhost",
+    "SERVER_PORT": "80",
+    "wsgi.input": io.BytesIO(),
+    "wsgi.url_scheme": "http",
+}
+status = []
+before_request = time.perf_counter()
+body = b"".join(handler(request, lambda s, h, *a: status.append(s)))
+first_request = time.perf_counter() - before_request
+
+print(json.dumps({
+    "setup": setup_done - start,
+    "first_request": first_request,
+    "modules": modules_after_setup,
+    "modules_after_request": len(sys.modules),
+    "status": status[0],
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark zimnego startu workera: django.setup() + pierwsze żądanie, w osobnych procesach, "
+        "dla podanych modułów ustawień (np. pełny vs config.settings_public)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--settings-modules",
+            nargs="+",
+            default=None,
+            help="Moduły ustawień do porównania (domyślnie bieżący i config.settings_public).",
+        )
+        parser.add_argument("--path", default="/services/", help="Ścieżka pierwszego żądania.")
+        parser.add_argument("--runs", type=int, default=5)
+
+    def _probe(self, settings_module, path):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module, "BENCH_PATH": path}
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"{settings_module}: proces zakończony błędem\n{result.stderr}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        modules = options["settings_modules"] or [
+            os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings"),
+            "config.settings_public",
+        ]
+
+        for settings_module in modules:
+            runs = [self._probe(settings_module, options["path"]) for _ in range(options["runs"])]
+            setup = statistics.median(r["setup"] for r in runs) * 1000
+            first = statistics.median(r["first_request"] for r in runs) * 1000
+            self.stdout.write(
+                f"{settings_module}: setup {setup:.1f} ms, pierwsze żądanie {options['path']} {first:.1f} ms "
+                f"({runs[0]['status']}), modułów po setup {runs[0]['modules']}, "
+                f"po żądaniu {runs[0]['modules_after_request']} (mediana z {len(runs)})"
+            )
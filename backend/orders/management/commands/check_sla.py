@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from orders.sla import INITIAL_LOOKBACK, check_overdue
+
+
+class Command(BaseCommand):
+    help = "Oznacza zlecenia, którym od ostatniego przebiegu minął termin, i wysyła alerty technikom."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Działaj stale (zamiast crona), przebieg co --interval sekund.",
+        )
+        parser.add_argument("--interval", type=int, default=60)
+        parser.add_argument(
+            "--lookback-hours",
+            type=int,
+            default=int(INITIAL_LOOKBACK.total_seconds() // 3600),
+            help="Pierwszy przebieg (bez checkpointu): ile godzin wstecz sprawdzić.",
+        )
+
+    def handle(self, *args, **options):
+        lookback = timedelta(hours=options["lookback_hours"])
+
+        while True:
+            stats = check_overdue(lookback=lookback)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Po terminie: {stats['orders']} zleceń ({stats['since']:%Y-%m-%d %H:%M:%S} - {stats['until']:%Y-%m-%d %H:%M:%S})"
+                )
+            )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
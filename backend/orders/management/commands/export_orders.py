@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders import export
+from orders.choices import ServiceOrderStatus
+from orders.models import ServiceOrder
+
+
+class Command(BaseCommand):
+    help = "Strumieniowy eksport zleceń (pozycje, opcje, historia audytu) do CSV lub JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=export.FORMATS, default=export.FORMAT_CSV)
+        parser.add_argument("--gzip", action="store_true", help="Kompresuj wynik do gzip.")
+        parser.add_argument("--output", "-o", help="Plik wynikowy (domyślnie stdout).")
+        parser.add_argument("--chunk-size", type=int, default=export.DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--status", choices=ServiceOrderStatus.values, help="Tylko zlecenia w danym statusie.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size musi być dodatnie.")
+
+        queryset = ServiceOrder.objects.all()
+        if options["status"]:
+            queryset = queryset.filter(status=options["status"])
+
+        chunks = export.iter_export_bytes(
+            queryset,
+            options["format"],
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+
+        if options["output"]:
+            with open(options["output"], "wb") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Zapisano eksport do {options['output']}"))
+        else:
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.catalog_import import CatalogImportError, import_catalog, parse_file
+
+
+class Command(BaseCommand):
+    help = "Importuje katalog usług z pliku CSV/JSON, zapisując tylko różnice względem bazy."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Plik .csv lub .json z katalogiem.")
+        parser.add_argument("--dry-run", action="store_true", help="Pokaż różnice bez zapisu.")
+        parser.add_argument(
+            "--deactivate-missing",
+            action="store_true",
+            help="Wyłącz (is_active=False) rekordy nieobecne w pliku.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"Plik nie istnieje: {path}")
+
+        try:
+            catalog = parse_file(path.read_bytes(), path.name)
+            diff = import_catalog(
+                catalog,
+                dry_run=options["dry_run"],
+                deactivate_missing=options["deactivate_missing"],
+            )
+        except CatalogImportError as exc:
+            raise CommandError(str(exc))
+
+        for key, value in diff.summary().items():
+            self.stdout.write(f"{key}: {value}")
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Tryb --dry-run: nic nie zapisano."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Import katalogu zakończony."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.scheduling import apply_schedule, plan_all
+
+
+class Command(BaseCommand):
+    help = "Planuje kolejki techników dla otwartych zleceń i proponuje terminy zakończenia."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--apply", action="store_true", help="Zapisz przypisania i terminy w zleceniach.")
+
+    def handle(self, *args, **options):
+        try:
+            schedule = plan_all()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for queue in schedule.queues.values():
+            last = queue.ends[-1] if queue.ends else "-"
+            self.stdout.write(f"Technik #{queue.technician_id}: {len(queue.order_ids)} zleceń, koniec kolejki: {last}")
+
+        if options["apply"]:
+            count = apply_schedule(schedule)
+            self.stdout.write(self.style.SUCCESS(f"Zapisano plan dla {count} zleceń."))
+        else:
+            self.stdout.write(self.style.WARNING("Bez --apply: nic nie zapisano."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from orders.reporting import rebuild_rollups, refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Przyrostowo odświeża tabele rollup używane przez raporty."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Przebuduj rollupy od zera (ignoruje checkpointy).",
+        )
+
+    def handle(self, *args, **options):
+        stats = rebuild_rollups() if options["rebuild"] else refresh_rollups()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rollupy odświeżone: dni pozycji={stats['items']}, dni statusów={stats['status']}"
+            )
+        )
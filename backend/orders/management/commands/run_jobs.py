@@ -0,0 +1,63 @@
+import signal
+import threading
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from orders.jobs import Worker, purge_finished, queue_stats
+
+
+class Command(BaseCommand):
+    help = "Worker zadań w tle (orders.jobs): maile, przeplanowanie kolejek, alerty SLA."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="Liczba wątków wykonujących zadania.")
+        parser.add_argument("--poll", type=float, default=1.0, help="Co ile sekund sprawdzać pustą kolejkę.")
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Wykonaj zadania gotowe teraz i zakończ (uruchamianie z crona).",
+        )
+        parser.add_argument(
+            "--purge-days",
+            type=int,
+            default=7,
+            help="Na starcie usuń wykonane zadania starsze niż N dni (0 = nie usuwaj).",
+        )
+        parser.add_argument("--stats", action="store_true", help="Pokaż stan kolejki i zakończ.")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self._print_stats()
+            return
+
+        if options["purge_days"]:
+            purged = purge_finished(timedelta(days=options["purge_days"]))
+            self.stdout.write(f"Usunięto {purged} wykonanych zadań")
+
+        # SIGTERM/SIGINT: nie pobieramy nowych zadań, kończymy rozpoczęte
+        stop = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stop.set())
+
+        stats = Worker(threads=options["threads"], poll_interval=options["poll"]).run(
+            once=options["once"],
+            should_stop=stop.is_set,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Zadania: pobrane {stats['claimed']}, wykonane {stats['done']}, błędy {stats['failed']}"
+            )
+        )
+
+    def _print_stats(self):
+        rows = queue_stats()
+        if not rows:
+            self.stdout.write("Kolejka pusta")
+            return
+        for row in rows:
+            avg = f"{row['avg_ms']:.0f} ms" if row["avg_ms"] is not None else "-"
+            self.stdout.write(
+                f"{row['name']}: w kolejce {row['queued']} (opóźnienie {row['lag_seconds']:.0f} s), "
+                f"w trakcie {row['running']}, wykonane {row['done']} (średnio {avg}), błędy {row['failed']}"
+            )
@@ -0,0 +1,67 @@
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orders.seeding import clear_seeded, seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Generuje deterministyczne dane testowe (katalog, zlecenia, pozycje, komentarze, audyt) do testów wydajności."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=10_000)
+        parser.add_argument("--services", type=int, default=50)
+        parser.add_argument("--technicians", type=int, default=5)
+        parser.add_argument("--days", type=int, default=365, help="Zakres dat utworzenia zleceń (dni wstecz).")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--anchor",
+            type=date.fromisoformat,
+            help="Dzień kotwicy czasu (RRRR-MM-DD, domyślnie dziś) - ten sam zbiór danych także w inne dni.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=5_000)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Najpierw usuń dane z poprzedniego seedowania (tylko wiersze z prefiksem SEED).",
+        )
+
+    def handle(self, *args, **options):
+        if options["services"] < 1 or options["chunk_size"] < 1 or options["days"] < 1:
+            raise CommandError("--services, --chunk-size i --days muszą być dodatnie.")
+
+        if options["clear"]:
+            deleted = clear_seeded()
+            self.stdout.write(f"Usunięto: {sum(deleted.values())} wierszy")
+
+        def progress(stats):
+            self.stdout.write(
+                f"  {stats['orders']}/{options['orders']} zleceń, {stats['seconds']:.1f} s",
+            )
+
+        anchor = None
+        if options["anchor"]:
+            anchor = timezone.make_aware(datetime.combine(options["anchor"], time.min))
+
+        try:
+            stats = seed_dataset(
+                orders=options["orders"],
+                services=options["services"],
+                technicians=options["technicians"],
+                seed=options["seed"],
+                days=options["days"],
+                chunk_size=options["chunk_size"],
+                anchor=anchor,
+                progress=progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        rows = sum(v for k, v in stats.items() if k != "seconds")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Utworzono {rows} wierszy w {stats['seconds']:.1f} s ({rows / max(stats['seconds'], 1e-9):.0f} wierszy/s): "
+                + ", ".join(f"{k}={v}" for k, v in stats.items() if k != "seconds")
+            )
+        )
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from orders.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = "Wysyła zbiorcze powiadomienia o zmianach statusu (uruchamiane cyklicznie, np. z crona)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=None,
+            help="Okno buforowania w sekundach (domyślnie NOTIFICATION_DIGEST_WINDOW).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        window = timedelta(seconds=options["window"]) if options["window"] is not None else None
+        stats = send_digests(window=window, batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wysłano {stats['orders']} wiadomości ({stats['events']} zdarzeń)"
+            )
+        )
@@ -0,0 +1,84 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_serviceorderitem_serviceorderitemoption'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OptionAttachDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('attach_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ServiceRevenueDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('items_count', models.PositiveIntegerField(default=0)),
+                ('revenue_min', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('revenue_max', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatusDurationDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('NEW', 'Nowe'), ('RECEIVED', 'Przyjęte'), ('IN_PROGRESS', 'W toku'), ('WAITING_FOR_PARTS', 'Czeka na części'), ('READY', 'Gotowe do odbioru'), ('COMPLETED', 'Zakończone'), ('CANCELED', 'Anulowane')], max_length=20)),
+                ('transitions_count', models.PositiveIntegerField(default=0)),
+                ('total_duration', models.DurationField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['order', 'action', 'performed_at'], name='auditlog_order_action_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='optionattachdaily',
+            name='option',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attach_rollups', to='orders.serviceoption'),
+        ),
+        migrations.AddField(
+            model_name='optionattachdaily',
+            name='service',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='option_attach_rollups', to='orders.service'),
+        ),
+        migrations.AddField(
+            model_name='servicerevenuedaily',
+            name='service',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='orders.service'),
+        ),
+        migrations.AddConstraint(
+            model_name='statusdurationdaily',
+            constraint=models.UniqueConstraint(fields=('day', 'status'), name='uniq_status_rollup_day_status'),
+        ),
+        migrations.AddConstraint(
+            model_name='optionattachdaily',
+            constraint=models.UniqueConstraint(fields=('day', 'option', 'service'), name='uniq_attach_rollup_day_option_service'),
+        ),
+        migrations.AddConstraint(
+            model_name='servicerevenuedaily',
+            constraint=models.UniqueConstraint(fields=('day', 'service'), name='uniq_revenue_rollup_day_service'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:07
+
+from django.db import migrations, models, transaction
+from django.db.models import Sum
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_estimated_duration(apps, schema_editor):
+    """
+    Uzupełnia czas pracy historycznych pozycji paczkami po pk (każda paczka w osobnej
+    transakcji). Dla starych pozycji jedynym źródłem są bieżące czasy z katalogu.
+    """
+    ServiceOrderItem = apps.get_model("orders", "ServiceOrderItem")
+    ServiceOrderItemOption = apps.get_model("orders", "ServiceOrderItemOption")
+    db_alias = schema_editor.connection.alias
+
+    last_pk = 0
+    while True:
+        rows = list(
+            ServiceOrderItem.objects.using(db_alias)
+            .filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "service__base_duration_minutes")[:BACKFILL_BATCH_SIZE]
+        )
+        if not rows:
+            break
+
+        pks = [pk for pk, _ in rows]
+        deltas = dict(
+            ServiceOrderItemOption.objects.using(db_alias)
+            .filter(order_item_id__in=pks)
+            .values("order_item_id")
+            .annotate(total=Sum("option__duration_delta_minutes"))
+            .values_list("order_item_id", "total")
+        )
+
+        items = [
+            ServiceOrderItem(pk=pk, estimated_duration_minutes=max(base + (deltas.get(pk) or 0), 0))
+            for pk, base in rows
+        ]
+        with transaction.atomic(using=db_alias):
+            ServiceOrderItem.objects.using(db_alias).bulk_update(items, ["estimated_duration_minutes"])
+
+        last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+
+    # Backfill paczkami - bez jednej długiej transakcji na całą tabelę
+    atomic = False
+
+    dependencies = [
+        ('orders', '0010_technician_scheduling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serviceorderitem',
+            name='estimated_duration_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_estimated_duration, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='serviceorderitem',
+            index=models.Index(fields=['created_at', 'estimated_duration_minutes'], name='orderitem_created_dur_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceorderitem',
+            index=models.Index(fields=['order', 'estimated_duration_minutes'], name='orderitem_order_dur_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_serviceorderitem_estimated_duration'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceordercomment',
+            index=models.Index(fields=['order', 'visibility', 'created_at'], name='comment_order_vis_created_idx'),
+        ),
+    ]
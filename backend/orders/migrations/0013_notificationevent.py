@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_serviceordercomment_order_visibility_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_status', models.CharField(blank=True, choices=[('NEW', 'Nowe'), ('RECEIVED', 'Przyjęte'), ('IN_PROGRESS', 'W toku'), ('WAITING_FOR_PARTS', 'Czeka na części'), ('READY', 'Gotowe do odbioru'), ('COMPLETED', 'Zakończone'), ('CANCELED', 'Anulowane')], max_length=20)),
+                ('new_status', models.CharField(choices=[('NEW', 'Nowe'), ('RECEIVED', 'Przyjęte'), ('IN_PROGRESS', 'W toku'), ('WAITING_FOR_PARTS', 'Czeka na części'), ('READY', 'Gotowe do odbioru'), ('COMPLETED', 'Zakończone'), ('CANCELED', 'Anulowane')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='orders.serviceorder')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sent_at', 'created_at'], name='notif_pending_idx')],
+            },
+        ),
+    ]
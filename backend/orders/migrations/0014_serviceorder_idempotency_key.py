@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_notificationevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serviceorder',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0014_serviceorder_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serviceorder',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
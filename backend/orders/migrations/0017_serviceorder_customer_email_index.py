@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:25
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def normalize_customer_emails(apps, schema_editor):
+    """
+    Portal klienta szuka po dokładnej wartości - historyczne adresy sprowadzamy
+    do postaci z normalize_email (bez spacji, małe litery).
+    """
+    ServiceOrder = apps.get_model("orders", "ServiceOrder")
+    ServiceOrder.objects.using(schema_editor.connection.alias).update(
+        customer_email=Lower(Trim("customer_email"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0016_sla_monitor'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_customer_emails, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='serviceorder',
+            index=models.Index(fields=['customer_email', 'created_at'], name='order_email_created_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0017_serviceorder_customer_email_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['is_active', 'base_price_min'], name='service_active_price_min_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['is_active', 'base_price_max'], name='service_active_price_max_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['is_active', 'base_duration_minutes'], name='service_active_duration_idx'),
+        ),
+    ]
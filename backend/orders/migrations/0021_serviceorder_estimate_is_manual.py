@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0020_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serviceorder',
+            name='estimate_is_manual',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
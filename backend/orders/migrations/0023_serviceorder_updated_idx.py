@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0022_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceorder',
+            index=models.Index(fields=['updated_at'], name='order_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0023_serviceorder_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationevent',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationevent',
+            name='locked_by',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0024_notificationevent_lock'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='serviceorder',
+            name='status',
+            field=models.CharField(choices=[('NEW', 'Nowe'), ('RECEIVED', 'Przyjęte'), ('IN_PROGRESS', 'W toku'), ('WAITING_FOR_PARTS', 'Czeka na części'), ('READY', 'Gotowe do odbioru'), ('COMPLETED', 'Zakończone'), ('CANCELED', 'Anulowane')], default='NEW', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='serviceorder',
+            index=models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ),
+    ]
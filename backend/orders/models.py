@@ -2,6 +2,7 @@ from django.db import models
 from .choices import ServiceOrderStatus
 import secrets
 import string
+from datetime import time
 from django.utils import timezone
 
 
@@ -27,6 +28,14 @@ class Service(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Filtry katalogu (orders.catalog_search): widełki ceny i czas wśród aktywnych usług
+            models.Index(fields=["is_active", "base_price_min"], name="service_active_price_min_idx"),
+            models.Index(fields=["is_active", "base_price_max"], name="service_active_price_max_idx"),
+            models.Index(fields=["is_active", "base_duration_minutes"], name="service_active_duration_idx"),
+        ]
+
     def __str__(self) -> str:
         return self.name
 
@@ -90,6 +99,26 @@ class ServiceOption(models.Model):
         return f"{self.group.name} / {self.name}"
 
 
+class Technician(models.Model):
+    """
+    Technik serwisu z godzinami pracy - podstawa planowania kolejki zleceń.
+    """
+    user = models.OneToOneField(
+        "auth.User",
+        on_delete=models.CASCADE,
+        related_name="technician",
+    )
+
+    work_start = models.TimeField(default=time(8, 0))
+    work_end = models.TimeField(default=time(16, 0))
+    works_weekends = models.BooleanField(default=False)
+
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self) -> str:
+        return self.user.get_full_name() or self.user.username
+
+
 def generate_order_number(prefix: str = "SRV", length: int = 8) -> str:
     """
     Generuje publiczny numer zlecenia w formacie: SRV-XXXXXXXX.
@@ -100,6 +129,120 @@ def generate_order_number(prefix: str = "SRV", length: int = 8) -> str:
     return f"{prefix}-{random_part}"
 
 
+def normalize_email(value: str) -> str:
+    """
+    Postać adresu e-mail klienta zapisywana w zleceniu i używana w wyszukiwaniu (portal klienta).
+    """
+    return (value or "").strip().lower()
+
+
+class ServiceOrderQuerySet(models.QuerySet):
+    """
+    Nazwane projekcje list zleceń - tylko kolumny potrzebne w danym widoku.
+    """
+    def _overdue_q(self, now=None):
+        # Odpowiednik ServiceOrder.is_overdue() po stronie bazy
+        return models.Q(estimated_completion_at__lt=now or timezone.now()) & ~models.Q(
+            status__in=[ServiceOrderStatus.COMPLETED, ServiceOrderStatus.CANCELED]
+        )
+
+    def overdue(self, now=None):
+        return self.filter(self._overdue_q(now))
+
+    def not_overdue(self, now=None):
+        return self.exclude(self._overdue_q(now))
+
+    def with_status_label(self):
+        return self.annotate(
+            status_label=models.Case(
+                *[models.When(status=value, then=models.Value(label)) for value, label in ServiceOrderStatus.choices],
+                default=models.F("status"),
+                output_field=models.CharField(),
+            )
+        )
+
+    def dashboard_rows(self):
+        """
+        Wiersze dashboardu technika - słowniki (values), bez instancji modelu.
+        """
+        return self.with_status_label().values(
+            "order_number",
+            "customer_name",
+            "status_label",
+            "estimated_completion_at",
+        )
+
+    def tracking_row(self):
+        """
+        Zlecenie do weryfikacji w /track/ - dane kontaktowe do porównania, bez nazwiska klienta.
+        """
+        return self.only(
+            "id",
+            "order_number",
+            "customer_email",
+            "customer_phone",
+            "status",
+            "estimated_completion_at",
+        )
+
+    def update_versioned(self, pk, version: int, **fields) -> bool:
+        """
+        Compare-and-swap: zapisuje pola tylko, gdy wersja w bazie wciąż równa się `version`,
+        i podbija wersję. False = ktoś zmienił zlecenie w międzyczasie.
+        """
+        return bool(
+            self.filter(pk=pk, version=version).update(
+                version=models.F("version") + 1,
+                updated_at=timezone.now(),
+                **fields,
+            )
+        )
+
+    def customer_history(self, email: str):
+        """
+        Zlecenia klienta (portal) od najnowszych - indeks (customer_email, created_at),
+        pozycje i opcje dociągane prefetchem (2 zapytania na stronę zamiast N).
+        """
+        return (
+            self.filter(customer_email=normalize_email(email))
+            .order_by("-created_at", "-id")
+            .only("id", "order_number", "status", "estimated_completion_at", "created_at")
+            .prefetch_related(
+                models.Prefetch(
+                    "items",
+                    queryset=ServiceOrderItem.objects.only(
+                        "id",
+                        "order_id",
+                        "service_name_snapshot",
+                        "calculated_price_min",
+                        "calculated_price_max",
+                    ).order_by("id"),
+                ),
+                models.Prefetch(
+                    "items__selected_options",
+                    queryset=ServiceOrderItemOption.objects.only(
+                        "id",
+                        "order_item_id",
+                        "option_name_snapshot",
+                    ).order_by("id"),
+                ),
+            )
+        )
+
+    def admin_list_rows(self):
+        """
+        Kolumny listy zleceń w adminie (list_display + overdue).
+        """
+        return self.only(
+            "id",
+            "order_number",
+            "customer_name",
+            "status",
+            "estimated_completion_at",
+            "created_at",
+        )
+
+
 class ServiceOrder(models.Model):
     """
     Encja zlecenia serwisowego (Service Ticket).
@@ -125,16 +268,38 @@ class ServiceOrder(models.Model):
         max_length=20,
         choices=ServiceOrderStatus.choices,
         default=ServiceOrderStatus.NEW,
-        db_index=True,
     )
 
     # Estymacja zakończenia ustawiana ręcznie przez technika (opcjonalna)
+    # albo proponowana przez planer kolejki (orders.scheduling)
     estimated_completion_at = models.DateTimeField(null=True, blank=True)
 
+    # Estymacja wpisana ręcznie (admin / panel technika) - planer jej nie nadpisuje;
+    # wyczyszczenie estymacji oddaje termin z powrotem planerowi
+    estimate_is_manual = models.BooleanField(default=False, editable=False)
+
+    # Technik, do którego kolejki planer przypisał zlecenie
+    assigned_technician = models.ForeignKey(
+        Technician,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="assigned_orders",
+    )
+
+    # Wersja wiersza (optimistic concurrency) - każda zmiana podbija ją o 1,
+    # zapis z nieaktualną wersją jest odrzucany (ServiceOrderQuerySet.update_versioned)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    # Klucz idempotencji z formularza zamówienia - powtórzony POST zwraca to samo zlecenie
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+
     # Metadane audytowe
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ServiceOrderQuerySet.as_manager()
+
     def can_cancel(self) -> bool:
         """
         Reguła biznesowa: anulowanie dozwolone tylko w statusie NEW.
@@ -154,6 +319,25 @@ class ServiceOrder(models.Model):
 
         return timezone.now() > self.estimated_completion_at
 
+    class Meta:
+        indexes = [
+            # Monitor SLA (orders.sla): zakres terminów między checkpointem a "teraz"
+            models.Index(fields=["estimated_completion_at"], name="order_estimate_idx"),
+            # Monitor SLA: zlecenia zmienione od ostatniego przebiegu
+            models.Index(fields=["updated_at"], name="order_updated_idx"),
+            # Portal klienta: zlecenia danego adresu od najnowszych
+            models.Index(fields=["customer_email", "created_at"], name="order_email_created_idx"),
+            # Admin: date_hierarchy i zakresy dat na liście zleceń
+            models.Index(fields=["created_at"], name="order_created_idx"),
+            # Filtr statusu (admin: lista od najnowszych, także z date_hierarchy) - zastępuje
+            # pojedynczy indeks na status, który nie obsługiwał sortowania ani zakresu dat
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.customer_email = normalize_email(self.customer_email)
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return f"ServiceOrder {self.order_number}"
 
@@ -186,6 +370,12 @@ class ServiceOrderComment(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Stronicowanie kursorem: komentarze zlecenia per widoczność, od najnowszych
+            models.Index(fields=["order", "visibility", "created_at"], name="comment_order_vis_created_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"Comment({self.visibility}) for {self.order.order_number}"
     
@@ -217,8 +407,26 @@ class ServiceOrderItem(models.Model):
     calculated_price_min = models.DecimalField(max_digits=10, decimal_places=2)
     calculated_price_max = models.DecimalField(max_digits=10, decimal_places=2)
 
+    # Snapshot szacowanego czasu pracy: czas bazowy usługi + delty wybranych opcji
+    estimated_duration_minutes = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Obciążenie per dzień / per zlecenie jako agregat bez sięgania do tabeli
+            models.Index(fields=["created_at", "estimated_duration_minutes"], name="orderitem_created_dur_idx"),
+            models.Index(fields=["order", "estimated_duration_minutes"], name="orderitem_order_dur_idx"),
+        ]
+
+    @staticmethod
+    def calculate_duration(service, options) -> int:
+        """
+        Szacowany czas pracy pozycji (minuty) - nigdy ujemny.
+        """
+        total = service.base_duration_minutes + sum(opt.duration_delta_minutes for opt in options)
+        return max(total, 0)
+
     def __str__(self) -> str:
         return f"Item for {self.order.order_number} / {self.service_name_snapshot}"
 
@@ -264,6 +472,7 @@ class AuditLog(models.Model):
         ESTIMATE_SET = "ESTIMATE_SET", "Ustawienie estymacji"
         ORDER_CANCELED = "ORDER_CANCELED", "Anulowanie zlecenia"
         ORDER_CREATED = "ORDER_CREATED", "Utworzenie zlecenia"
+        ORDER_OVERDUE = "ORDER_OVERDUE", "Przekroczenie terminu"
 
 
     # Powiązanie wpisu audytowego z konkretnym zleceniem (do widoku inline)
@@ -303,5 +512,211 @@ class AuditLog(models.Model):
 
     performed_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Raporty: kolejna zmiana statusu danego zlecenia (pary STATUS_CHANGED)
+            models.Index(fields=["order", "action", "performed_at"], name="auditlog_order_action_at_idx"),
+            # Admin: date_hierarchy i zakresy dat na liście audit logu
+            models.Index(fields=["performed_at"], name="auditlog_performed_at_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.entity_type}#{self.entity_id} {self.action}"
+
+
+class ServiceRevenueDaily(models.Model):
+    """
+    Rollup raportowy: dzienna liczba pozycji i suma wycen (widełki) per usługa.
+    Odświeżany przyrostowo przez orders.reporting.refresh_rollups().
+    """
+    day = models.DateField()
+
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name="revenue_rollups",
+    )
+
+    items_count = models.PositiveIntegerField(default=0)
+    revenue_min = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenue_max = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "service"], name="uniq_revenue_rollup_day_service"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Revenue {self.day} / {self.service_id}"
+
+
+class OptionAttachDaily(models.Model):
+    """
+    Rollup raportowy: ile razy danego dnia wybrano opcję (do liczenia attach rate).
+    """
+    day = models.DateField()
+
+    option = models.ForeignKey(
+        ServiceOption,
+        on_delete=models.CASCADE,
+        related_name="attach_rollups",
+    )
+    # Denormalizacja: usługa pozycji, do której dołączono opcję
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name="option_attach_rollups",
+    )
+
+    attach_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "option", "service"],
+                name="uniq_attach_rollup_day_option_service",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Attach {self.day} / {self.option_id}"
+
+
+class StatusDurationDaily(models.Model):
+    """
+    Rollup raportowy: łączny czas spędzony w statusie, liczony z par STATUS_CHANGED.
+    Przedział przypisujemy do dnia, w którym zlecenie opuściło status.
+    """
+    day = models.DateField()
+
+    status = models.CharField(
+        max_length=20,
+        choices=ServiceOrderStatus.choices,
+    )
+
+    transitions_count = models.PositiveIntegerField(default=0)
+    total_duration = models.DurationField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "status"], name="uniq_status_rollup_day_status"),
+        ]
+
+    def __str__(self) -> str:
+        return f"StatusDuration {self.day} / {self.status}"
+
+
+class ReportCheckpoint(models.Model):
+    """
+    Znacznik przyrostowego odświeżania rollupów: ostatnie przetworzone id źródła.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name}@{self.last_id}"
+
+
+class SlaCheckpoint(models.Model):
+    """
+    Znacznik monitora SLA: terminy do checked_until zostały już sprawdzone.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    checked_until = models.DateTimeField()
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name}@{self.checked_until}"
+
+
+class CatalogVersion(models.Model):
+    """
+    Wersja katalogu usług (jeden wiersz) - część kluczy cache danych zależnych od katalogu
+    (orders.catalog). W bazie, bo cache może usunąć licznik, a po jego wyzerowaniu
+    wróciłyby stare wpisy z tym samym numerem wersji.
+    """
+    version = models.PositiveBigIntegerField()
+    changed_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"v{self.version}"
+
+
+class NotificationEvent(models.Model):
+    """
+    Bufor powiadomień klienta: zdarzenia zlecenia czekające na wysłanie zbiorczym mailem.
+    Zdarzenia jednego zlecenia z okna NOTIFICATION_DIGEST_WINDOW łączymy w jedną wiadomość.
+    """
+    order = models.ForeignKey(
+        ServiceOrder,
+        on_delete=models.CASCADE,
+        related_name="notification_events",
+    )
+
+    old_status = models.CharField(max_length=20, choices=ServiceOrderStatus.choices, blank=True)
+    new_status = models.CharField(max_length=20, choices=ServiceOrderStatus.choices)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    # Przejęcie do wysyłki przez jedno uruchomienie send_notifications
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Wyszukiwanie oczekujących zdarzeń (sent_at IS NULL) od najstarszych
+            models.Index(fields=["sent_at", "created_at"], name="notif_pending_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Notification {self.order_id}: {self.old_status} -> {self.new_status}"
+
+
+class Job(models.Model):
+    """
+    Zadanie w tle (orders.jobs): nazwa handlera + argumenty, wykonywane przez worker run_jobs.
+    """
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "W kolejce"
+        RUNNING = "RUNNING", "W trakcie"
+        DONE = "DONE", "Wykonane"
+        FAILED = "FAILED", "Błąd"
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+
+    # Deduplikacja: drugie zadanie z tym samym kluczem nie powstaje, póki pierwsze czeka w kolejce
+    key = models.CharField(max_length=200, blank=True)
+
+    # Wyższy priorytet = wcześniej
+    priority = models.SmallIntegerField(default=0)
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+
+    # Najwcześniejsza chwila wykonania (ponowienia z opóźnieniem)
+    run_at = models.DateTimeField(default=timezone.now)
+
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.TextField(blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Pobieranie kolejnych zadań: status=QUEUED, od najwyższego priorytetu i najstarszego terminu
+            models.Index(fields=["status", "-priority", "run_at"], name="job_pending_idx"),
+            models.Index(fields=["key", "status"], name="job_key_status_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Job {self.name}#{self.pk} ({self.status})"
@@ -0,0 +1,150 @@
+"""
+Zbiorcze powiadomienia o zmianach statusu zleceń.
+
+Zmiana statusu nie wysyła maila od razu - zapisuje NotificationEvent w tej samej
+transakcji co zmianę. Komenda send_notifications zbiera zlecenia, których
+najstarsze oczekujące zdarzenie jest starsze niż NOTIFICATION_DIGEST_WINDOW,
+i wysyła jedną wiadomość na zlecenie (aktualny status + przebieg zmian,
+szablon orders/email/status_digest) przez jedno połączenie SMTP.
+
+Przed wysyłką zdarzenia są przejmowane (locked_by = token uruchomienia) - SELECT ...
+FOR UPDATE SKIP LOCKED albo warunkowym UPDATE, jak zadania w orders.jobs - więc dwa
+nakładające się uruchomienia crona nie wyślą tego samego podsumowania dwa razy.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection as db_connection, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .choices import ServiceOrderStatus
+from .models import NotificationEvent, ServiceOrder
+
+
+STATUS_LABELS = dict(ServiceOrderStatus.choices)
+
+
+def digest_window() -> timedelta:
+    return timedelta(seconds=getattr(settings, "NOTIFICATION_DIGEST_WINDOW", 300))
+
+
+def lock_timeout() -> timedelta:
+    return timedelta(seconds=getattr(settings, "NOTIFICATION_LOCK_TIMEOUT", 600))
+
+
+def _unclaimed(now) -> Q:
+    # Wolne albo porzucone przez przerwane uruchomienie
+    return Q(locked_by="") | Q(locked_at__lt=now - lock_timeout())
+
+
+def queue_status_change(order: ServiceOrder, old_status: str, new_status: str) -> NotificationEvent:
+    return NotificationEvent.objects.create(order=order, old_status=old_status or "", new_status=new_status)
+
+
+def digest_context(order: ServiceOrder, events: list) -> dict:
+    """
+    Kontekst szablonu status_digest: bieżący status i kolejne zmiany z bufora.
+    """
+    return {
+        "order": order,
+        "changes": [
+            {
+                "at": e.created_at,
+                "old_label": STATUS_LABELS.get(e.old_status, e.old_status or "-"),
+                "new_label": STATUS_LABELS.get(e.new_status, e.new_status),
+            }
+            for e in events
+        ],
+    }
+
+
+def due_order_ids(now=None, window: timedelta = None, limit: int = 500) -> list:
+    """
+    Zlecenia, których najstarsze oczekujące zdarzenie przeleżało już pełne okno.
+    """
+    now = now or timezone.now()
+    window = digest_window() if window is None else window
+    return list(
+        NotificationEvent.objects.filter(_unclaimed(now), sent_at__isnull=True)
+        .values("order_id")
+        .annotate(first_at=Min("created_at"))
+        .filter(first_at__lte=now - window)
+        .order_by("first_at")
+        .values_list("order_id", flat=True)[:limit]
+    )
+
+
+def claim_events(order_ids: list, now=None) -> list:
+    """
+    Przejmuje oczekujące zdarzenia podanych zleceń dla bieżącego uruchomienia; zwraca
+    tylko przejęte (zdarzenia zajęte przez równoległą wysyłkę są pomijane).
+    """
+    now = now or timezone.now()
+    token = uuid.uuid4().hex
+    pending = NotificationEvent.objects.filter(
+        _unclaimed(now), order_id__in=order_ids, sent_at__isnull=True, created_at__lte=now,
+    )
+    claim = {"locked_by": token, "locked_at": timezone.now()}
+
+    if db_connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(pending.select_for_update(skip_locked=True).values_list("id", flat=True))
+            NotificationEvent.objects.filter(id__in=ids).update(**claim)
+    else:
+        # Warunek w samym UPDATE: zdarzenia przejęte w międzyczasie przez inne uruchomienie są pomijane
+        pending.update(**claim)
+
+    return list(
+        NotificationEvent.objects.filter(locked_by=token)
+        .select_related("order")
+        .order_by("order_id", "created_at", "id")
+    )
+
+
+def send_digests(now=None, window: timedelta = None, batch_size: int = 500, connection=None) -> dict:
+    """
+    Wysyła zaległe podsumowania partiami po batch_size zleceń (4 zapytania + 1 połączenie
+    SMTP na partię). Wysyłamy tylko zdarzenia przejęte przez to uruchomienie i oznaczamy
+    je jako wysłane po udanej wysyłce; przy błędzie SMTP zwalniamy je do ponowienia.
+    """
+    # Wysyłka tylko z komendy send_notifications - mail ładowany dopiero tutaj
+    from django.core.mail import get_connection
+
+    from .emails import render_emails
+
+    now = now or timezone.now()
+    stats = {"orders": 0, "events": 0}
+    connection = connection or get_connection()
+
+    with connection:
+        while True:
+            order_ids = due_order_ids(now, window, batch_size)
+            if not order_ids:
+                break
+
+            events = claim_events(order_ids, now)
+            if not events:
+                break
+            per_order = {}
+            for event in events:
+                per_order.setdefault(event.order_id, []).append(event)
+
+            event_ids = [e.id for e in events]
+            messages = render_emails(
+                "status_digest",
+                ((digest_context(evts[0].order, evts), [evts[0].order.customer_email]) for evts in per_order.values()),
+            )
+            try:
+                connection.send_messages(messages)
+            except Exception:
+                NotificationEvent.objects.filter(id__in=event_ids).update(locked_by="", locked_at=None)
+                raise
+
+            NotificationEvent.objects.filter(id__in=event_ids).update(sent_at=timezone.now(), locked_by="")
+
+            stats["orders"] += len(per_order)
+            stats["events"] += len(event_ids)
+
+    return stats
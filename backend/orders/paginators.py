@@ -0,0 +1,63 @@
+"""
+Paginator list admina dla dużych tabel (zlecenia, audit log) - bez pełnego COUNT(*).
+
+- Lista bez filtrów: liczba wierszy ze statystyk bazy (PostgreSQL pg_class.reltuples,
+  SQLite sqlite_stat1 po ANALYZE, MySQL information_schema), gdy przekracza
+  ESTIMATE_THRESHOLD - odczyt jednego wiersza katalogu zamiast skanu tabeli.
+- Lista z filtrami (albo bez statystyk): COUNT ograniczony do COUNT_CAP wierszy
+  (COUNT po podzapytaniu z LIMIT). Dalsze strony są niedostępne - listę trzeba
+  zawęzić filtrem albo datą (date_hierarchy).
+"""
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+ESTIMATE_THRESHOLD = 100_000
+COUNT_CAP = 100_000
+
+_ESTIMATE_SQL = {
+    "postgresql": "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+    "sqlite": "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1",
+    "mysql": (
+        "SELECT table_rows FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = %s"
+    ),
+}
+
+
+def estimated_row_count(model, using: str = "default"):
+    """
+    Przybliżona liczba wierszy tabeli modelu ze statystyk bazy; None, gdy ich brak.
+    """
+    connection = connections[using]
+    sql = _ESTIMATE_SQL.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [model._meta.db_table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        # SQLite bez ANALYZE nie ma tabeli sqlite_stat1
+        return None
+    if row is None or row[0] is None:
+        return None
+    # sqlite_stat1.stat to "<liczba wierszy> <średnie dla kolumn indeksu>..."
+    estimate = int(str(row[0]).split()[0])
+    # PostgreSQL: -1 = tabela jeszcze nieanalizowana
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    estimate_threshold = ESTIMATE_THRESHOLD
+    count_cap = COUNT_CAP
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.estimate_threshold:
+                return estimate
+        return min(queryset.order_by()[: self.count_cap + 1].count(), self.count_cap)
@@ -0,0 +1,133 @@
+"""
+Portal klienta: wszystkie zlecenia danego adresu e-mail po weryfikacji kodem jednorazowym.
+
+- Kod (6 cyfr) trafia mailem tylko na adres, dla którego istnieją zlecenia. Sprawdzenie
+  i wysyłkę robi worker zadań (orders.jobs) - żądanie wykonuje tę samą pracę dla każdego
+  adresu, więc ani treść, ani czas odpowiedzi nie zdradzają, kto jest klientem.
+- W cache trzymamy wyłącznie skrót kodu (HMAC z SECRET_KEY), z limitem prób i ważnością
+  PORTAL_CODE_TTL; kolejny kod na ten sam adres najwcześniej po PORTAL_RESEND_COOLDOWN.
+- Po weryfikacji adres zapisujemy w sesji na PORTAL_SESSION_TTL, a historia to jedno
+  zapytanie stronicowane po indeksie (customer_email, created_at) + prefetch pozycji i opcji.
+"""
+import hashlib
+import hmac
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+
+from . import jobs
+from .models import ServiceOrder, normalize_email
+
+
+PORTAL_SESSION_KEY = "portal_customer"
+
+PORTAL_CODE_TTL = 600
+PORTAL_CODE_ATTEMPTS = 5
+PORTAL_RESEND_COOLDOWN = 60
+PORTAL_SESSION_TTL = 1800
+
+PAGE_SIZE = 10
+
+
+class PortalError(Exception):
+    """
+    Niepoprawny, wygasły albo wyczerpany kod dostępu.
+    """
+
+
+def _email_digest(email: str) -> str:
+    # Klucz cache bez adresu e-mail w jawnej postaci
+    return hashlib.sha256(email.encode()).hexdigest()
+
+
+def _code_key(email: str) -> str:
+    return f"portal:code:{_email_digest(email)}"
+
+
+def _cooldown_key(email: str) -> str:
+    return f"portal:cooldown:{_email_digest(email)}"
+
+
+def _hash_code(email: str, code: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), f"{email}:{code}".encode(), hashlib.sha256).hexdigest()
+
+
+def request_code(email: str) -> None:
+    """
+    Kolejkuje wysyłkę kodu dostępu, jeśli adres nie prosił o kod przed chwilą.
+    """
+    email = normalize_email(email)
+    if not email:
+        raise PortalError("Podaj adres e-mail.")
+
+    if not cache.add(_cooldown_key(email), 1, timeout=PORTAL_RESEND_COOLDOWN):
+        return
+    jobs.enqueue(jobs.SEND_PORTAL_CODE, {"email": email}, priority=jobs.PRIORITY_HIGH)
+
+
+def send_code(email: str) -> None:
+    """
+    Handler zadania (orders.jobs): nowy kod i mail z nim - tylko dla adresu ze zleceniami.
+    """
+    if not ServiceOrder.objects.filter(customer_email=email).exists():
+        return
+
+    code = f"{secrets.randbelow(10 ** 6):06d}"
+    cache.set(_code_key(email), {"hash": _hash_code(email, code), "attempts": 0}, timeout=PORTAL_CODE_TTL)
+
+    # Wysyłka tylko z workera zadań - mail ładowany dopiero tutaj (jak w orders.cart)
+    from .emails import render_email
+
+    render_email(
+        "portal_code",
+        {"code": code, "valid_minutes": PORTAL_CODE_TTL // 60},
+        to=[email],
+    ).send()
+
+
+def verify_code(session, email: str, code: str) -> str:
+    """
+    Sprawdza kod i loguje adres do portalu w bieżącej sesji; zwraca znormalizowany adres.
+    """
+    email = normalize_email(email)
+    key = _code_key(email)
+    entry = cache.get(key)
+    if entry is None or entry["attempts"] >= PORTAL_CODE_ATTEMPTS:
+        cache.delete(key)
+        raise PortalError("Kod wygasł - poproś o nowy.")
+
+    if not hmac.compare_digest(entry["hash"], _hash_code(email, (code or "").strip())):
+        entry["attempts"] += 1
+        cache.set(key, entry, timeout=PORTAL_CODE_TTL)
+        raise PortalError("Niepoprawny kod.")
+
+    cache.delete(key)
+    # Nowy identyfikator sesji po podniesieniu uprawnień (session fixation)
+    session.cycle_key()
+    session[PORTAL_SESSION_KEY] = {"email": email, "until": time.time() + PORTAL_SESSION_TTL}
+    return email
+
+
+def portal_email(session):
+    """
+    Adres zalogowany do portalu w tej sesji albo None (brak lub wygasło).
+    """
+    entry = session.get(PORTAL_SESSION_KEY)
+    if not entry or entry["until"] < time.time():
+        return None
+    return entry["email"]
+
+
+def logout(session) -> None:
+    session.pop(PORTAL_SESSION_KEY, None)
+
+
+def order_history(email: str, page_number=1):
+    """
+    Strona historii zleceń klienta (Page z paginatora Django).
+    """
+    paginator = Paginator(ServiceOrder.objects.customer_history(email), PAGE_SIZE)
+    return paginator.get_page(page_number)
@@ -0,0 +1,131 @@
+"""
+Profilowanie widoków na żądanie (produkcja): cProfile albo próbkowanie stosu.
+
+- Wyłączone (PROFILING_ENABLED = False): middleware zgłasza MiddlewareNotUsed
+  i Django usuwa go z łańcucha - zero narzutu.
+- Włączone: profilujemy losowy ułamek żądań (PROFILING_SAMPLE_RATE) oraz żądania
+  z nagłówkiem X-Profile (wartość = PROFILING_TOKEN albo zalogowany personel).
+- Wynik trafia do PROFILING_DIR/<nazwa widoku>/: *.prof (pstats, tryb "cprofile")
+  albo *.collapsed (stosy "a;b;c N" dla flamegraph, tryb "sampler").
+  Komenda aggregate_profiles łączy je per nazwa URL.
+"""
+import cProfile
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.crypto import constant_time_compare
+
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+
+MODE_CPROFILE = "cprofile"
+MODE_SAMPLER = "sampler"
+
+EXTENSIONS = {MODE_CPROFILE: ".prof", MODE_SAMPLER: ".collapsed"}
+
+
+class StackSampler:
+    """
+    Próbkowanie stosu jednego wątku co `interval` sekund (sys._current_frames).
+    Narzut nie zależy od liczby wywołań funkcji - w przeciwieństwie do cProfile.
+    """
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._target = None
+        self._thread = None
+
+    def start(self) -> None:
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def write(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def profile_path(view_name: str, mode: str) -> Path:
+    directory = Path(settings.PROFILING_DIR) / view_name.replace(":", "-")
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return directory / f"{stamp}-{os.getpid()}-{secrets.token_hex(3)}{EXTENSIONS[mode]}"
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+        self.token = getattr(settings, "PROFILING_TOKEN", "")
+        self.mode = getattr(settings, "PROFILING_MODE", MODE_CPROFILE)
+        if self.mode not in EXTENSIONS:
+            raise ValueError(f"Nieznany PROFILING_MODE: {self.mode}")
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def _wanted(self, request) -> bool:
+        header = request.META.get(PROFILE_HEADER)
+        if header is not None:
+            if self.token and constant_time_compare(header, self.token):
+                return True
+            user = getattr(request, "user", None)
+            if user is not None and user.is_staff:
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self._wanted(request):
+            return None
+
+        def call_view():
+            response = view_func(request, *view_args, **view_kwargs)
+            # TemplateResponse renderuje się leniwie - szablon też ma trafić do profilu
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+            return response
+
+        view_name = request.resolver_match.view_name or "unnamed"
+        path = profile_path(view_name, self.mode)
+
+        if self.mode == MODE_SAMPLER:
+            sampler = StackSampler()
+            sampler.start()
+            try:
+                return call_view()
+            finally:
+                sampler.stop()
+                sampler.write(path)
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(call_view)
+        finally:
+            profiler.dump_stats(path)
@@ -0,0 +1,343 @@
+"""
+Moduł raportowy: przychody (widełki wycen), attach rate opcji i czas w statusach.
+
+Raporty czytają wyłącznie z tabel rollup (ServiceRevenueDaily, OptionAttachDaily,
+StatusDurationDaily). Rollupy odświeżamy przyrostowo: przeliczamy tylko dni,
+w których pojawiły się nowe pozycje zleceń / nowe zmiany statusu.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import (
+    Cast,
+    Coalesce,
+    TruncDate,
+    TruncMonth,
+    TruncWeek,
+    TruncYear,
+)
+from django.db.models.functions.window import Rank
+from django.utils import timezone
+
+from .models import (
+    AuditLog,
+    OptionAttachDaily,
+    ReportCheckpoint,
+    ServiceOrderItem,
+    ServiceOrderItemOption,
+    ServiceRevenueDaily,
+    StatusDurationDaily,
+)
+
+
+CHECKPOINT_ITEMS = "order_items"
+CHECKPOINT_STATUS = "status_changes"
+
+PERIOD_TRUNCS = {
+    "day": None,
+    "week": TruncWeek,
+    "month": TruncMonth,
+    "year": TruncYear,
+}
+
+
+# --- Odświeżanie rollupów ---------------------------------------------------
+
+def _take_dirty_days(checkpoint_name: str, queryset, date_field: str) -> set:
+    """
+    Zwraca dni, w których pojawiły się rekordy nowsze niż checkpoint,
+    i przesuwa checkpoint na najwyższe widziane id.
+    """
+    checkpoint, _ = ReportCheckpoint.objects.select_for_update().get_or_create(name=checkpoint_name)
+
+    fresh = queryset.filter(id__gt=checkpoint.last_id)
+    max_id = fresh.aggregate(max_id=Max("id"))["max_id"]
+    if max_id is None:
+        return set()
+
+    days = set(
+        fresh.filter(id__lte=max_id)
+        .annotate(day=TruncDate(date_field))
+        .values_list("day", flat=True)
+        .distinct()
+    )
+
+    checkpoint.last_id = max_id
+    checkpoint.save(update_fields=["last_id", "updated_at"])
+    return days
+
+
+def _rebuild_revenue(days: set) -> None:
+    ServiceRevenueDaily.objects.filter(day__in=days).delete()
+
+    rows = (
+        ServiceOrderItem.objects.annotate(day=TruncDate("created_at"))
+        .filter(day__in=days)
+        .values("day", "service_id")
+        .annotate(
+            items_count=Count("id"),
+            revenue_min=Sum("calculated_price_min"),
+            revenue_max=Sum("calculated_price_max"),
+        )
+    )
+    ServiceRevenueDaily.objects.bulk_create(
+        [ServiceRevenueDaily(**row) for row in rows],
+        batch_size=500,
+    )
+
+
+def _rebuild_option_attach(days: set) -> None:
+    OptionAttachDaily.objects.filter(day__in=days).delete()
+
+    rows = (
+        ServiceOrderItemOption.objects.annotate(day=TruncDate("order_item__created_at"))
+        .filter(day__in=days)
+        .values("day", "option_id", service_id=F("order_item__service_id"))
+        .annotate(attach_count=Count("id"))
+    )
+    OptionAttachDaily.objects.bulk_create(
+        [OptionAttachDaily(**row) for row in rows],
+        batch_size=500,
+    )
+
+
+def status_intervals():
+    """
+    Queryset przedziałów "czas w statusie" zamkniętych zmianą statusu: każdy wpis
+    STATUS_CHANGED kończy przedział statusu old_value (left_at = chwila zmiany),
+    który zaczął się poprzednim wpisem ORDER_CREATED / STATUS_CHANGED zlecenia (entered_at).
+    Bieżący status zlecenia nie ma jeszcze zamykającego wpisu - nie ma tu przedziału.
+    """
+    entered_at = (
+        AuditLog.objects.filter(
+            order_id=OuterRef("order_id"),
+            action__in=[AuditLog.Action.ORDER_CREATED, AuditLog.Action.STATUS_CHANGED],
+            performed_at__lt=OuterRef("performed_at"),
+        )
+        .order_by("-performed_at")
+        .values("performed_at")[:1]
+    )
+
+    return (
+        AuditLog.objects.filter(order__isnull=False, action=AuditLog.Action.STATUS_CHANGED)
+        .annotate(
+            status=F("old_value"),
+            left_at=F("performed_at"),
+            entered_at=Subquery(entered_at),
+        )
+        .annotate(
+            duration=ExpressionWrapper(F("left_at") - F("entered_at"), output_field=DurationField()),
+        )
+    )
+
+
+def _day_start(day) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _rebuild_status_durations(days: set) -> None:
+    StatusDurationDaily.objects.filter(day__in=days).delete()
+
+    # Zakres performed_at od pierwszego do ostatniego brudnego dnia - skan indeksu
+    # tylko nowych zmian, nie całej historii audytu
+    rows = (
+        status_intervals()
+        .filter(
+            performed_at__gte=_day_start(min(days)),
+            performed_at__lt=_day_start(max(days) + timedelta(days=1)),
+            entered_at__isnull=False,
+        )
+        .annotate(day=TruncDate("left_at"))
+        .filter(day__in=days)
+        .values("day", "status")
+        .annotate(
+            transitions_count=Count("id"),
+            total_duration=Sum("duration"),
+        )
+    )
+    StatusDurationDaily.objects.bulk_create(
+        [StatusDurationDaily(**row) for row in rows],
+        batch_size=500,
+    )
+
+
+@transaction.atomic
+def refresh_rollups() -> dict:
+    """
+    Przyrostowe odświeżenie rollupów. Zwraca liczbę przeliczonych dni per rollup.
+    """
+    item_days = _take_dirty_days(
+        CHECKPOINT_ITEMS,
+        ServiceOrderItem.objects.all(),
+        "created_at",
+    )
+    if item_days:
+        _rebuild_revenue(item_days)
+        _rebuild_option_attach(item_days)
+
+    # Nowa zmiana statusu zamyka przedział poprzedniego statusu - w dniu tej zmiany
+    status_days = _take_dirty_days(
+        CHECKPOINT_STATUS,
+        AuditLog.objects.filter(action=AuditLog.Action.STATUS_CHANGED, order__isnull=False),
+        "performed_at",
+    )
+    if status_days:
+        _rebuild_status_durations(status_days)
+
+    return {"items": len(item_days), "status": len(status_days)}
+
+
+@transaction.atomic
+def rebuild_rollups() -> dict:
+    """
+    Pełna przebudowa rollupów (np. po imporcie historycznych danych).
+    """
+    ServiceRevenueDaily.objects.all().delete()
+    OptionAttachDaily.objects.all().delete()
+    StatusDurationDaily.objects.all().delete()
+    ReportCheckpoint.objects.filter(name__in=[CHECKPOINT_ITEMS, CHECKPOINT_STATUS]).delete()
+    return refresh_rollups()
+
+
+# --- Raporty (odczyt z rollupów) --------------------------------------------
+
+def _in_range(queryset, date_from=None, date_to=None):
+    if date_from:
+        queryset = queryset.filter(day__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(day__lte=date_to)
+    return queryset
+
+
+def revenue_by_service(date_from=None, date_to=None):
+    """
+    Widełki przychodu per usługa w zakresie dat, z pozycją w rankingu.
+    """
+    return (
+        _in_range(ServiceRevenueDaily.objects.all(), date_from, date_to)
+        .values("service_id", service_name=F("service__name"))
+        .annotate(
+            items=Sum("items_count"),
+            total_min=Sum("revenue_min"),
+            total_max=Sum("revenue_max"),
+        )
+        .annotate(rank=Window(Rank(), order_by=F("total_max").desc()))
+        .order_by("rank", "service_name")
+    )
+
+
+def revenue_by_period(date_from=None, date_to=None, period: str = "month"):
+    """
+    Widełki przychodu w okresach (day / week / month / year).
+    """
+    trunc = PERIOD_TRUNCS[period]
+    period_expr = trunc("day") if trunc else F("day")
+
+    return (
+        _in_range(ServiceRevenueDaily.objects.all(), date_from, date_to)
+        .annotate(period=period_expr)
+        .values("period")
+        .annotate(
+            items=Sum("items_count"),
+            total_min=Sum("revenue_min"),
+            total_max=Sum("revenue_max"),
+        )
+        .order_by("period")
+    )
+
+
+def option_attach_rates(date_from=None, date_to=None):
+    """
+    Attach rate opcji: liczba wyborów opcji / liczba pozycji danej usługi w okresie.
+    """
+    service_items = (
+        _in_range(ServiceRevenueDaily.objects.filter(service_id=OuterRef("service_id")), date_from, date_to)
+        .values("service_id")
+        .annotate(total=Sum("items_count"))
+        .values("total")
+    )
+
+    return (
+        _in_range(OptionAttachDaily.objects.all(), date_from, date_to)
+        .values(
+            "option_id",
+            "service_id",
+            option_name=F("option__name"),
+            service_name=F("service__name"),
+        )
+        .annotate(
+            attached=Sum("attach_count"),
+            items=Coalesce(Subquery(service_items), Value(0)),
+        )
+        .annotate(
+            attach_rate=Case(
+                When(items=0, then=Value(0.0)),
+                default=ExpressionWrapper(
+                    Cast("attached", FloatField()) / Cast("items", FloatField()),
+                    output_field=FloatField(),
+                ),
+            ),
+        )
+        .order_by("service_name", "-attach_rate")
+    )
+
+
+def status_durations(date_from=None, date_to=None):
+    """
+    Łączny czas spędzony w każdym statusie (przedziały zamknięte w okresie).
+    """
+    return (
+        _in_range(StatusDurationDaily.objects.all(), date_from, date_to)
+        .values("status")
+        .annotate(
+            transitions=Sum("transitions_count"),
+            duration=Sum("total_duration"),
+        )
+        .order_by("status")
+    )
+
+
+# --- Obciążenie (bezpośrednio ze snapshotów czasu pracy pozycji) ------------
+
+def workload_by_day(date_from=None, date_to=None):
+    """
+    Suma szacowanego czasu pracy (minuty) pozycji przyjętych danego dnia.
+    Zakres po samym created_at - zapytanie czyta indeks (created_at, estimated_duration_minutes).
+    """
+    queryset = ServiceOrderItem.objects.all()
+    if date_from:
+        queryset = queryset.filter(created_at__gte=_day_start(date_from))
+    if date_to:
+        queryset = queryset.filter(created_at__lt=_day_start(date_to + timedelta(days=1)))
+    return (
+        queryset.annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(items=Count("id"), minutes=Sum("estimated_duration_minutes"))
+        .order_by("day")
+    )
+
+
+def workload_by_status():
+    """
+    Suma szacowanego czasu pracy (minuty) zleceń w poszczególnych statusach.
+    """
+    return (
+        ServiceOrderItem.objects.values(status=F("order__status"))
+        .annotate(items=Count("id"), minutes=Sum("estimated_duration_minutes"))
+        .order_by("status")
+    )
@@ -0,0 +1,374 @@
+"""
+Planer kolejki technika: przypisanie otwartych zleceń do techników z uwzględnieniem
+godzin pracy i propozycja realnych terminów zakończenia.
+
+- Czas pracy zlecenia to suma snapshotów ServiceOrderItem.estimated_duration_minutes.
+- Pełne planowanie: zachłanne list scheduling na kopcu (technik najwcześniej wolny
+  bierze kolejne zlecenie wg priorytetu) - O(n log m).
+- Zmiana jednego zlecenia przelicza tylko kolejkę jego technika od pozycji tego
+  zlecenia (Schedule.update / replan_technician), bez planowania wszystkiego od nowa.
+- Zapis planu to compare-and-set na ServiceOrder.version (jak update_versioned):
+  zlecenie zmienione w międzyczasie nie jest nadpisywane, a kolejkę jego technika
+  przeplanowuje ponownie worker (zadanie replan_technician) na świeżych danych.
+"""
+import heapq
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import jobs as job_queue
+from .choices import ServiceOrderStatus
+from .models import ServiceOrder, ServiceOrderItem, Technician
+
+
+# Czas pracy zlecenia bez pozycji (jak domyślne Service.base_duration_minutes)
+DEFAULT_DURATION_MINUTES = 60
+
+# Statusy, w których zlecenie nie wymaga już pracy technika
+CLOSED_STATUSES = [
+    ServiceOrderStatus.READY,
+    ServiceOrderStatus.COMPLETED,
+    ServiceOrderStatus.CANCELED,
+]
+
+# Priorytet kolejki: najpierw rozpoczęte, potem przyjęte, nowe, czekające na części
+STATUS_PRIORITY = {
+    ServiceOrderStatus.IN_PROGRESS: 0,
+    ServiceOrderStatus.RECEIVED: 1,
+    ServiceOrderStatus.NEW: 2,
+    ServiceOrderStatus.WAITING_FOR_PARTS: 3,
+}
+
+
+class WorkCalendar:
+    """
+    Godziny pracy technika (codziennie work_start-work_end, opcjonalnie bez weekendów).
+    """
+    def __init__(self, work_start, work_end, works_weekends: bool = False):
+        if work_end <= work_start:
+            raise ValueError("Koniec pracy musi być po jej początku")
+        self.work_start = work_start
+        self.work_end = work_end
+        self.works_weekends = works_weekends
+
+    @classmethod
+    def for_technician(cls, technician: Technician) -> "WorkCalendar":
+        return cls(technician.work_start, technician.work_end, technician.works_weekends)
+
+    def _is_workday(self, day) -> bool:
+        return self.works_weekends or day.weekday() < 5
+
+    def _bounds(self, day, tz):
+        start = datetime.combine(day, self.work_start, tzinfo=tz)
+        end = datetime.combine(day, self.work_end, tzinfo=tz)
+        return start, end
+
+    def align(self, moment: datetime) -> datetime:
+        """
+        Najbliższa chwila pracy >= moment.
+        """
+        moment = timezone.localtime(moment)
+        tz = moment.tzinfo
+        day = moment.date()
+        while True:
+            if self._is_workday(day):
+                start, end = self._bounds(day, tz)
+                if moment < end:
+                    return max(moment, start)
+            day += timedelta(days=1)
+            moment = datetime.combine(day, self.work_start, tzinfo=tz)
+
+    def add_minutes(self, start: datetime, minutes: int) -> datetime:
+        """
+        Chwila zakończenia pracy trwającej `minutes` minut roboczych od `start`.
+        """
+        moment = self.align(start)
+        remaining = timedelta(minutes=max(minutes, 0))
+        while True:
+            _, day_end = self._bounds(moment.date(), moment.tzinfo)
+            available = day_end - moment
+            if remaining <= available:
+                return moment + remaining
+            remaining -= available
+            moment = self.align(day_end)
+
+
+class TechnicianQueue:
+    """
+    Uporządkowana kolejka zleceń jednego technika z wyliczonymi terminami zakończenia.
+    """
+    def __init__(self, technician_id: int, calendar: WorkCalendar):
+        self.technician_id = technician_id
+        self.calendar = calendar
+        self.order_ids = []
+        self.minutes = []
+        self.ends = []
+
+    @property
+    def available_at(self):
+        return self.ends[-1] if self.ends else None
+
+    def append(self, order_id: int, minutes: int, now: datetime) -> datetime:
+        start = self.ends[-1] if self.ends else now
+        end = self.calendar.add_minutes(start, minutes)
+        self.order_ids.append(order_id)
+        self.minutes.append(minutes)
+        self.ends.append(end)
+        return end
+
+    def retime(self, index: int, now: datetime) -> list:
+        """
+        Przelicza terminy od pozycji `index` do końca kolejki; zwraca zmienione order_id.
+        """
+        start = self.ends[index - 1] if index > 0 else now
+        changed = []
+        for i in range(index, len(self.order_ids)):
+            end = self.calendar.add_minutes(start, self.minutes[i])
+            if end == self.ends[i]:
+                # Termin zależy tylko od poprzedniego - dalsza część kolejki bez zmian
+                break
+            self.ends[i] = end
+            changed.append(self.order_ids[i])
+            start = end
+        return changed
+
+
+class Schedule:
+    """
+    Plan dla wszystkich techników: kolejki + indeks zlecenie -> (technik, pozycja).
+    """
+    def __init__(self, queues: list, now: datetime):
+        self.now = now
+        self.queues = {q.technician_id: q for q in queues}
+        self._position = {}
+        for q in queues:
+            for i, order_id in enumerate(q.order_ids):
+                self._position[order_id] = (q.technician_id, i)
+
+    @classmethod
+    def build(cls, jobs, calendars: dict, now=None) -> "Schedule":
+        """
+        jobs: iterowalne (order_id, minutes) w kolejności priorytetu.
+        calendars: {technician_id: WorkCalendar}.
+        """
+        now = now or timezone.now()
+        queues = [TechnicianQueue(tech_id, cal) for tech_id, cal in calendars.items()]
+        if not queues:
+            raise ValueError("Brak aktywnych techników do zaplanowania pracy")
+
+        # Kopiec (chwila dostępności, id technika) - technik najwcześniej wolny bierze kolejne zlecenie
+        heap = [(q.calendar.align(now), q.technician_id) for q in queues]
+        heapq.heapify(heap)
+        by_id = {q.technician_id: q for q in queues}
+
+        for order_id, minutes in jobs:
+            available_at, tech_id = heapq.heappop(heap)
+            end = by_id[tech_id].append(order_id, minutes, available_at)
+            heapq.heappush(heap, (end, tech_id))
+
+        return cls(queues, now)
+
+    def estimates(self) -> dict:
+        """
+        {order_id: (technician_id, estimated_completion_at)}
+        """
+        result = {}
+        for q in self.queues.values():
+            for order_id, end in zip(q.order_ids, q.ends):
+                result[order_id] = (q.technician_id, end)
+        return result
+
+    def _reindex(self, queue: TechnicianQueue, index: int) -> None:
+        for i in range(index, len(queue.order_ids)):
+            self._position[queue.order_ids[i]] = (queue.technician_id, i)
+
+    def add(self, order_id: int, minutes: int) -> list:
+        """
+        Nowe zlecenie trafia na koniec kolejki, która kończy się najwcześniej.
+        """
+        queue = min(
+            self.queues.values(),
+            key=lambda q: q.available_at or q.calendar.align(self.now),
+        )
+        queue.append(order_id, minutes, self.now)
+        self._position[order_id] = (queue.technician_id, len(queue.order_ids) - 1)
+        return [order_id]
+
+    def update(self, order_id: int, minutes: int) -> list:
+        """
+        Zmiana czasu pracy zlecenia - przeliczamy tylko dalszą część kolejki jego technika.
+        """
+        tech_id, index = self._position[order_id]
+        queue = self.queues[tech_id]
+        queue.minutes[index] = minutes
+        return queue.retime(index, self.now)
+
+    def remove(self, order_id: int) -> list:
+        """
+        Zlecenie zamknięte / anulowane - kolejne zlecenia technika przesuwają się do przodu.
+        """
+        tech_id, index = self._position.pop(order_id)
+        queue = self.queues[tech_id]
+        del queue.order_ids[index]
+        del queue.minutes[index]
+        del queue.ends[index]
+        self._reindex(queue, index)
+        if index < len(queue.order_ids):
+            return queue.retime(index, self.now)
+        return []
+
+
+# --- Integracja z bazą ------------------------------------------------------
+
+def open_orders():
+    """
+    Otwarte zlecenia z czasem pracy (minutes) ze snapshotów pozycji, posortowane wg priorytetu.
+    """
+    item_minutes = (
+        ServiceOrderItem.objects.filter(order=OuterRef("pk"))
+        .values("order")
+        .annotate(total=Sum("estimated_duration_minutes"))
+        .values("total")
+    )
+
+    return (
+        ServiceOrder.objects.exclude(status__in=CLOSED_STATUSES)
+        .annotate(
+            minutes=Coalesce(
+                Subquery(item_minutes, output_field=IntegerField()),
+                Value(DEFAULT_DURATION_MINUTES),
+            ),
+            priority=Case(
+                *[When(status=status, then=Value(rank)) for status, rank in STATUS_PRIORITY.items()],
+                default=Value(len(STATUS_PRIORITY)),
+                output_field=IntegerField(),
+            ),
+        )
+        .order_by("priority", "created_at", "id")
+    )
+
+
+def technician_calendars() -> dict:
+    return {
+        t.id: WorkCalendar.for_technician(t)
+        for t in Technician.objects.filter(is_active=True).order_by("id")
+    }
+
+
+def plan_all(now=None) -> Schedule:
+    """
+    Pełne zaplanowanie wszystkich otwartych zleceń (2 zapytania).
+    """
+    jobs = open_orders().values_list("id", "minutes")
+    return Schedule.build(jobs.iterator(chunk_size=2000), technician_calendars(), now)
+
+
+def _stored_plan(order_ids, batch_size: int) -> dict:
+    """
+    {order_id: (assigned_technician_id, estimated_completion_at, estimate_is_manual, version)}
+    z bazy, paczkami po batch_size.
+    """
+    order_ids = list(order_ids)
+    stored = {}
+    for i in range(0, len(order_ids), batch_size):
+        rows = ServiceOrder.objects.filter(pk__in=order_ids[i:i + batch_size]).values_list(
+            "id", "assigned_technician_id", "estimated_completion_at", "estimate_is_manual", "version",
+        )
+        stored.update((row[0], row[1:]) for row in rows)
+    return stored
+
+
+def _write_versioned(changes: dict, now) -> tuple:
+    """
+    Zapis paczki {pk: (technik, termin, odczytana wersja)} jednym UPDATE z CASE (jak bulk_update),
+    ale tylko wierszom, których wersja w bazie wciąż jest równa odczytanej.
+    Zwraca (liczba zapisanych, pk pominiętych).
+    """
+    def per_row(field_name, index):
+        field = ServiceOrder._meta.get_field(field_name)
+        whens = [When(pk=pk, then=Value(row[index], output_field=field)) for pk, row in changes.items()]
+        return Case(*whens, output_field=field)
+
+    updated = ServiceOrder.objects.filter(pk__in=changes, version=per_row("version", 2)).update(
+        assigned_technician=per_row("assigned_technician", 0),
+        estimated_completion_at=per_row("estimated_completion_at", 1),
+        version=F("version") + 1,
+        updated_at=now,
+    )
+    # Zapisany wiersz ma wersję o 1 wyższą i nasz znacznik updated_at (sama wersja mogła
+    # zostać podbita raz przez kogoś innego)
+    written = ServiceOrder.objects.filter(pk__in=changes).values_list("id", "version", "updated_at")
+    return updated, [pk for pk, version, updated_at in written if (version, updated_at) != (changes[pk][2] + 1, now)]
+
+
+def _requeue_replan(order_ids) -> None:
+    # Zlecenia zmienione w trakcie planowania - kolejki ich techników przelicza worker
+    technician_ids = set(
+        ServiceOrder.objects.filter(pk__in=order_ids, assigned_technician__isnull=False)
+        .values_list("assigned_technician_id", flat=True)
+    )
+    for technician_id in sorted(technician_ids):
+        job_queue.enqueue(
+            job_queue.REPLAN_TECHNICIAN, {"technician_id": technician_id}, key=f"replan:{technician_id}",
+        )
+
+
+@transaction.atomic
+def apply_schedule(schedule: Schedule, order_ids=None, batch_size: int = 500) -> int:
+    """
+    Zapisuje przypisania i terminy z planu (hurtowo, jeden UPDATE na paczkę) - tylko zleceniom,
+    którym plan coś zmienia; zwraca liczbę zapisanych zleceń.
+    Ręcznie wpisanej estymacji (estimate_is_manual) plan nie nadpisuje.
+    Zlecenia zmienione od odczytu planu (inna wersja) są pomijane i przeplanowywane ponownie.
+    order_ids ogranicza zapis do wybranych zleceń (np. zmienionych przez update()).
+    """
+    estimates = schedule.estimates()
+    if order_ids is not None:
+        estimates = {pk: estimates[pk] for pk in order_ids if pk in estimates}
+
+    stored = _stored_plan(estimates, batch_size)
+    now = timezone.now()
+    changes = {}
+    for pk, (tech_id, end) in estimates.items():
+        if pk not in stored:
+            continue
+        stored_tech_id, stored_end, manual, version = stored[pk]
+        if manual:
+            end = stored_end
+        if (tech_id, end) == (stored_tech_id, stored_end):
+            continue
+        # Zmiana planu to też zmiana zlecenia - podbijamy wersję (otwarte formularze wykryją konflikt)
+        changes[pk] = (tech_id, end, version)
+
+    pks = list(changes)
+    saved, skipped = 0, []
+    for i in range(0, len(pks), batch_size):
+        updated, conflicts = _write_versioned({pk: changes[pk] for pk in pks[i:i + batch_size]}, now)
+        saved += updated
+        skipped += conflicts
+
+    if skipped:
+        _requeue_replan(skipped)
+    return saved
+
+
+def replan_technician(technician_id: int, now=None) -> int:
+    """
+    Przeplanowanie jednej kolejki (np. po zmianie zlecenia technika) - tylko jego zlecenia.
+    Pierwsze zlecenie zachowuje zapisany termin, jeśli wciąż jest osiągalny - inaczej
+    każde przeplanowanie przesuwałoby całą kolejkę o czas, który upłynął od poprzedniego.
+    """
+    technician = Technician.objects.get(pk=technician_id)
+    now = now or timezone.now()
+
+    queue = TechnicianQueue(technician.id, WorkCalendar.for_technician(technician))
+    rows = open_orders().filter(assigned_technician=technician).values_list("id", "minutes", "estimated_completion_at")
+    for order_id, minutes, stored_end in rows:
+        end = queue.append(order_id, minutes, queue.calendar.align(now))
+        if len(queue.ends) == 1 and stored_end and now < stored_end <= end:
+            queue.ends[0] = stored_end
+
+    return apply_schedule(Schedule([queue], now))
@@ -0,0 +1,389 @@
+"""
+Deterministyczne dane testowe w skali produkcyjnej (katalog, zlecenia, pozycje, komentarze, audyt).
+
+- To samo ziarno (seed) i ten sam dzień dają ten sam zbiór danych; zlecenia mają numery
+  z prefiksem SEED_ORDER_PREFIX, usługi nazwy z SEED_SERVICE_PREFIX - clear_seeded()
+  usuwa tylko je.
+- Zlecenia powstają paczkami po chunk_size (osobna transakcja na paczkę): każda tabela
+  to jeden bulk_create na paczkę, więc miliony wierszy to minuty, a nie godziny.
+- Rozkład statusów zależy od wieku zlecenia (stare są prawie zawsze zakończone),
+  a historia w AuditLog odpowiada przejściom workflow (utworzenie, zmiany statusu, estymacja).
+
+Jako fixture pytest: seeded_dataset w backend/conftest.py (pytest-django z requirements-dev.txt).
+"""
+import random
+import time as perf
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .choices import ServiceOrderStatus
+from .models import (
+    AuditLog,
+    Service,
+    ServiceOption,
+    ServiceOptionGroup,
+    ServiceOrder,
+    ServiceOrderComment,
+    ServiceOrderItem,
+    ServiceOrderItemOption,
+    Technician,
+)
+
+
+SEED_ORDER_PREFIX = "SEED-"
+SEED_SERVICE_PREFIX = "Seed "
+SEED_TECHNICIAN_PREFIX = "seed_tech_"
+
+SERVICE_NAMES = (
+    "Czyszczenie laptopa",
+    "Wymiana matrycy",
+    "Instalacja systemu",
+    "Odzyskiwanie danych",
+    "Wymiana dysku na SSD",
+    "Naprawa zasilania",
+    "Diagnostyka",
+    "Rozbudowa RAM",
+    "Wymiana klawiatury",
+    "Usuwanie wirusów",
+)
+
+GROUP_TEMPLATES = (
+    ("Tryb realizacji", ServiceOptionGroup.SelectionType.SINGLE, True, ("Standard", "Ekspres", "Priorytet")),
+    ("Pasta termiczna", ServiceOptionGroup.SelectionType.SINGLE, False, ("Standard", "Premium")),
+    ("Dodatki", ServiceOptionGroup.SelectionType.MULTI, False, ("Kopia danych", "Etui", "Test obciążeniowy")),
+)
+
+COMMENTS = (
+    "Sprzęt przyjęty, rozpoczynamy diagnostykę.",
+    "Zamówiono części, czekamy na dostawę.",
+    "Klient poproszony o hasło do systemu.",
+    "Wykonano testy po naprawie - bez uwag.",
+    "Urządzenie gotowe do odbioru.",
+)
+
+# Ścieżka workflow; WAITING_FOR_PARTS wstawiany losowo między IN_PROGRESS a READY
+FLOW = (
+    ServiceOrderStatus.NEW,
+    ServiceOrderStatus.RECEIVED,
+    ServiceOrderStatus.IN_PROGRESS,
+    ServiceOrderStatus.READY,
+    ServiceOrderStatus.COMPLETED,
+)
+
+# Docelowe statusy (wagi): świeże zlecenia są w toku, starsze niż miesiąc - zamknięte
+RECENT_STATUS_WEIGHTS = {
+    ServiceOrderStatus.NEW: 15,
+    ServiceOrderStatus.RECEIVED: 15,
+    ServiceOrderStatus.IN_PROGRESS: 25,
+    ServiceOrderStatus.WAITING_FOR_PARTS: 10,
+    ServiceOrderStatus.READY: 10,
+    ServiceOrderStatus.COMPLETED: 20,
+    ServiceOrderStatus.CANCELED: 5,
+}
+OLD_STATUS_WEIGHTS = {
+    ServiceOrderStatus.IN_PROGRESS: 1,
+    ServiceOrderStatus.WAITING_FOR_PARTS: 2,
+    ServiceOrderStatus.READY: 2,
+    ServiceOrderStatus.COMPLETED: 88,
+    ServiceOrderStatus.CANCELED: 7,
+}
+RECENT_DAYS = 30
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Wyłącza auto_now/auto_now_add w podanych modelach - bulk_create zapisze
+    historyczne daty z obiektów zamiast "teraz". Tylko do seedowania.
+    """
+    fields = [
+        f for model in models for f in model._meta.concrete_fields
+        if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False)
+    ]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def status_path(rng: random.Random, final: str) -> list:
+    """
+    Kolejne statusy od NEW do `final` (anulować można tylko nowe zlecenie).
+    """
+    if final == ServiceOrderStatus.CANCELED:
+        return [ServiceOrderStatus.NEW, ServiceOrderStatus.CANCELED]
+    if final == ServiceOrderStatus.WAITING_FOR_PARTS:
+        return list(FLOW[:3]) + [ServiceOrderStatus.WAITING_FOR_PARTS]
+
+    path = list(FLOW[:FLOW.index(final) + 1])
+    if final in (ServiceOrderStatus.READY, ServiceOrderStatus.COMPLETED) and rng.random() < 0.25:
+        path.insert(3, ServiceOrderStatus.WAITING_FOR_PARTS)
+    return path
+
+
+def seed_technicians(count: int) -> list:
+    technicians = []
+    for n in range(1, count + 1):
+        user, _ = User.objects.get_or_create(
+            username=f"{SEED_TECHNICIAN_PREFIX}{n:02d}",
+            defaults={"email": f"{SEED_TECHNICIAN_PREFIX}{n:02d}@example.com", "is_staff": True},
+        )
+        technician, _ = Technician.objects.get_or_create(user=user)
+        technicians.append(technician)
+    return technicians
+
+
+def seed_catalog(rng: random.Random, count: int) -> list:
+    """
+    Usługi z grupami i opcjami (3 bulk_create); zwraca [(usługa, [[opcje grupy], ...])].
+    """
+    services = []
+    for n in range(1, count + 1):
+        price_min = Decimal(rng.randrange(50, 400, 10))
+        services.append(Service(
+            name=f"{SEED_SERVICE_PREFIX}{n:04d} {SERVICE_NAMES[n % len(SERVICE_NAMES)]}",
+            description="Usługa wygenerowana do testów wydajności.",
+            base_price_min=price_min,
+            base_price_max=price_min + Decimal(rng.randrange(0, 300, 10)),
+            base_duration_minutes=rng.choice((30, 60, 90, 120, 180, 240)),
+        ))
+    Service.objects.bulk_create(services)
+
+    groups = ServiceOptionGroup.objects.bulk_create([
+        ServiceOptionGroup(
+            service=service,
+            name=name,
+            selection_type=selection_type,
+            is_required=required,
+            sort_order=position,
+        )
+        for service in services
+        for position, (name, selection_type, required, _) in enumerate(GROUP_TEMPLATES)
+    ])
+
+    options = ServiceOption.objects.bulk_create([
+        ServiceOption(
+            group=group,
+            name=option_name,
+            price_delta_min=Decimal(10 * position),
+            price_delta_max=Decimal(20 * position),
+            duration_delta_minutes=15 * position,
+            sort_order=position,
+        )
+        for group, (_, _, _, option_names) in zip(groups, GROUP_TEMPLATES * len(services))
+        for position, option_name in enumerate(option_names)
+    ])
+
+    per_group = {}
+    for option in options:
+        per_group.setdefault(option.group_id, []).append(option)
+    per_service = {}
+    for group in groups:
+        per_service.setdefault(group.service_id, []).append(per_group[group.id])
+
+    bump_catalog_version()
+    return [(service, per_service[service.id]) for service in services]
+
+
+def _pick_options(rng: random.Random, option_groups: list) -> list:
+    picked = []
+    for (_, selection_type, required, _), options in zip(GROUP_TEMPLATES, option_groups):
+        if selection_type == ServiceOptionGroup.SelectionType.SINGLE:
+            if required or rng.random() < 0.5:
+                picked.append(rng.choice(options))
+        else:
+            picked.extend(opt for opt in options if rng.random() < 0.3)
+    return picked
+
+
+def _seed_chunk(rng: random.Random, start: int, stop: int, catalog: list, technicians: list,
+                customers: int, anchor: datetime, days: int) -> dict:
+    orders = []
+    histories = []
+    for n in range(start, stop):
+        created_at = anchor - timedelta(seconds=rng.randrange(days * 86400))
+        age_days = (anchor - created_at).days
+        weights = RECENT_STATUS_WEIGHTS if age_days < RECENT_DAYS else OLD_STATUS_WEIGHTS
+        final = rng.choices(list(weights), weights=list(weights.values()))[0]
+
+        # Kolejne zmiany statusu co kilka godzin, nie później niż "teraz"
+        path = status_path(rng, final)
+        at = created_at
+        steps = [(path[0], at)]
+        for status in path[1:]:
+            at = min(at + timedelta(minutes=rng.randint(30, 48 * 60)), anchor)
+            steps.append((status, at))
+
+        customer = rng.randrange(customers)
+        estimate = None
+        if len(path) > 1 and final != ServiceOrderStatus.CANCELED:
+            estimate = steps[1][1] + timedelta(hours=rng.randint(4, 120))
+
+        orders.append(ServiceOrder(
+            order_number=f"{SEED_ORDER_PREFIX}{n:010d}",
+            customer_name=f"Klient {customer:07d}",
+            customer_email=f"klient{customer:07d}@example.com",
+            customer_phone=f"+48{500000000 + customer}",
+            status=final,
+            estimated_completion_at=estimate,
+            assigned_technician=rng.choice(technicians) if technicians and len(path) > 1 else None,
+            created_at=created_at,
+            updated_at=steps[-1][1],
+        ))
+        histories.append((steps, estimate))
+
+    with transaction.atomic(), explicit_timestamps(ServiceOrder, ServiceOrderItem, ServiceOrderComment, AuditLog):
+        ServiceOrder.objects.bulk_create(orders)
+
+        items = []
+        item_options = []
+        comments = []
+        logs = []
+        for order, (steps, estimate) in zip(orders, histories):
+            for _ in range(rng.choices((1, 2, 3), weights=(70, 22, 8))[0]):
+                service, option_groups = rng.choice(catalog)
+                options = _pick_options(rng, option_groups)
+                items.append(ServiceOrderItem(
+                    order=order,
+                    service=service,
+                    service_name_snapshot=service.name,
+                    base_price_min_snapshot=service.base_price_min,
+                    base_price_max_snapshot=service.base_price_max,
+                    calculated_price_min=service.base_price_min + sum(o.price_delta_min for o in options),
+                    calculated_price_max=service.base_price_max + sum(o.price_delta_max for o in options),
+                    estimated_duration_minutes=ServiceOrderItem.calculate_duration(service, options),
+                    created_at=order.created_at,
+                ))
+                item_options.append(options)
+
+            logs.append(AuditLog(
+                order=order,
+                entity_type=AuditLog.EntityType.SERVICE_ORDER,
+                entity_id=order.id,
+                action=AuditLog.Action.ORDER_CREATED,
+                new_value=f"status={ServiceOrderStatus.NEW}",
+                performed_at=order.created_at,
+            ))
+            for (old_status, _), (new_status, at) in zip(steps, steps[1:]):
+                logs.append(AuditLog(
+                    order=order,
+                    entity_type=AuditLog.EntityType.SERVICE_ORDER,
+                    entity_id=order.id,
+                    action=AuditLog.Action.STATUS_CHANGED,
+                    old_value=old_status,
+                    new_value=new_status,
+                    performed_at=at,
+                ))
+            if estimate is not None:
+                logs.append(AuditLog(
+                    order=order,
+                    entity_type=AuditLog.EntityType.SERVICE_ORDER,
+                    entity_id=order.id,
+                    action=AuditLog.Action.ESTIMATE_SET,
+                    old_value=str(None),
+                    new_value=str(estimate),
+                    performed_at=steps[1][1],
+                ))
+
+            for _ in range(rng.choices((0, 1, 2, 3), weights=(40, 30, 20, 10))[0]):
+                comments.append(ServiceOrderComment(
+                    order=order,
+                    visibility=rng.choice(ServiceOrderComment.Visibility.values),
+                    content=rng.choice(COMMENTS),
+                    created_at=rng.choice(steps)[1],
+                ))
+
+        ServiceOrderItem.objects.bulk_create(items)
+        ServiceOrderItemOption.objects.bulk_create([
+            ServiceOrderItemOption(
+                order_item=item,
+                option=option,
+                option_name_snapshot=option.name,
+                price_delta_min_snapshot=option.price_delta_min,
+                price_delta_max_snapshot=option.price_delta_max,
+            )
+            for item, options in zip(items, item_options)
+            for option in options
+        ])
+        created_comments = ServiceOrderComment.objects.bulk_create(comments)
+
+        for comment in created_comments:
+            logs.append(AuditLog(
+                order=comment.order,
+                entity_type=AuditLog.EntityType.SERVICE_ORDER_COMMENT,
+                entity_id=comment.id,
+                action=AuditLog.Action.COMMENT_ADDED,
+                new_value=f"visibility={comment.visibility}",
+                performed_at=comment.created_at,
+            ))
+        AuditLog.objects.bulk_create(logs)
+
+    return {
+        "orders": len(orders),
+        "items": len(items),
+        "item_options": sum(len(options) for options in item_options),
+        "comments": len(created_comments),
+        "audit_logs": len(logs),
+    }
+
+
+def seed_dataset(orders: int = 10_000, services: int = 50, technicians: int = 5, seed: int = 42,
+                 days: int = 365, chunk_size: int = 5_000, anchor: datetime = None, progress=None) -> dict:
+    """
+    Generuje zbiór danych i zwraca liczby utworzonych wierszy per tabela.
+    `progress(stats)` (opcjonalnie) jest wołane po każdej paczce zleceń.
+    ValueError, gdy w bazie są już dane z seedowania (najpierw clear_seeded()).
+    """
+    if (ServiceOrder.objects.filter(order_number__startswith=SEED_ORDER_PREFIX).exists()
+            or Service.objects.filter(name__startswith=SEED_SERVICE_PREFIX).exists()):
+        # Numery zleceń i nazwy usług zaczynają się zawsze od tych samych wartości
+        raise ValueError("W bazie są już dane z seedowania - najpierw je usuń (--clear).")
+
+    rng = random.Random(seed)
+    # Kotwica czasu: północ bieżącego dnia - ten sam zbiór danych przez cały dzień
+    anchor = anchor or timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+    stats = {"orders": 0, "items": 0, "item_options": 0, "comments": 0, "audit_logs": 0}
+    started = perf.perf_counter()
+
+    with transaction.atomic():
+        technician_rows = seed_technicians(technicians)
+        catalog = seed_catalog(rng, services)
+    stats["services"] = len(catalog)
+
+    # Około 3 zlecenia na klienta - historia w portalu klienta ma co pokazać
+    customers = max(1, orders // 3)
+    for start in range(0, orders, chunk_size):
+        chunk = _seed_chunk(
+            rng, start, min(start + chunk_size, orders), catalog, technician_rows, customers, anchor, days
+        )
+        for key, value in chunk.items():
+            stats[key] += value
+        stats["seconds"] = perf.perf_counter() - started
+        if progress:
+            progress(stats)
+
+    stats["seconds"] = perf.perf_counter() - started
+    return stats
+
+
+def clear_seeded() -> dict:
+    """
+    Usuwa zlecenia i usługi utworzone przez seed_dataset (kaskadowo pozycje, komentarze, audyt).
+    """
+    with transaction.atomic():
+        _, orders = ServiceOrder.objects.filter(order_number__startswith=SEED_ORDER_PREFIX).delete()
+        _, services = Service.objects.filter(name__startswith=SEED_SERVICE_PREFIX).delete()
+    if services:
+        bump_catalog_version()
+    return {**orders, **services}
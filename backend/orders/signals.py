@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version
+from .models import Service, ServiceOption, ServiceOptionGroup
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=ServiceOptionGroup)
+@receiver(post_save, sender=ServiceOption)
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=ServiceOptionGroup)
+@receiver(post_delete, sender=ServiceOption)
+def catalog_changed(sender, **kwargs):
+    """
+    Każda zmiana katalogu (np. przez admina) unieważnia cache zależne od katalogu.
+    """
+    transaction.on_commit(bump_catalog_version)
@@ -0,0 +1,152 @@
+"""
+Monitor SLA: zlecenia, którym od ostatniego przebiegu minął termin (estimated_completion_at).
+
+Każdy przebieg sprawdza tylko przedział (checkpoint, teraz] - zapytania zakresowe
+po indeksach order_estimate_idx (terminy, które właśnie minęły) i order_updated_idx
+(zlecenia zmienione od checkpointu, np. z estymacją cofniętą w przeszłość) zamiast
+liczenia is_overdue() dla każdego wiersza.
+Dla nowo przeterminowanych zleceń zapisujemy wpis audytu ORDER_OVERDUE i zadanie w tle
+(orders.jobs) z jednym zbiorczym alertem na technika (szablon orders/email/overdue_alert),
+a checkpoint przesuwamy w tej samej transakcji co wpisy audytu.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from . import jobs
+from .choices import ServiceOrderStatus
+from .models import AuditLog, ServiceOrder, SlaCheckpoint
+
+
+CHECKPOINT_NAME = "overdue_orders"
+
+# Pierwszy przebieg (brak checkpointu) sprawdza terminy z tego okresu wstecz
+INITIAL_LOOKBACK = timedelta(hours=24)
+
+
+def newly_overdue(since, until):
+    """
+    Niezakończone zlecenia, którym minął termin: termin w przedziale (since, until]
+    albo termin wcześniejszy, ale zlecenie zmienione po since (estymacja cofnięta
+    w przeszłość). Pomijamy zlecenia oznaczone już po upływie obecnego terminu.
+    """
+    flagged = AuditLog.objects.filter(
+        order_id=OuterRef("pk"),
+        action=AuditLog.Action.ORDER_OVERDUE,
+        performed_at__gte=OuterRef("estimated_completion_at"),
+    )
+    passed = ServiceOrder.objects.filter(estimated_completion_at__gt=since, estimated_completion_at__lte=until)
+    moved_back = ServiceOrder.objects.filter(updated_at__gt=since, estimated_completion_at__lte=since)
+    # Dwa podzapytania zamiast OR w jednym WHERE - każde czyta zakres swojego indeksu
+    return alert_rows(
+        ServiceOrder.objects.filter(Q(pk__in=passed.values("pk")) | Q(pk__in=moved_back.values("pk")))
+        .exclude(status__in=[ServiceOrderStatus.COMPLETED, ServiceOrderStatus.CANCELED])
+        .exclude(Exists(flagged))
+    )
+
+
+def alert_rows(queryset):
+    """
+    Kolumny potrzebne w treści alertu i do wyboru adresata.
+    """
+    return (
+        queryset.select_related("assigned_technician__user")
+        .only(
+            "id",
+            "order_number",
+            "customer_name",
+            "status",
+            "estimated_completion_at",
+            "assigned_technician__id",
+            "assigned_technician__user__email",
+            "assigned_technician__user__username",
+            "assigned_technician__user__first_name",
+            "assigned_technician__user__last_name",
+        )
+        .order_by("estimated_completion_at", "id")
+    )
+
+
+def alert_recipients(order: ServiceOrder) -> tuple:
+    """
+    Adresy alertu: przypisany technik, a bez technika - SLA_ALERT_EMAILS.
+    """
+    technician = order.assigned_technician
+    if technician is not None and technician.user.email:
+        return (technician.user.email,)
+    return tuple(getattr(settings, "SLA_ALERT_EMAILS", ()))
+
+
+def send_alerts(orders: list, connection=None) -> int:
+    """
+    Jeden mail na adresata ze wszystkimi jego nowo przeterminowanymi zleceniami.
+    """
+    # Wysyłka tylko z workera zadań (run_jobs) - mail ładowany dopiero tutaj
+    from django.core.mail import get_connection
+
+    from .emails import absolute_url, render_emails
+
+    per_recipients = {}
+    for order in orders:
+        to = alert_recipients(order)
+        if to:
+            per_recipients.setdefault(to, []).append({
+                "order": order,
+                "url": absolute_url(reverse("tech_order_detail", args=[order.order_number])),
+            })
+    if not per_recipients:
+        return 0
+
+    messages = render_emails(
+        "overdue_alert",
+        (({"orders": rows}, list(to)) for to, rows in per_recipients.items()),
+    )
+    connection = connection or get_connection()
+    with connection:
+        connection.send_messages(messages)
+    return len(messages)
+
+
+def send_alerts_for(order_ids: list) -> int:
+    """
+    Handler zadania (orders.jobs): alerty dla zleceń oznaczonych przez check_overdue.
+    """
+    return send_alerts(list(alert_rows(ServiceOrder.objects.filter(id__in=order_ids))))
+
+
+def check_overdue(now=None, lookback: timedelta = INITIAL_LOOKBACK) -> dict:
+    """
+    Jeden przebieg monitora; zwraca statystyki (liczba zleceń, przedział).
+    """
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        checkpoint = SlaCheckpoint.objects.select_for_update().filter(name=CHECKPOINT_NAME).first()
+        if checkpoint is None:
+            checkpoint = SlaCheckpoint(name=CHECKPOINT_NAME, checked_until=now - lookback)
+        since = checkpoint.checked_until
+
+        orders = list(newly_overdue(since, now)) if now > since else []
+
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                order=order,
+                entity_type=AuditLog.EntityType.SERVICE_ORDER,
+                entity_id=order.id,
+                action=AuditLog.Action.ORDER_OVERDUE,
+                new_value=str(order.estimated_completion_at),
+            )
+            for order in orders
+        ])
+
+        checkpoint.checked_until = max(since, now)
+        checkpoint.save()
+
+        if orders:
+            jobs.enqueue(jobs.SEND_SLA_ALERTS, {"order_ids": [order.id for order in orders]})
+
+    return {"orders": len(orders), "since": since, "until": checkpoint.checked_until}
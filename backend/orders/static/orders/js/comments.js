@@ -0,0 +1,52 @@
+// Doczytywanie starszych komentarzy (kursor z API) bez przeładowania strony.
+// Przycisk/link .load-older: data-url (API), data-cursor, data-insert:
+// "append" - lista od najnowszych (panel technika), "prepend" - lista
+// chronologiczna (śledzenie zlecenia). Komentarze trafiają do
+// <ul data-comments="WIDOCZNOŚĆ">.
+document.addEventListener("click", function (event) {
+  var trigger = event.target.closest(".load-older");
+  if (!trigger) {
+    return;
+  }
+  event.preventDefault();
+  if (trigger.dataset.loading) {
+    return;
+  }
+  trigger.dataset.loading = "1";
+
+  var url = trigger.dataset.url + "?before=" + encodeURIComponent(trigger.dataset.cursor);
+  fetch(url, { credentials: "same-origin", headers: { Accept: "application/json" } })
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.status);
+      }
+      return response.json();
+    })
+    .then(function (data) {
+      var prepend = trigger.dataset.insert === "prepend";
+      data.comments.forEach(function (comment) {
+        var list = document.querySelector('ul[data-comments="' + comment.visibility + '"]');
+        if (!list) {
+          return;
+        }
+        var item = document.createElement("li");
+        item.textContent = comment.created_at_display + " — " + comment.content;
+        // API zwraca od najnowszych - przy prepend każdy starszy idzie na początek
+        if (prepend) {
+          list.insertBefore(item, list.firstChild);
+        } else {
+          list.appendChild(item);
+        }
+      });
+
+      if (data.next_cursor) {
+        trigger.dataset.cursor = data.next_cursor;
+        delete trigger.dataset.loading;
+      } else {
+        trigger.remove();
+      }
+    })
+    .catch(function () {
+      delete trigger.dataset.loading;
+    });
+});
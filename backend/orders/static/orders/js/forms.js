@@ -0,0 +1,24 @@
+// Blokada ponownego wysłania formularza (podwójne kliknięcie) - po pierwszym
+// submit przyciski formularza są wyłączane. Wartość klikniętego przycisku
+// przekazujemy polem ukrytym, bo wyłączony przycisk nie trafia do POST.
+document.addEventListener("submit", function (event) {
+  var form = event.target;
+  if (form.dataset.submitted) {
+    event.preventDefault();
+    return;
+  }
+  form.dataset.submitted = "1";
+
+  var submitter = event.submitter;
+  if (submitter && submitter.name) {
+    var hidden = document.createElement("input");
+    hidden.type = "hidden";
+    hidden.name = submitter.name;
+    hidden.value = submitter.value;
+    form.appendChild(hidden);
+  }
+
+  form.querySelectorAll("button[type=submit], input[type=submit]").forEach(function (button) {
+    button.disabled = true;
+  });
+});
@@ -0,0 +1,54 @@
+"""
+Storage plików statycznych dla produkcji: nazwy z hashem treści (manifest)
+oraz prekompresowane warianty .gz / .br obok każdego pliku.
+
+Serwer WWW (nginx: gzip_static / brotli_static) wydaje gotowe warianty
+z nagłówkami cache "immutable", więc workery Django nie obsługują statyków.
+Brotli jest opcjonalne - bez pakietu `brotli` powstają tylko pliki .gz.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - zależność opcjonalna
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".txt", ".json", ".map", ".html", ".xml")
+
+# Małe pliki nie zyskują na kompresji (narzut nagłówków)
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        compressed = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not dry_run and isinstance(hashed_name, str) and hashed_name not in compressed:
+                compressed.add(hashed_name)
+                self._write_compressed(hashed_name)
+            yield name, hashed_name, processed
+
+    def _write_compressed(self, name: str) -> None:
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+
+        with self.open(name) as fh:
+            content = fh.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+
+        variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(content, quality=11)))
+
+        for suffix, data in variants:
+            # Zapisujemy tylko, gdy wariant jest faktycznie mniejszy
+            if len(data) < len(content):
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(data))
@@ -0,0 +1,125 @@
+"""
+Aktualizacja zlecenia z panelu technika (status, estymacja, komentarz).
+
+Zamiast pełnego formularza admina: jeden warunkowy UPDATE po wersji zlecenia
+(tylko gdy nie zmieniło się od wyświetlenia formularza), jeden bulk_create wpisów audytu,
+powiadomienie klienta do bufora zbiorczych maili (orders.notifications),
+a przeplanowanie kolejki jako zadanie w tle (orders.jobs).
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import jobs, notifications
+from .choices import ServiceOrderStatus
+from .models import AuditLog, ServiceOrder, ServiceOrderComment
+
+
+# Format pola estymacji w formularzu panelu technika
+ESTIMATE_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class TechUpdateError(Exception):
+    """
+    Niepoprawne dane formularza albo zlecenie zmienione w międzyczasie.
+    """
+
+
+def format_estimate(value) -> str:
+    return timezone.localtime(value).strftime(ESTIMATE_FORMAT) if value else ""
+
+
+def parse_estimate(raw: str):
+    """
+    "YYYY-MM-DD HH:MM" (czas lokalny) -> datetime ze strefą; pusty tekst -> None.
+    """
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    try:
+        return timezone.make_aware(datetime.strptime(raw, ESTIMATE_FORMAT))
+    except ValueError:
+        raise TechUpdateError("Estymacja musi mieć format YYYY-MM-DD HH:MM.")
+
+
+@transaction.atomic
+def apply_tech_update(order: ServiceOrder, user, status: str, estimate, comment: str = "",
+                      visibility: str = ServiceOrderComment.Visibility.INTERNAL) -> list:
+    """
+    Zapisuje zmiany technika; zwraca listę zapisanych akcji audytu (pusta = brak zmian).
+    `order` to stan z chwili wyświetlenia formularza (z jego wersją) - gdy w bazie
+    jest już nowsza wersja, rzucamy TechUpdateError zamiast nadpisywać cudzą zmianę.
+    """
+    if status not in ServiceOrderStatus.values:
+        raise TechUpdateError("Niepoprawny status.")
+    if visibility not in ServiceOrderComment.Visibility.values:
+        raise TechUpdateError("Niepoprawna widoczność komentarza.")
+
+    old_status = order.status
+    old_estimate = order.estimated_completion_at
+    if format_estimate(estimate) == format_estimate(old_estimate):
+        # Formularz ma dokładność do minut - nieruszone pole to brak zmiany
+        estimate = old_estimate
+    logs = []
+
+    if status != old_status or estimate != old_estimate:
+        # Wpisana estymacja ma pierwszeństwo przed planem; wyczyszczona - wraca do planera
+        manual = order.estimate_is_manual if estimate == old_estimate else estimate is not None
+        updated = ServiceOrder.objects.update_versioned(
+            order.pk,
+            order.version,
+            status=status,
+            estimated_completion_at=estimate,
+            estimate_is_manual=manual,
+        )
+        if not updated:
+            raise TechUpdateError("Zlecenie zostało w międzyczasie zmienione - odśwież stronę.")
+
+        order.status = status
+        order.estimated_completion_at = estimate
+        order.estimate_is_manual = manual
+        order.version += 1
+
+    if status != old_status:
+        logs.append(AuditLog(
+            order=order,
+            entity_type=AuditLog.EntityType.SERVICE_ORDER,
+            entity_id=order.id,
+            action=AuditLog.Action.STATUS_CHANGED,
+            old_value=old_status,
+            new_value=status,
+            performed_by=user,
+        ))
+        notifications.queue_status_change(order, old_status, status)
+
+        # Estymacja ustawiona ręcznie ma pierwszeństwo przed planem (jak w adminie)
+        if estimate == old_estimate and order.assigned_technician_id:
+            technician_id = order.assigned_technician_id
+            jobs.enqueue(jobs.REPLAN_TECHNICIAN, {"technician_id": technician_id}, key=f"replan:{technician_id}")
+
+    if estimate != old_estimate:
+        logs.append(AuditLog(
+            order=order,
+            entity_type=AuditLog.EntityType.SERVICE_ORDER,
+            entity_id=order.id,
+            action=AuditLog.Action.ESTIMATE_SET,
+            old_value=str(old_estimate),
+            new_value=str(estimate),
+            performed_by=user,
+        ))
+
+    comment = (comment or "").strip()
+    if comment:
+        created = ServiceOrderComment.objects.create(order=order, visibility=visibility, content=comment)
+        logs.append(AuditLog(
+            order=order,
+            entity_type=AuditLog.EntityType.SERVICE_ORDER_COMMENT,
+            entity_id=created.id,
+            action=AuditLog.Action.COMMENT_ADDED,
+            new_value=f"visibility={visibility}",
+            performed_by=user,
+        ))
+
+    AuditLog.objects.bulk_create(logs)
+    return [log.action for log in logs]
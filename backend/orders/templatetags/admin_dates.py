@@ -0,0 +1,105 @@
+"""
+date_hierarchy dla dużych tabel w adminie.
+
+Wbudowany tag Django wylicza lata / miesiące / dni przez SELECT DISTINCT po wszystkich
+wierszach bieżącego zakresu. Tu wystarcza jedno zapytanie Min/Max (dwa odczyty indeksu
+na polu daty), a kolejne okresy bierzemy z tego przedziału - mogą się trafić okresy
+bez wierszy, ale strona nie skanuje tabeli.
+"""
+import datetime
+
+from django import template
+from django.db import models
+from django.utils import formats, timezone
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+
+register = template.Library()
+
+
+def _date_range(cl, field_name, is_datetime):
+    date_range = cl.queryset.aggregate(first=models.Min(field_name), last=models.Max(field_name))
+    first, last = date_range["first"], date_range["last"]
+    if not first or not last:
+        return None, None
+    if is_datetime:
+        first = timezone.localtime(first) if timezone.is_aware(first) else first
+        last = timezone.localtime(last) if timezone.is_aware(last) else last
+    return first, last
+
+
+@register.inclusion_tag("admin/date_hierarchy.html")
+def range_date_hierarchy(cl):
+    if not cl.date_hierarchy:
+        return {"show": False}
+
+    field_name = cl.date_hierarchy
+    is_datetime = isinstance(cl.model._meta.get_field(field_name), models.DateTimeField)
+    year_field = f"{field_name}__year"
+    month_field = f"{field_name}__month"
+    day_field = f"{field_name}__day"
+    year_lookup = cl.params.get(year_field)
+    month_lookup = cl.params.get(month_field)
+    day_lookup = cl.params.get(day_field)
+
+    def link(filters):
+        return cl.get_query_string(filters, [f"{field_name}__"])
+
+    if year_lookup and month_lookup and day_lookup:
+        day = datetime.date(int(year_lookup), int(month_lookup), int(day_lookup))
+        return {
+            "show": True,
+            "back": {
+                "link": link({year_field: year_lookup, month_field: month_lookup}),
+                "title": capfirst(formats.date_format(day, "YEAR_MONTH_FORMAT")),
+            },
+            "choices": [{"title": capfirst(formats.date_format(day, "MONTH_DAY_FORMAT"))}],
+        }
+
+    # cl.queryset jest już zawężony do wybranego roku / miesiąca
+    first, last = _date_range(cl, field_name, is_datetime)
+
+    if not (year_lookup or month_lookup) and first:
+        # Jak w Django: start od najwęższego poziomu obejmującego wszystkie wiersze
+        if first.year == last.year:
+            year_lookup = first.year
+            if first.month == last.month:
+                month_lookup = first.month
+
+    if year_lookup and month_lookup:
+        year, month = int(year_lookup), int(month_lookup)
+        return {
+            "show": True,
+            "back": {"link": link({year_field: year_lookup}), "title": str(year_lookup)},
+            "choices": [
+                {
+                    "link": link({year_field: year_lookup, month_field: month_lookup, day_field: day}),
+                    "title": capfirst(formats.date_format(datetime.date(year, month, day), "MONTH_DAY_FORMAT")),
+                }
+                for day in (range(first.day, last.day + 1) if first else ())
+            ],
+        }
+
+    if year_lookup:
+        year = int(year_lookup)
+        return {
+            "show": True,
+            "back": {"link": link({}), "title": _("All dates")},
+            "choices": [
+                {
+                    "link": link({year_field: year_lookup, month_field: month}),
+                    "title": capfirst(formats.date_format(datetime.date(year, month, 1), "YEAR_MONTH_FORMAT")),
+                }
+                for month in (range(first.month, last.month + 1) if first else ())
+            ],
+        }
+
+    return {
+        "show": True,
+        "back": None,
+        "choices": [
+            {"link": link({year_field: str(year)}), "title": str(year)}
+            for year in (range(first.year, last.year + 1) if first else ())
+        ],
+    }
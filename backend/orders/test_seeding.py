@@ -0,0 +1,17 @@
+from django.db.models import Count
+
+from orders.choices import ServiceOrderStatus
+from orders.models import AuditLog, ServiceOrder, ServiceOrderItem, ServiceOrderItemOption
+from orders.seeding import SEED_ORDER_PREFIX
+
+
+def test_seeded_dataset(seeded_dataset):
+    assert seeded_dataset["orders"] == 200
+    assert ServiceOrder.objects.filter(order_number__startswith=SEED_ORDER_PREFIX).count() == 200
+    assert ServiceOrderItem.objects.count() == seeded_dataset["items"]
+    assert ServiceOrderItemOption.objects.count() == seeded_dataset["item_options"]
+    assert AuditLog.objects.count() == seeded_dataset["audit_logs"]
+
+    # Stare zlecenia są prawie zawsze zakończone
+    statuses = dict(ServiceOrder.objects.values_list("status").annotate(n=Count("id")))
+    assert statuses.get(ServiceOrderStatus.COMPLETED, 0) > statuses.get(ServiceOrderStatus.NEW, 0)
@@ -1,3 +1,595 @@
-from django.test import TestCase
+import threading
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import jobs, notifications, reporting, scheduling, sla
+from .catalog import bump_catalog_version, catalog_cache_key, get_catalog_version
+from .catalog_import import CatalogImportError, import_catalog, parse_csv, parse_json
+from .cart import CatalogSnapshot, new_idempotency_key, place_order
+from .choices import ServiceOrderStatus
+from .comments import comment_page
+from .models import (
+    AuditLog,
+    Job,
+    NotificationEvent,
+    Service,
+    ServiceOrder,
+    ServiceOption,
+    ServiceOptionGroup,
+    ServiceOrderComment,
+    ServiceRevenueDaily,
+    StatusDurationDaily,
+    Technician,
+)
+
+
+# Testy nie korzystają z plikowego cache z settings.py (wersja katalogu, kody portalu)
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def make_order(**fields) -> ServiceOrder:
+    return ServiceOrder.objects.create(
+        customer_name="Jan Kowalski",
+        customer_email=fields.pop("customer_email", "jan@example.com"),
+        customer_phone="500600700",
+        **fields,
+    )
+
+
+def make_service(**fields) -> Service:
+    fields.setdefault("name", "Czyszczenie laptopa")
+    fields.setdefault("base_price_min", Decimal("100.00"))
+    fields.setdefault("base_price_max", Decimal("150.00"))
+    return Service.objects.create(**fields)
+
+
+def run_queued_jobs() -> int:
+    """
+    Wykonuje gotowe zadania w wątku testu (bez zamykania połączenia transakcji TestCase).
+    """
+    claimed = jobs.claim_jobs("test", 100)
+    with mock.patch("orders.jobs.close_old_connections"):
+        for job in claimed:
+            jobs.run_job(job)
+    return len(claimed)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TechPanelTests(TestCase):
+    def setUp(self):
+        self.order = make_order()
+        self.url = f"/tech/orders/{self.order.order_number}/"
+        self.staff = User.objects.create_user("tech", password="x", is_staff=True)
+
+    def post_status(self, status):
+        return self.client.post(self.url, {"version": self.order.version, "status": status})
+
+    def test_anonymous_cannot_update_order(self):
+        response = self.post_status(ServiceOrderStatus.RECEIVED)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/admin/login/", response["Location"])
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, ServiceOrderStatus.NEW)
+
+    def test_staff_update_redirects_and_records_actor(self):
+        self.client.force_login(self.staff)
+        response = self.post_status(ServiceOrderStatus.RECEIVED)
+
+        self.assertRedirects(response, self.url)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, ServiceOrderStatus.RECEIVED)
+        log = AuditLog.objects.get(order=self.order, action=AuditLog.Action.STATUS_CHANGED)
+        self.assertEqual(log.performed_by, self.staff)
+
+    def test_stale_version_is_rejected(self):
+        self.client.force_login(self.staff)
+        self.post_status(ServiceOrderStatus.RECEIVED)
+        # Drugi formularz otwarty na tej samej (już nieaktualnej) wersji
+        response = self.post_status(ServiceOrderStatus.CANCELED)
+
+        self.assertContains(response, "Zlecenie zostało w międzyczasie zmienione")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, ServiceOrderStatus.RECEIVED)
+        self.assertEqual(self.order.version, 2)
+        self.assertEqual(AuditLog.objects.filter(action=AuditLog.Action.STATUS_CHANGED).count(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VersionedUpdateTests(TestCase):
+    def test_update_versioned_is_compare_and_set(self):
+        order = make_order()
+        updated_at = order.updated_at
+
+        self.assertTrue(ServiceOrder.objects.update_versioned(order.pk, 1, status=ServiceOrderStatus.RECEIVED))
+        self.assertFalse(ServiceOrder.objects.update_versioned(order.pk, 1, status=ServiceOrderStatus.CANCELED))
+
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.version), (ServiceOrderStatus.RECEIVED, 2))
+        self.assertGreater(order.updated_at, updated_at)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CommentPaginationTests(TestCase):
+    def setUp(self):
+        self.order = make_order()
+        Visibility = ServiceOrderComment.Visibility
+        for n in range(5):
+            ServiceOrderComment.objects.create(
+                order=self.order,
+                visibility=Visibility.INTERNAL if n % 2 else Visibility.PUBLIC,
+                content=f"k{n}",
+            )
+        # Ten sam created_at - kolejność i kursor rozstrzyga id
+        ServiceOrderComment.objects.update(created_at=timezone.now())
+
+    def test_cursor_pages_cover_all_comments_once(self):
+        visibilities = ServiceOrderComment.Visibility.values
+        seen = []
+        cursor = None
+        while True:
+            comments, cursor = comment_page(self.order, visibilities, before=cursor, limit=2)
+            seen.extend(c.content for c in comments)
+            if cursor is None:
+                break
+        self.assertEqual(seen, ["k4", "k3", "k2", "k1", "k0"])
+
+    def test_public_page_skips_internal_comments(self):
+        comments, _ = comment_page(self.order, [ServiceOrderComment.Visibility.PUBLIC])
+        self.assertEqual([c.content for c in comments], ["k4", "k2", "k0"])
+
+    def test_tech_comments_endpoint_requires_staff(self):
+        url = f"/tech/orders/{self.order.order_number}/comments/"
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(User.objects.create_user("tech", password="x", is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()["comments"]), 5)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class IdempotentOrderTests(TransactionTestCase):
+    """
+    Równoległe wątki - każdy z własnym połączeniem, więc bez transakcji TestCase.
+    """
+    threads = 4
+    retries = 3
+
+    def setUp(self):
+        service = make_service()
+        self.line = CatalogSnapshot([{"service_id": service.id, "option_ids": []}]).price_line(service.id, [])
+
+    def place(self, key):
+        return place_order("Jan Kowalski", "jan@example.com", "500600700", [self.line], idempotency_key=key)
+
+    def test_retry_with_same_key_returns_existing_order(self):
+        key = new_idempotency_key()
+        first = self.place(key)
+        again = self.place(key)
+
+        self.assertEqual(first.pk, again.pk)
+        self.assertEqual(ServiceOrder.objects.count(), 1)
+        self.assertEqual(Job.objects.filter(name=jobs.SEND_ORDER_CONFIRMATION).count(), 1)
+
+    def test_concurrent_submissions_create_one_order(self):
+        key = new_idempotency_key()
+        start = threading.Barrier(self.threads)
+
+        def attempt(_):
+            # Wszystkie wątki ruszają jednocześnie - wyścig o ten sam klucz
+            start.wait()
+            pks = []
+            try:
+                for _ in range(self.retries):
+                    # Zablokowana baza (SQLite) - klient ponawia żądanie
+                    for _ in range(50):
+                        try:
+                            pks.append(self.place(key).pk)
+                            break
+                        except OperationalError:
+                            connection.close()
+                return pks
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            results = [pk for pks in pool.map(attempt, range(self.threads)) for pk in pks]
+
+        self.assertEqual(len(results), self.threads * self.retries)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(ServiceOrder.objects.filter(idempotency_key=key).count(), 1)
+        self.assertEqual(Job.objects.filter(name=jobs.SEND_ORDER_CONFIRMATION).count(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReportingTests(TestCase):
+    def setUp(self):
+        service = make_service()
+        line = CatalogSnapshot([{"service_id": service.id, "option_ids": []}]).price_line(service.id, [])
+        self.order = place_order("Jan Kowalski", "jan@example.com", "500600700", [line])
+        self.start = timezone.make_aware(datetime(2025, 3, 10, 9, 0))
+        AuditLog.objects.filter(order=self.order).update(performed_at=self.start)
+
+    def change_status(self, old, new, at):
+        log = AuditLog.objects.create(
+            order=self.order,
+            entity_type=AuditLog.EntityType.SERVICE_ORDER,
+            entity_id=self.order.id,
+            action=AuditLog.Action.STATUS_CHANGED,
+            old_value=old,
+            new_value=new,
+        )
+        AuditLog.objects.filter(pk=log.pk).update(performed_at=at)
+
+    def durations(self):
+        return {
+            row.status: (row.transitions_count, row.total_duration)
+            for row in StatusDurationDaily.objects.filter(day=date(2025, 3, 10))
+        }
+
+    def test_refresh_is_incremental(self):
+        self.change_status(ServiceOrderStatus.NEW, ServiceOrderStatus.RECEIVED, self.start + timedelta(hours=2))
+        self.assertEqual(reporting.refresh_rollups()["status"], 1)
+        self.assertEqual(self.durations(), {ServiceOrderStatus.NEW: (1, timedelta(hours=2))})
+        self.assertEqual(ServiceRevenueDaily.objects.get().items_count, 1)
+
+        # Bez nowych wierszy nic nie jest przeliczane
+        self.assertEqual(reporting.refresh_rollups(), {"items": 0, "status": 0})
+
+        self.change_status(ServiceOrderStatus.RECEIVED, ServiceOrderStatus.IN_PROGRESS, self.start + timedelta(hours=5))
+        reporting.refresh_rollups()
+        self.assertEqual(self.durations(), {
+            ServiceOrderStatus.NEW: (1, timedelta(hours=2)),
+            ServiceOrderStatus.RECEIVED: (1, timedelta(hours=3)),
+        })
+
+    def test_workload_by_day_uses_date_range(self):
+        today = timezone.localdate()
+        rows = list(reporting.workload_by_day(today, today))
+        self.assertEqual([(row["day"], row["items"]) for row in rows], [(today, 1)])
+        self.assertEqual(list(reporting.workload_by_day(today + timedelta(days=1))), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CatalogVersionTests(TestCase):
+    def test_version_survives_cache_clear(self):
+        before = get_catalog_version()
+        key = catalog_cache_key("facets", "x")
+        cache.clear()
+
+        self.assertEqual(get_catalog_version(), before)
+        self.assertEqual(bump_catalog_version(), before + 1)
+        self.assertNotEqual(catalog_cache_key("facets", "x"), key)
+
+    def test_service_change_bumps_version(self):
+        before = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_service()
+        self.assertGreater(get_catalog_version(), before)
+
+
+CATALOG_JSON = """
+{"services": [{"name": "Diagnostyka", "base_price_min": "50", "base_price_max": "80",
+  "option_groups": [{"name": "Tryb", "options": [{"name": "Ekspres", "price_delta_min": "20", "price_delta_max": "30"}]}]}]}
+"""
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CatalogImportTests(TestCase):
+    def test_import_writes_only_differences(self):
+        diff = import_catalog(parse_json(CATALOG_JSON))
+        self.assertEqual(diff.summary()["services_created"], 1)
+        self.assertEqual(diff.summary()["options_created"], 1)
+
+        self.assertFalse(import_catalog(parse_json(CATALOG_JSON)).has_changes)
+
+        changed = CATALOG_JSON.replace('"price_delta_max": "30"', '"price_delta_max": "35"')
+        diff = import_catalog(parse_json(changed))
+        self.assertEqual(diff.summary()["options_updated"], 1)
+        self.assertEqual(ServiceOption.objects.get().price_delta_max, Decimal("35.00"))
+
+    def test_dry_run_saves_nothing(self):
+        diff = import_catalog(parse_json(CATALOG_JSON), dry_run=True)
+        self.assertTrue(diff.has_changes)
+        self.assertFalse(Service.objects.exists())
+
+    def test_csv_matches_json(self):
+        csv_text = (
+            "service_name,base_price_min,base_price_max,group_name,option_name,price_delta_min,price_delta_max\n"
+            "Diagnostyka,50,80,Tryb,Ekspres,20,30\n"
+        )
+        self.assertEqual(parse_csv(csv_text), parse_json(CATALOG_JSON))
+
+    def test_malformed_structure_raises_import_error(self):
+        for text in (
+            '{"services": [{"name": 5}]}',
+            '{"services": [{"name": "A", "base_price_min": 1, "base_price_max": 2, "option_groups": ["x"]}]}',
+            '{"services": [{"name": "A", "base_price_min": 3, "base_price_max": 2}]}',
+            "[1, 2",
+        ):
+            with self.subTest(text=text), self.assertRaises(CatalogImportError):
+                parse_json(text)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SlaMonitorTests(TestCase):
+    def overdue_logs(self, order):
+        return AuditLog.objects.filter(order=order, action=AuditLog.Action.ORDER_OVERDUE).count()
+
+    def test_passed_estimate_is_flagged_once(self):
+        now = timezone.now()
+        order = make_order(estimated_completion_at=now + timedelta(minutes=30))
+        sla.check_overdue(now=now)
+        self.assertEqual(self.overdue_logs(order), 0)
+
+        result = sla.check_overdue(now=now + timedelta(hours=1))
+        self.assertEqual(result["orders"], 1)
+        self.assertEqual(self.overdue_logs(order), 1)
+        self.assertTrue(Job.objects.filter(name=jobs.SEND_SLA_ALERTS).exists())
+
+        self.assertEqual(sla.check_overdue(now=now + timedelta(hours=2))["orders"], 0)
+
+    def test_estimate_moved_before_checkpoint_is_flagged(self):
+        order = make_order()
+        sla.check_overdue()
+
+        # Estymacja cofnięta sprzed ostatniego przebiegu - poza oknem terminów
+        order.estimated_completion_at = timezone.now() - timedelta(days=2)
+        order.save()
+
+        self.assertEqual(sla.check_overdue()["orders"], 1)
+        self.assertEqual(self.overdue_logs(order), 1)
+        self.assertEqual(sla.check_overdue()["orders"], 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CustomerPortalTests(TestCase):
+    url = "/portal/"
+
+    def setUp(self):
+        cache.clear()
+
+    def request_code(self, email):
+        return self.client.post(self.url, {"action": "request_code", "email": email})
+
+    def test_code_requests_look_the_same_for_unknown_address(self):
+        make_order(customer_email="jan@example.com")
+        known = self.request_code("jan@example.com")
+        unknown = self.request_code("obcy@example.com")
+
+        sent_notice = "Jeśli pod tym adresem są zlecenia, wysłaliśmy na niego kod."
+        self.assertContains(known, sent_notice)
+        self.assertContains(unknown, sent_notice)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.filter(name=jobs.SEND_PORTAL_CODE).count(), 2)
+
+        run_queued_jobs()
+        self.assertEqual([m.to for m in mail.outbox], [["jan@example.com"]])
+
+    def test_verified_customer_without_orders_stays_logged_in(self):
+        order = make_order(customer_email="jan@example.com")
+        self.request_code("Jan@Example.com ")
+        run_queued_jobs()
+        code = next(word for word in mail.outbox[0].body.split() if word.isdigit() and len(word) == 6)
+
+        response = self.client.post(self.url, {"action": "verify", "email": "jan@example.com", "code": code})
+        self.assertRedirects(response, self.url)
+        self.assertContains(self.client.get(self.url), order.order_number)
+
+        order.delete()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Brak zleceń.")
+        self.assertContains(response, 'value="logout"')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NotificationDigestTests(TestCase):
+    def setUp(self):
+        self.order = make_order()
+        notifications.queue_status_change(self.order, ServiceOrderStatus.NEW, ServiceOrderStatus.IN_PROGRESS)
+        notifications.queue_status_change(self.order, ServiceOrderStatus.IN_PROGRESS, ServiceOrderStatus.READY)
+        NotificationEvent.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+    def test_sends_one_digest_per_order(self):
+        stats = notifications.send_digests()
+
+        self.assertEqual(stats, {"orders": 1, "events": 2})
+        self.assertEqual([m.to for m in mail.outbox], [["jan@example.com"]])
+        self.assertFalse(NotificationEvent.objects.filter(sent_at__isnull=True).exists())
+        self.assertEqual(notifications.send_digests(), {"orders": 0, "events": 0})
+
+    def test_events_claimed_by_another_run_are_skipped(self):
+        claimed = notifications.claim_events([self.order.id])
+        self.assertEqual(len(claimed), 2)
+
+        self.assertEqual(notifications.send_digests(), {"orders": 0, "events": 0})
+        self.assertEqual(mail.outbox, [])
+
+    def test_stale_claim_is_taken_over(self):
+        notifications.claim_events([self.order.id])
+        NotificationEvent.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(notifications.send_digests()["events"], 2)
+
+    def test_failed_send_releases_events(self):
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError):
+            with self.assertRaises(OSError):
+                notifications.send_digests()
+
+        self.assertEqual(NotificationEvent.objects.filter(sent_at__isnull=True, locked_by="").count(), 2)
+        self.assertEqual(notifications.send_digests()["events"], 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ApplyScheduleTests(TestCase):
+    def setUp(self):
+        self.technician = Technician.objects.create(user=User.objects.create_user("tech"))
+        self.first = make_order()
+        self.second = make_order()
+
+    def test_writes_plan_and_bumps_version(self):
+        self.assertEqual(scheduling.apply_schedule(scheduling.plan_all()), 2)
+
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.assigned_technician, self.technician)
+        self.assertIsNotNone(self.first.estimated_completion_at)
+        self.assertEqual(self.first.version, 2)
+        self.assertEqual(scheduling.apply_schedule(scheduling.plan_all()), 0)
+
+    def test_order_changed_after_read_is_skipped_and_replanned(self):
+        schedule = scheduling.plan_all()
+        stored_plan = scheduling._stored_plan
+
+        def concurrent_edit(order_ids, batch_size):
+            stored = stored_plan(order_ids, batch_size)
+            # Edycja w panelu między odczytem planu a zapisem
+            ServiceOrder.objects.update_versioned(
+                self.second.pk, 1, estimated_completion_at=timezone.now(), assigned_technician=self.technician,
+            )
+            return stored
+
+        with mock.patch("orders.scheduling._stored_plan", side_effect=concurrent_edit):
+            self.assertEqual(scheduling.apply_schedule(schedule), 1)
+
+        edited = ServiceOrder.objects.get(pk=self.second.pk)
+        self.assertEqual(edited.version, 2)
+        self.assertNotEqual(edited.estimated_completion_at, schedule.estimates()[self.second.pk][1])
+        self.assertEqual(
+            list(Job.objects.values_list("name", "payload")),
+            [(jobs.REPLAN_TECHNICIAN, {"technician_id": self.technician.pk})],
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ServiceConfiguratorTests(TestCase):
+    def setUp(self):
+        self.service = make_service()
+        self.group = ServiceOptionGroup.objects.create(service=self.service, name="Dysk")
+        self.url = f"/services/{self.service.id}/"
+
+    def test_invalid_selection_shows_error_without_quote(self):
+        response = self.client.post(self.url, {"action": "calculate", f"group_{self.group.id}": "abc"})
+
+        self.assertContains(response, "Niepoprawny wybór opcji.")
+        self.assertNotContains(response, "Wycena")
+
+    def test_missing_contact_data_keeps_computed_quote(self):
+        response = self.client.post(self.url, {"action": "create_order"})
+
+        self.assertContains(response, "Wycena")
+        self.assertContains(response, "Uzupełnij dane kontaktowe")
+        self.assertFalse(ServiceOrder.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SeedDataCommandTests(TestCase):
+    def seed(self, *args):
+        call_command(
+            "seed_data", "--orders=60", "--services=3", "--technicians=2", "--chunk-size=25", *args,
+            stdout=StringIO(),
+        )
+        return list(ServiceOrder.objects.order_by("order_number").values_list("order_number", "status", "created_at"))
+
+    def test_anchor_gives_the_same_dataset(self):
+        first = self.seed("--anchor=2025-01-15")
+        self.assertEqual(len(first), 60)
+        self.assertLess(max(row[2] for row in first), timezone.make_aware(datetime(2025, 1, 15)))
+
+        self.assertEqual(self.seed("--clear", "--anchor=2025-01-15"), first)
+        self.assertNotEqual(self.seed("--clear", "--anchor=2025-02-15"), first)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OrderAdminListTests(TestCase):
+    def test_status_filter_lists_newest_first(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        older = make_order(status=ServiceOrderStatus.READY)
+        newer = make_order(status=ServiceOrderStatus.READY)
+        ServiceOrder.objects.filter(pk=older.pk).update(created_at=timezone.now() - timedelta(days=3))
+        make_order(status=ServiceOrderStatus.NEW)
+
+        response = self.client.get("/admin/orders/serviceorder/", {"status__exact": ServiceOrderStatus.READY})
+
+        self.assertEqual([o.pk for o in response.context["cl"].result_list], [newer.pk, older.pk])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.order = make_order()
+
+    def enqueue(self, **kwargs):
+        return jobs.enqueue(jobs.SEND_ORDER_CONFIRMATION, {"order_id": self.order.id}, **kwargs)
+
+    def test_claim_takes_ready_jobs_by_priority_once(self):
+        low = self.enqueue(priority=jobs.PRIORITY_LOW)
+        high = self.enqueue(priority=jobs.PRIORITY_HIGH)
+        self.enqueue(run_at=timezone.now() + timedelta(hours=1))
+
+        claimed = jobs.claim_jobs("w1", 10)
+
+        self.assertEqual([job.pk for job in claimed], [high.pk, low.pk])
+        self.assertTrue(all(job.status == Job.Status.RUNNING and job.attempts == 1 for job in claimed))
+        self.assertEqual(jobs.claim_jobs("w2", 10), [])
+
+    def test_enqueue_with_key_reuses_queued_job(self):
+        first = self.enqueue(key="confirm")
+        self.assertEqual(self.enqueue(key="confirm").pk, first.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_failed_job_is_retried_with_backoff_then_fails(self):
+        job = self.enqueue(max_attempts=2)
+
+        with mock.patch("orders.cart.send_order_confirmation", side_effect=OSError("SMTP")), \
+                self.assertLogs("orders.jobs", "WARNING"):
+            run_queued_jobs()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.Status.QUEUED, 1))
+            self.assertIn("OSError", job.last_error)
+            self.assertGreater(job.run_at, timezone.now())
+
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            run_queued_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 2))
+
+    def test_missing_object_fails_without_retry(self):
+        job = jobs.enqueue(jobs.SEND_ORDER_CONFIRMATION, {"order_id": 0})
+        with self.assertLogs("orders.jobs", "WARNING"):
+            run_queued_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 1))
+
+    def test_successful_job_is_done(self):
+        job = self.enqueue()
+        run_queued_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertEqual([m.to for m in mail.outbox], [["jan@example.com"]])
+
+    def test_stale_running_jobs_are_requeued(self):
+        retry = self.enqueue()
+        exhausted = self.enqueue(max_attempts=1)
+        jobs.claim_jobs("w1", 10)
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(jobs.requeue_stale(), 2)
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retry.status, retry.locked_by), (Job.Status.QUEUED, ""))
+        self.assertEqual(exhausted.status, Job.Status.FAILED)
+        self.assertEqual([job.pk for job in jobs.claim_jobs("w2", 10)], [retry.pk])
@@ -1,24 +1,20 @@
 from django.urls import path
 from . import views
-from django.shortcuts import render
 
-urlpatterns = [
+# Widoki klienta - jedyne obsługiwane przez workery publiczne (config.urls_public)
+public_urlpatterns = [
     path("track/", views.track_order, name="track_order"),
+    path("track/<str:order_number>/comments/", views.track_order_comments, name="track_order_comments"),
     path("services/", views.service_catalog, name="service_catalog"),
     path("services/<int:service_id>/", views.service_configurator, name="service_configurator"),
+    path("cart/", views.cart, name="cart"),
+    path("portal/", views.customer_portal, name="customer_portal"),
     path("order-created/<str:order_number>/", views.order_created, name="order_created"),
+]
+
+urlpatterns = public_urlpatterns + [
     path("tech/dashboard/", views.tech_dashboard, name="tech_dashboard"),
     path("tech/orders/<str:order_number>/", views.tech_order_detail, name="tech_order_detail"),
+    path("tech/orders/<str:order_number>/comments/", views.tech_order_comments, name="tech_order_comments"),
+    path("tech/reports/", views.reports, name="reports"),
 ]
-
-def order_created(request, order_number: str):
-    """
-    Strona potwierdzenia utworzenia zlecenia (PRG redirect – GET).
-    """
-    return render(
-        request,
-        "orders/order_created.html",
-        {
-            "order_number": order_number,
-        },
-    )
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Walidacja wyboru opcji w konfiguratorze na prekomputowanych ograniczeniach usługi.
+
+Dla każdej usługi raz budujemy mapę opcja -> grupa oraz zbiory grup wymaganych
+i jednokrotnego wyboru; wynik trzymamy w cache pod kluczem wersji katalogu.
+Sama walidacja to sprawdzenie zbiorów - bez zapytań do bazy - i odrzuca
+niepoprawne dane, zanim cokolwiek zostanie zapisane.
+"""
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from .catalog import catalog_cache_key
+from .models import ServiceOption, ServiceOptionGroup
+
+
+def build_constraints(service_id: int) -> dict:
+    """
+    Ograniczenia wyboru dla usługi (2 zapytania): tylko aktywne grupy i opcje.
+    """
+    groups = {
+        g["id"]: {
+            "name": g["name"],
+            "single": g["selection_type"] == ServiceOptionGroup.SelectionType.SINGLE,
+            "required": g["is_required"],
+        }
+        for g in ServiceOptionGroup.objects.filter(service_id=service_id, is_active=True)
+        .order_by("sort_order", "id")
+        .values("id", "name", "selection_type", "is_required")
+    }
+
+    option_group = dict(
+        ServiceOption.objects.filter(group_id__in=groups, is_active=True).values_list("id", "group_id")
+    )
+
+    return {
+        "service_id": service_id,
+        "groups": groups,
+        "option_group": option_group,
+        "required": frozenset(gid for gid, g in groups.items() if g["required"]),
+    }
+
+
+def get_constraints(service_id: int) -> dict:
+    return cache.get_or_set(
+        catalog_cache_key("constraints", service_id),
+        lambda: build_constraints(service_id),
+        timeout=None,
+    )
+
+
+def validate_option_ids(constraints: dict, option_ids) -> list:
+    """
+    Sprawdza listę id opcji (np. z koszyka): przynależność do usługi,
+    jednokrotny wybór w grupach SINGLE i komplet grup wymaganych. O(wybrane).
+    """
+    groups = constraints["groups"]
+    option_group = constraints["option_group"]
+    errors = []
+    chosen_per_group = {}
+
+    for opt_id in option_ids:
+        gid = option_group.get(opt_id)
+        if gid is None:
+            errors.append(f"Opcja #{opt_id} nie jest dostępna dla tej usługi.")
+            continue
+        chosen_per_group[gid] = chosen_per_group.get(gid, 0) + 1
+
+    for gid, count in chosen_per_group.items():
+        if count > 1 and groups[gid]["single"]:
+            errors.append(f"W grupie \"{groups[gid]['name']}\" można wybrać tylko jedną opcję.")
+
+    for gid in constraints["required"] - chosen_per_group.keys():
+        errors.append(f"Wybierz opcję w grupie \"{groups[gid]['name']}\".")
+
+    if errors:
+        raise ValidationError(errors)
+    return list(dict.fromkeys(option_ids))
+
+
+def parse_selection(constraints: dict, data) -> list:
+    """
+    Odczyt wyboru z formularza (pola group_<id>) - odrzuca wartości nie będące
+    liczbami, zanim dojdzie do walidacji ograniczeń.
+    """
+    option_ids = []
+    for gid in constraints["groups"]:
+        for raw in data.getlist(f"group_{gid}"):
+            raw = raw.strip()
+            if not raw:
+                continue
+            if not (raw.isascii() and raw.isdigit()):
+                raise ValidationError("Niepoprawny wybór opcji.")
+            option_ids.append(int(raw))
+
+    return validate_option_ids(constraints, option_ids)
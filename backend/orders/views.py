@@ -1,17 +1,50 @@
+from django.contrib import messages
 from django.shortcuts import render
 from .models import Service, ServiceOptionGroup, ServiceOption
-from .models import ServiceOrder, ServiceOrderComment, ServiceOrderItem, ServiceOrderItemOption
-from django.core.mail import send_mail
+from .models import ServiceOrder, ServiceOrderComment, normalize_email
 from .models import AuditLog
-from django.shortcuts import redirect
+from .cart import (
+    Cart,
+    CartError,
+    CatalogSnapshot,
+    clean_idempotency_key,
+    find_placed_order,
+    new_idempotency_key,
+    place_order,
+)
+from .validation import get_constraints, parse_selection, validate_option_ids
+from django.core.exceptions import ValidationError
+from django.shortcuts import redirect, get_object_or_404
+from django.http import Http404, JsonResponse
+from .comments import comment_page, comment_to_dict, is_tracked_order, remember_tracked_order
 from .choices import ServiceOrderStatus
+from functools import wraps
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition
+from django.db.models import Prefetch
+from .catalog import get_catalog_changed_at, get_catalog_version
+from .catalog_search import get_facets, parse_filters, search_services
+from .db_router import use_replica
 
 
 
 STATUS_LABELS = dict(ServiceOrderStatus.choices)
 
 
+def staff_required(view):
+    """
+    staff_member_required z admina, importowany dopiero przy wywołaniu - import
+    modułu widoków nie ładuje django.contrib.admin (workery publiczne go nie mają).
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        from django.contrib.admin.views.decorators import staff_member_required
+        return staff_member_required(view)(request, *args, **kwargs)
+    return wrapper
+
+
 
+@use_replica
 def track_order(request):
     """
     Guest access: śledzenie zlecenia bez logowania.
@@ -32,7 +65,7 @@ def track_order(request):
             return render(request, "orders/track_order.html", context)
 
         # Szukamy zlecenia
-        order = ServiceOrder.objects.filter(order_number=order_number).first()
+        order = ServiceOrder.objects.tracking_row().filter(order_number=order_number).first()
 
         # Bezpieczeństwo: nie mówimy, czy numer jest poprawny.
         if not order:
@@ -47,10 +80,10 @@ def track_order(request):
             context["error"] = "Nie znaleziono zlecenia dla podanych danych."
             return render(request, "orders/track_order.html", context)
 
-        public_comments = ServiceOrderComment.objects.filter(
-            order=order,
-            visibility=ServiceOrderComment.Visibility.PUBLIC,
-        ).order_by("created_at")
+        # Ostatnia strona komentarzy (chronologicznie); starsze doczytuje "Pokaż starsze"
+        public_comments, comments_cursor = comment_page(order, [ServiceOrderComment.Visibility.PUBLIC])
+        public_comments.reverse()
+        remember_tracked_order(request.session, order.order_number)
 
         audit_entries = AuditLog.objects.filter(
             order=order,
@@ -96,6 +129,7 @@ def track_order(request):
             "status": order.get_status_display(),
             "estimated_completion_at": order.estimated_completion_at,
             "comments": public_comments,
+            "comments_cursor": comments_cursor,
             "audit_entries": audit_entries,
             "audit_timeline": audit_timeline,
         }
@@ -105,18 +139,74 @@ def track_order(request):
     return render(request, "orders/track_order.html", context)
 
 
+@use_replica
+def track_order_comments(request, order_number: str):
+    """
+    Starsze komentarze publiczne (JSON) - tylko dla zlecenia zweryfikowanego w tej sesji.
+    """
+    if not is_tracked_order(request.session, order_number):
+        raise Http404
+
+    order = get_object_or_404(ServiceOrder, order_number=order_number)
+    comments, next_cursor = comment_page(
+        order,
+        [ServiceOrderComment.Visibility.PUBLIC],
+        before=request.GET.get("before"),
+    )
+    return JsonResponse({
+        "comments": [comment_to_dict(c) for c in comments],
+        "next_cursor": next_cursor,
+    })
+
+
+def _catalog_etag(request):
+    return f"catalog-v{get_catalog_version()}"
+
+
+def _catalog_last_modified(request):
+    return get_catalog_changed_at()
+
+
+@condition(etag_func=_catalog_etag, last_modified_func=_catalog_last_modified)
 def service_catalog(request):
     """
     Katalog usług dla klienta (read-only).
-    Pokazuje tylko aktywne usługi.
+    Pokazuje tylko aktywne usługi - filtrowane, sortowane i stronicowane po stronie serwera
+    (orders.catalog_search).
+
+    ETag / Last-Modified pochodzą z wersji katalogu (CatalogVersion) - wynik zależy tylko od niej
+    i od parametrów w URL, więc powtórna wizyta dostaje 304 po jednym odczycie wiersza wersji.
+    Liczniki facetów i fragmenty pojedynczych usług są w cache.
     """
-    services = Service.objects.filter(is_active=True).order_by("name")
+    filters = parse_filters(request.GET)
 
     return render(
         request,
         "orders/service_catalog.html",
-        {"services": services},
+        {
+            "filters": filters,
+            "page": search_services(filters, request.GET.get("page")),
+            "facets": get_facets(filters["q"]),
+            "sort_choices": [("name", "nazwa"), ("price", "cena"), ("duration", "czas")],
+        },
+    )
+
+
+def _load_group_options(service):
+    """
+    Grupy z aktywnymi opcjami (2 zapytania) - wywoływane leniwie z szablonu,
+    tylko gdy fragment konfiguratora nie jest w cache.
+    """
+    groups = ServiceOptionGroup.objects.filter(
+        service=service,
+        is_active=True,
+    ).order_by("sort_order", "id").prefetch_related(
+        Prefetch(
+            "options",
+            queryset=ServiceOption.objects.filter(is_active=True).order_by("sort_order", "id"),
+        )
     )
+    return [(g, list(g.options.all())) for g in groups]
 
 
 def service_configurator(request, service_id: int):
@@ -124,24 +214,12 @@ def service_configurator(request, service_id: int):
     Konfigurator usługi dla klienta:
     - pokazuje grupy opcji i dostępne opcje
     - po POST liczy widełki ceny (min/max)
+    - dodaje konfigurację do koszyka albo od razu składa zlecenie
     """
     service = Service.objects.get(pk=service_id, is_active=True)
 
-    groups = ServiceOptionGroup.objects.filter(
-        service=service,
-        is_active=True,
-    ).order_by("sort_order", "id")
-
-    # Przygotujemy strukturę: grupa -> opcje
-    group_options = []
-    for g in groups:
-        options = ServiceOption.objects.filter(
-            group=g,
-            is_active=True,
-        ).order_by("sort_order", "id")
-        group_options.append((g, options))
-
     result = None
+    error = None
 
     customer_defaults = {
         "customer_name": "",
@@ -149,7 +227,16 @@ def service_configurator(request, service_id: int):
         "customer_phone": "",
     }
 
+    idempotency_key = None
+
     if request.method == "POST":
+        action = request.POST.get("action")
+        idempotency_key = clean_idempotency_key(request.POST.get("idempotency_key"))
+
+        # Powtórzone złożenie zlecenia - przekierowanie do już utworzonego, bez zapisów
+        placed = find_placed_order(idempotency_key) if action == "create_order" else None
+        if placed:
+            return redirect("order_created", order_number=placed.order_number)
 
         customer_defaults = {
             "customer_name": request.POST.get("customer_name", ""),
@@ -157,107 +244,146 @@ def service_configurator(request, service_id: int):
             "customer_phone": request.POST.get("customer_phone", ""),
         }
 
-        # Zbieramy zaznaczone opcje z formularza
-        selected_option_ids = []
-
-        for g, _opts in group_options:
-            field_name = f"group_{g.id}"
+        # Walidacja wyboru na prekomputowanych ograniczeniach (bez zapytań)
+        priced = None
+        try:
+            selected_option_ids = parse_selection(get_constraints(service.id), request.POST)
+        except ValidationError as exc:
+            error = " ".join(exc.messages)
+        else:
+            line = {"service_id": service.id, "option_ids": selected_option_ids}
+            try:
+                priced = CatalogSnapshot([line]).price_line(service.id, selected_option_ids)
+            except CartError as exc:
+                error = str(exc)
+
+        if priced:
+            result = {
+                "total_min": priced["total_min"],
+                "total_max": priced["total_max"],
+                "selected_options": priced["options"],
+            }
 
-            if g.selection_type == ServiceOptionGroup.SelectionType.SINGLE:
-                chosen = request.POST.get(field_name)
-                if chosen:
-                    selected_option_ids.append(int(chosen))
+        if priced and action == "add_to_cart":
+            try:
+                Cart(request.session).add(service.id, selected_option_ids)
+            except CartError as exc:
+                error = str(exc)
             else:
-                chosen_list = request.POST.getlist(field_name)
-                selected_option_ids.extend([int(x) for x in chosen_list if x])
-
-        selected_options = ServiceOption.objects.filter(id__in=selected_option_ids)
-
-        # Liczymy widełki ceny: baza + sumy delt
-        total_min = service.base_price_min
-        total_max = service.base_price_max
-
-        for opt in selected_options:
-            total_min += opt.price_delta_min
-            total_max += opt.price_delta_max
-
-        result = {
-            "total_min": total_min,
-            "total_max": total_max,
-            "selected_options": selected_options,
-        }
-        action = request.POST.get("action")
+                return redirect("cart")
 
-        if action == "create_order":
+        if priced and action == "create_order":
             customer_name = (request.POST.get("customer_name") or "").strip()
             customer_email = (request.POST.get("customer_email") or "").strip()
             customer_phone = (request.POST.get("customer_phone") or "").strip()
 
             if not customer_name or not customer_email or not customer_phone:
-                result["error"] = "Uzupełnij dane kontaktowe, aby utworzyć zlecenie."
+                error = "Uzupełnij dane kontaktowe, aby utworzyć zlecenie."
             else:
-                order = ServiceOrder.objects.create(
-                    customer_name=customer_name,
-                    customer_email=customer_email,
-                    customer_phone=customer_phone,
+                order = place_order(
+                    customer_name, customer_email, customer_phone, [priced],
+                    idempotency_key=idempotency_key,
                 )
+                return redirect("order_created", order_number=order.order_number)
 
-                AuditLog.objects.create(
-                    order=order,
-                    entity_type=AuditLog.EntityType.SERVICE_ORDER,
-                    entity_id=order.id,
-                    action=AuditLog.Action.ORDER_CREATED,
-                    new_value=f"status={order.status}",
-                    performed_by=None,
-                )
+    return render(
+        request,
+        "orders/service_configurator.html",
+        {
+            "service": service,
+            # Callable - szablon wywoła go tylko przy braku fragmentu w cache
+            "group_options": lambda: _load_group_options(service),
+            "catalog_version": get_catalog_version(),
+            # Wycena tylko, gdy faktycznie policzona; błąd osobno
+            "result": result,
+            "error": error,
+            "customer_defaults": customer_defaults,
+            # Ten sam klucz przy ponownym wyświetleniu po błędzie - to wciąż ta sama próba
+            "idempotency_key": idempotency_key or new_idempotency_key(),
+        },
+    )
 
-                send_mail(
-                    subject=f"Potwierdzenie przyjęcia zlecenia {order.order_number}",
-                    message=(
-                        f"Dziękujemy! Twoje zlecenie zostało przyjęte.\n\n"
-                        f"Numer zlecenia: {order.order_number}\n"
-                        f"Status: {order.get_status_display()}\n\n"
-                        f"Możesz śledzić status tutaj: /track/\n"
-                        f"(podaj numer zlecenia oraz e-mail lub telefon)\n"
-                    ),
-                    from_email=None,
-                    recipient_list=[order.customer_email],
-                )
 
-                order_item = ServiceOrderItem.objects.create(
-                    order=order,
-                    service=service,
-                    service_name_snapshot=service.name,
-                    base_price_min_snapshot=service.base_price_min,
-                    base_price_max_snapshot=service.base_price_max,
-                    calculated_price_min=total_min,
-                    calculated_price_max=total_max,
-                )
+def cart(request):
+    """
+    Koszyk: lista skonfigurowanych usług i złożenie jednego zlecenia z wieloma pozycjami.
+    """
+    cart = Cart(request.session)
+    error = None
 
-                for opt in selected_options:
-                    ServiceOrderItemOption.objects.create(
-                        order_item=order_item,
-                        option=opt,
-                        option_name_snapshot=opt.name,
-                        price_delta_min_snapshot=opt.price_delta_min,
-                        price_delta_max_snapshot=opt.price_delta_max,
-                    )
+    customer_defaults = {
+        "customer_name": request.POST.get("customer_name", ""),
+        "customer_email": request.POST.get("customer_email", ""),
+        "customer_phone": request.POST.get("customer_phone", ""),
+    }
 
-                return redirect("order_created", order_number=order.order_number)
-            customer_defaults = {
-                "customer_name": request.POST.get("customer_name", "") if request.method == "POST" else "",
-                "customer_email": request.POST.get("customer_email", "") if request.method == "POST" else "",
-                "customer_phone": request.POST.get("customer_phone", "") if request.method == "POST" else "",
-            }
+    idempotency_key = None
+
+    if request.method == "POST":
+        action = request.POST.get("action")
+        idempotency_key = clean_idempotency_key(request.POST.get("idempotency_key"))
+
+        placed = find_placed_order(idempotency_key) if action == "checkout" else None
+        if placed:
+            return redirect("order_created", order_number=placed.order_number)
+
+        if action == "remove":
+            try:
+                cart.remove(int(request.POST.get("index", "")))
+            except ValueError:
+                pass
+            return redirect("cart")
+
+        if action == "checkout":
+            customer_name = customer_defaults["customer_name"].strip()
+            customer_email = customer_defaults["customer_email"].strip()
+            customer_phone = customer_defaults["customer_phone"].strip()
+
+            if not customer_name or not customer_email or not customer_phone:
+                error = "Uzupełnij dane kontaktowe, aby utworzyć zlecenie."
+            else:
+                # Jedna wycena całego koszyka na jednym odczycie katalogu
+                snapshot = CatalogSnapshot(cart)
+                try:
+                    for line in cart:
+                        validate_option_ids(get_constraints(line["service_id"]), line["option_ids"])
+                    priced_lines = [snapshot.price_line(l["service_id"], l["option_ids"]) for l in cart]
+                    order = place_order(
+                        customer_name, customer_email, customer_phone, priced_lines,
+                        idempotency_key=idempotency_key,
+                    )
+                except ValidationError as exc:
+                    error = " ".join(exc.messages)
+                except CartError as exc:
+                    error = str(exc)
+                else:
+                    cart.clear()
+                    return redirect("order_created", order_number=order.order_number)
+
+    # Wycena do wyświetlenia; pozycje niedostępne w katalogu oznaczamy błędem
+    snapshot = CatalogSnapshot(cart)
+    lines = []
+    total_min = total_max = 0
+    for index, line in enumerate(cart):
+        try:
+            priced = snapshot.price_line(line["service_id"], line["option_ids"])
+        except CartError as exc:
+            lines.append({"index": index, "error": str(exc)})
+            continue
+        total_min += priced["total_min"]
+        total_max += priced["total_max"]
+        lines.append({"index": index, **priced})
 
     return render(
         request,
-        "orders/service_configurator.html",
+        "orders/cart.html",
         {
-            "service": service,
-            "group_options": group_options,
-            "result": result,
+            "lines": lines,
+            "total_min": total_min,
+            "total_max": total_max,
+            "error": error,
             "customer_defaults": customer_defaults,
+            "idempotency_key": idempotency_key or new_idempotency_key(),
         },
     )
 
@@ -272,21 +398,69 @@ def order_created(request, order_number: str):
         {"order_number": order_number},
     )
 
+def customer_portal(request):
+    """
+    Portal klienta: wszystkie zlecenia dla adresu e-mail zweryfikowanego kodem jednorazowym.
+
+    POST action=request_code -> wysyła kod (odpowiedź niezależna od istnienia zleceń)
+    POST action=verify       -> sprawdza kod i loguje adres w sesji
+    POST action=logout       -> wylogowanie z portalu
+    GET                      -> formularz albo strona historii (?page=N)
+    """
+    from . import portal
+
+    context = {"email": "", "code_sent": False, "error": None, "page": None}
+
+    if request.method == "POST":
+        action = request.POST.get("action")
+        email = normalize_email(request.POST.get("email"))
+        context["email"] = email
+        try:
+            if action == "request_code":
+                portal.request_code(email)
+                context["code_sent"] = True
+            elif action == "verify":
+                portal.verify_code(request.session, email, request.POST.get("code"))
+                return redirect("customer_portal")
+            elif action == "logout":
+                portal.logout(request.session)
+                return redirect("customer_portal")
+        except portal.PortalError as e:
+            context["error"] = str(e)
+            context["code_sent"] = action == "verify"
+
+    customer_email = portal.portal_email(request.session)
+    if customer_email:
+        context["customer_email"] = customer_email
+        context["page"] = portal.order_history(customer_email, request.GET.get("page"))
+        context["status_labels"] = STATUS_LABELS
+
+    return render(request, "orders/customer_portal.html", context)
+
+
+@staff_required
+@use_replica
 def tech_dashboard(request):
     """
     Dashboard technika: podział zleceń na Nowe / W toku / Przeterminowane.
     """
-    orders_new = ServiceOrder.objects.filter(status=ServiceOrderStatus.NEW).order_by("-created_at")
+    # Tylko kolumny wyświetlane na liście (ServiceOrderQuerySet.dashboard_rows)
+    orders_new = (
+        ServiceOrder.objects.filter(status=ServiceOrderStatus.NEW)
+        .order_by("-created_at")
+        .dashboard_rows()
+    )
 
-    orders_in_progress = ServiceOrder.objects.filter(
-        status__in=[ServiceOrderStatus.IN_PROGRESS, ServiceOrderStatus.WAITING_FOR_PARTS]
-    ).order_by("-created_at")
+    orders_in_progress = (
+        ServiceOrder.objects.filter(
+            status__in=[ServiceOrderStatus.IN_PROGRESS, ServiceOrderStatus.WAITING_FOR_PARTS]
+        )
+        .order_by("-created_at")
+        .dashboard_rows()
+    )
 
-    # Przeterminowane liczymy metodą is_overdue 
-    all_active = ServiceOrder.objects.exclude(
-        status__in=[ServiceOrderStatus.COMPLETED, ServiceOrderStatus.CANCELED]
-    ).order_by("-created_at")
-    orders_overdue = [o for o in all_active if o.is_overdue()]
+    # Przeterminowane filtrujemy w bazie (odpowiednik is_overdue)
+    orders_overdue = ServiceOrder.objects.overdue().order_by("-created_at").dashboard_rows()
 
     return render(
         request,
@@ -299,21 +473,52 @@ def tech_dashboard(request):
     )
 
 
+@staff_required
 def tech_order_detail(request, order_number: str):
     """
     Widok szczegółów zlecenia dla technika.
+
+    GET  -> szczegóły, komentarze, audit log
+    POST -> zmiana statusu / estymacji i opcjonalny komentarz (orders.tech_updates)
     """
-    order = ServiceOrder.objects.get(order_number=order_number)
+    # Panel technika (planer, powiadomienia) - ładowany przy pierwszym użyciu, nie przy starcie
+    from .tech_updates import TechUpdateError, apply_tech_update, format_estimate, parse_estimate
 
-    comments_internal = ServiceOrderComment.objects.filter(
-        order=order,
-        visibility=ServiceOrderComment.Visibility.INTERNAL,
-    ).order_by("-created_at")
+    order = ServiceOrder.objects.get(order_number=order_number)
+    error = None
 
-    comments_public = ServiceOrderComment.objects.filter(
-        order=order,
-        visibility=ServiceOrderComment.Visibility.PUBLIC,
-    ).order_by("-created_at")
+    if request.method == "POST":
+        # Wersja z chwili wyświetlenia formularza - zmiana konkurencyjna kończy się błędem
+        posted_version = request.POST.get("version", "")
+        if posted_version.isdigit():
+            order.version = int(posted_version)
+        try:
+            actions = apply_tech_update(
+                order,
+                request.user,
+                status=request.POST.get("status", order.status),
+                estimate=parse_estimate(request.POST.get("estimated_completion_at")),
+                comment=request.POST.get("comment", ""),
+                visibility=request.POST.get("visibility", ServiceOrderComment.Visibility.INTERNAL),
+            )
+        except TechUpdateError as e:
+            error = str(e)
+            # Aktualny stan (w tym nowa wersja) do kolejnej edycji
+            order.refresh_from_db()
+        else:
+            # Post/Redirect/Get: odświeżenie strony nie wyśle formularza ponownie;
+            # przeplanowanie terminu robi worker
+            messages.success(request, "Zapisano zmiany." if actions else "Brak zmian do zapisania.")
+            return redirect("tech_order_detail", order_number=order.order_number)
+
+    # Jedno zapytanie o stronę komentarzy obu widoczności, podział w pamięci
+    comments, comments_cursor = comment_page(
+        order,
+        [ServiceOrderComment.Visibility.INTERNAL, ServiceOrderComment.Visibility.PUBLIC],
+        before=request.GET.get("before"),
+    )
+    comments_internal = [c for c in comments if c.visibility == ServiceOrderComment.Visibility.INTERNAL]
+    comments_public = [c for c in comments if c.visibility == ServiceOrderComment.Visibility.PUBLIC]
 
     audit_entries = AuditLog.objects.filter(order=order).order_by("-performed_at")
 
@@ -324,6 +529,81 @@ def tech_order_detail(request, order_number: str):
             "order": order,
             "comments_internal": comments_internal,
             "comments_public": comments_public,
+            "comments_cursor": comments_cursor,
             "audit_entries": audit_entries,
+            "status_choices": ServiceOrderStatus.choices,
+            "est_default": format_estimate(order.estimated_completion_at),
+            "visibility_choices": ServiceOrderComment.Visibility.choices,
+            "error": error,
+        },
+    )
+
+
+@staff_required
+def tech_order_comments(request, order_number: str):
+    """
+    Kolejna strona komentarzy zlecenia (obie widoczności) jako JSON.
+    """
+    order = get_object_or_404(ServiceOrder, order_number=order_number)
+    comments, next_cursor = comment_page(
+        order,
+        [ServiceOrderComment.Visibility.INTERNAL, ServiceOrderComment.Visibility.PUBLIC],
+        before=request.GET.get("before"),
+    )
+    return JsonResponse({
+        "comments": [comment_to_dict(c) for c in comments],
+        "next_cursor": next_cursor,
+    })
+
+
+def _date_param(raw):
+    """
+    Data z parametru GET; niepoprawna albo nieistniejąca (np. 2025-02-30) - jak brak filtra.
+    """
+    try:
+        return parse_date(raw or "")
+    except ValueError:
+        return None
+
+
+@staff_required
+@use_replica
+def reports(request):
+    """
+    Raporty (tylko dla personelu): przychód, attach rate opcji, czas w statusach.
+    Dane pochodzą z rollupów odświeżanych komendą refresh_reports.
+    """
+    from . import reporting
+
+    date_from = _date_param(request.GET.get("from"))
+    date_to = _date_param(request.GET.get("to"))
+    period = request.GET.get("period") or "month"
+    if period not in reporting.PERIOD_TRUNCS:
+        period = "month"
+
+    durations = []
+    for row in reporting.status_durations(date_from, date_to):
+        row["status_label"] = STATUS_LABELS.get(row["status"], row["status"])
+        row["average"] = row["duration"] / row["transitions"] if row["transitions"] else None
+        durations.append(row)
+
+    return render(
+        request,
+        "orders/reports.html",
+        {
+            "date_from": date_from,
+            "date_to": date_to,
+            "period": period,
+            "periods": list(reporting.PERIOD_TRUNCS),
+            "by_service": reporting.revenue_by_service(date_from, date_to),
+            "by_period": reporting.revenue_by_period(date_from, date_to, period),
+            "attach_rates": reporting.option_attach_rates(date_from, date_to),
+            "status_durations": durations,
+            # Dzienne obciążenie tylko dla wybranego zakresu - bez niego lista dni z całej historii
+            "workload_by_day": reporting.workload_by_day(date_from, date_to) if date_from or date_to else None,
+            "workload": [
+                {**row, "status_label": STATUS_LABELS.get(row["status"], row["status"])}
+                for row in reporting.workload_by_status()
+            ],
         },
     )